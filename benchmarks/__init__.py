@@ -0,0 +1,8 @@
+"""
+Performance benchmarks for the expense tracker.
+
+These are scripts, not tests: run them with `python -m benchmarks.<name>` from
+the project root, with the usual DJANGO_* environment variables (or .env) set.
+Each one works on a throwaway database created the same way the test runner
+does it, so the development database is never touched.
+"""
@@ -0,0 +1,97 @@
+"""
+Categorizing imported expenses with a user's categorization rules.
+
+Matches generated bank-statement descriptions (no database needed) against
+a set of substring rules, a few of them limited to an amount range, in two
+ways:
+
+  per-rule     every rule's regex searched in turn until one matches (how
+               CategoryResolver matched its substring rules)
+  combined     core.categorization.RuleSet: one match of a single expression
+               trying the rules in order
+
+    python -m benchmarks.categorization --rows 100000 --rules 200
+"""
+import argparse
+import random
+import re
+import sys
+import time
+from decimal import Decimal
+
+from benchmarks.common import setup_django
+
+WORDS = ['store', 'market', 'online', 'payment', 'card', 'pos', 'purchase', 'ref', 'debit', 'inc']
+
+
+def make_rules(count, rng):
+    from core.models import CategorizationRule
+
+    rules = []
+    for index in range(count):
+        low = Decimal(rng.randint(1, 50)) if index % 10 == 0 else None
+        rules.append((index % 20 + 1, CategorizationRule.CONTAINS, f'merchant{index:04d}', low, None))
+    return tuple(rules)
+
+
+def make_rows(count, rules, rng):
+    rows = []
+    for _ in range(count):
+        words = rng.sample(WORDS, 3)
+        # About half of the rows come from a merchant that has a rule
+        if rng.random() < 0.5:
+            words.insert(1, rng.choice(rules)[2].upper())
+        rows.append((' '.join(words) + f' #{rng.randint(1000, 9999)}', Decimal(rng.randint(100, 10000)) / 100))
+    return rows
+
+
+def per_rule(rules, rows):
+    from core.models import CategorizationRule
+
+    compiled = [
+        (re.compile(CategorizationRule.expression(match_type, pattern), re.IGNORECASE), category_id, low, high)
+        for category_id, match_type, pattern, low, high in rules
+    ]
+    results = []
+    for description, amount in rows:
+        for expression, category_id, low, high in compiled:
+            if (low is None or amount >= low) and (high is None or amount <= high) and expression.search(description):
+                results.append(category_id)
+                break
+        else:
+            results.append(None)
+    return results
+
+
+def combined(rules, rows):
+    from core.categorization import RuleSet
+
+    rule_set = RuleSet(rules)
+    return [rule_set.match(description, amount) for description, amount in rows]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100000, help="Descriptions to categorize")
+    parser.add_argument('--rules', type=int, default=200, help="Rules of the user")
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    setup_django()
+    rng = random.Random(args.seed)
+    rules = make_rules(args.rules, rng)
+    rows = make_rows(args.rows, rules, rng)
+
+    timings, results = {}, {}
+    for name, function in (('per-rule', per_rule), ('combined', combined)):
+        started = time.perf_counter()
+        results[name] = function(rules, rows)
+        timings[name] = time.perf_counter() - started
+        matched = sum(category is not None for category in results[name])
+        print(f"{name:>9}: {timings[name]:7.2f} s  ({args.rows} rows, {args.rules} rules, {matched} categorized)")
+    assert results['per-rule'] == results['combined']
+    print(f"speedup: {timings['per-rule'] / timings['combined']:.1f}x", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+import os
+import resource
+import sys
+import tempfile
+from contextlib import contextmanager
+
+
+def setup_django():
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'django_project.settings')
+    import django
+    django.setup()
+
+    from django.conf import settings
+    # DEBUG keeps every executed query in memory, which would skew the numbers.
+    settings.DEBUG = False
+
+
+@contextmanager
+def scratch_database():
+    """Create a throwaway database with the current schema and drop it afterwards."""
+    from django.db import connection
+    from django.test.utils import setup_test_environment, teardown_test_environment
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    if connection.vendor == 'sqlite':
+        # Use a file rather than the default in-memory test database so SQLite's
+        # page cache does not count against the benchmark process.
+        directory = tempfile.mkdtemp(prefix='expense-tracker-bench-')
+        connection.settings_dict['TEST']['NAME'] = os.path.join(directory, 'bench.sqlite3')
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def peak_rss_mib():
+    # ru_maxrss is in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
@@ -0,0 +1,24 @@
+"""
+Synthetic ledgers for benchmarks.
+
+`generate(users, expenses_per_user)` creates users and fills their ledgers with
+`core.seeding`, the same generator behind the `seed_demo_data` command. The
+same seed always produces the same data.
+"""
+from datetime import date
+
+
+def generate(users, expenses_per_user, seed=0, today=None):
+    """Create `users` users with `expenses_per_user` expenses each and return the users."""
+    from core.models import User
+    from core.seeding import default_categories, seed_user
+
+    today = today or date.today()
+    categories = default_categories()
+    created = []
+    for index in range(users):
+        # Password hashing would dominate the setup time and is not benchmarked.
+        user = User.objects.create(username=f'bench{seed}_{index}', email=f'bench{seed}_{index}@example.com')
+        seed_user(user.pk, index, expenses_per_user, seed=seed, today=today, categories=categories)
+        created.append(user)
+    return created
@@ -0,0 +1,90 @@
+"""
+Memory profile of the streaming ledger export.
+
+Grows one user's ledger through the requested sizes and, at each size, streams
+the full CSV and NDJSON exports while tracing Python allocations. A streaming
+export should show the same peak at every size; the script exits with an error
+if the peak at the largest size exceeds the smallest one by more than the
+tolerance factor.
+
+    python -m benchmarks.export_memory --rows 10000 1000000
+"""
+import argparse
+import random
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+from decimal import Decimal
+
+from benchmarks.common import peak_rss_mib, scratch_database, setup_django
+
+
+def populate(user, categories, count, rng, batch_size=10000):
+    from core.models import Expense
+
+    first_day = date(2015, 1, 1)
+    while count > 0:
+        size = min(batch_size, count)
+        Expense.objects.bulk_create([
+            Expense(
+                user=user,
+                amount=Decimal(rng.randint(100, 50000)) / 100,
+                category=rng.choice(categories),
+                description=f"Benchmark expense {rng.randint(1, 10 ** 6)}",
+                date=first_day + timedelta(days=rng.randint(0, 3650)),
+            )
+            for _ in range(size)
+        ])
+        count -= size
+
+
+def measure(user, file_format):
+    from core.exporters import export_ledger
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    size = 0
+    for chunk in export_ledger(user, file_format):
+        size += len(chunk)
+    elapsed = time.perf_counter() - started
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, size, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 1000000], help="Ledger sizes to measure")
+    parser.add_argument('--tolerance', type=float, default=1.5, help="Allowed growth factor of the peak")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    setup_django()
+    from core.models import Category, User
+
+    peaks = {}
+    with scratch_database():
+        rng = random.Random(args.seed)
+        user = User.objects.create_user(username='bench', email='bench@example.com', password='bench')
+        categories = [Category.objects.create(user=user, name=f"Category {index}") for index in range(10)]
+
+        existing = 0
+        print(f"{'rows':>10} {'format':>7} {'seconds':>8} {'MiB out':>8} {'peak KiB':>9}")
+        for rows in sorted(args.rows):
+            populate(user, categories, rows - existing, rng)
+            existing = rows
+            for file_format in ('csv', 'ndjson'):
+                elapsed, size, peak = measure(user, file_format)
+                peaks.setdefault(file_format, []).append(peak)
+                print(f"{rows:>10} {file_format:>7} {elapsed:>8.2f} {size / 2 ** 20:>8.1f} {peak / 1024:>9.0f}")
+
+    print(f"Process peak RSS: {peak_rss_mib():.0f} MiB")
+    for file_format, values in peaks.items():
+        if values[-1] > values[0] * args.tolerance:
+            print(f"{file_format}: peak memory grew from {values[0]} to {values[-1]} bytes", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
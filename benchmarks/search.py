@@ -0,0 +1,42 @@
+"""
+Full-text search latency on a large single-user ledger.
+
+    python -m benchmarks.search --rows 1000000
+"""
+import argparse
+import statistics
+import sys
+import time
+
+from benchmarks.common import scratch_database, setup_django
+
+QUERIES = ('groc', 'groceries 12', '4821', 'entertainment', 'salary', 'zzz')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=1000000, help="Expenses in the searched ledger")
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from benchmarks.data import generate
+    from core.search import search
+
+    with scratch_database():
+        started = time.perf_counter()
+        user = generate(1, args.rows)[0]
+        print(f"generated {args.rows} expenses in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+        for query in QUERIES:
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                results = search(user, query)
+                timings.append((time.perf_counter() - started) * 1000)
+            print(f"{query!r:>16}: p50 {statistics.median(timings):7.2f} ms  max {max(timings):7.2f} ms  "
+                  f"({len(results.expenses)} expenses, {len(results.incomes)} incomes)")
+
+
+if __name__ == '__main__':
+    main()
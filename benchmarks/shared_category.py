@@ -0,0 +1,114 @@
+"""
+Dashboard latency for one user while other tenants pile data into a shared
+default category.
+
+Every user budgets against the same default "Groceries" category. The script
+times the target user's dashboard (with the dashboard cache cleared before
+each request) before and after adding the other tenants, and exits with an
+error if the median grew by more than the tolerance factor. With --legacy it
+also times the old budget annotation, which summed `category__expenses`
+across all users, to show the growth the per-user subquery avoids.
+
+    python -m benchmarks.shared_category --tenants 1000 --expenses-per-tenant 100
+"""
+import argparse
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from benchmarks.common import scratch_database, setup_django
+
+
+def add_user(username, category, expenses, rng):
+    from core.models import Budget, Expense, User
+
+    # Skip password hashing, which would dominate the setup time
+    user = User.objects.create(username=username, email=f'{username}@example.com')
+    Budget.objects.create(
+        user=user, category=category, amount=500, start_date=date(2024, 11, 1), end_date=date(2024, 11, 30)
+    )
+    Expense.objects.bulk_create([
+        Expense(
+            user=user,
+            amount=Decimal(rng.randint(100, 10000)) / 100,
+            category=category,
+            date=date(2024, 1, 1) + timedelta(days=rng.randint(0, 365)),
+        )
+        for _ in range(expenses)
+    ])
+    return user
+
+
+def time_dashboard(client, repeat):
+    from django.core.cache import cache
+
+    timings = []
+    for _ in range(repeat):
+        cache.clear()
+        started = time.perf_counter()
+        response = client.get('/dashboard/?month=11&year=2024')
+        timings.append(time.perf_counter() - started)
+        assert response.status_code == 200
+    return statistics.median(timings)
+
+
+def time_legacy_query(user, repeat):
+    from django.db.models import Q, Sum
+    from core.models import Budget
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        list(Budget.objects.filter(user=user).annotate(value_spent=Sum(
+            'category__expenses__amount',
+            filter=Q(category__expenses__date__month=11, category__expenses__date__year=2024),
+        )))
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--tenants', type=int, default=1000)
+    parser.add_argument('--expenses-per-tenant', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--tolerance', type=float, default=2.0, help="Allowed growth factor of the median latency")
+    parser.add_argument('--legacy', action='store_true', help="Also time the old cross-tenant budget annotation")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test import Client
+    from core.models import Category
+
+    with scratch_database():
+        rng = random.Random(args.seed)
+        groceries = Category.objects.get(user=None, name='Groceries')
+        target = add_user('target', groceries, args.expenses_per_tenant, rng)
+        client = Client()
+        client.force_login(target)
+
+        before = time_dashboard(client, args.repeat)
+        legacy_before = time_legacy_query(target, args.repeat) if args.legacy else None
+
+        for index in range(args.tenants):
+            add_user(f'tenant{index}', groceries, args.expenses_per_tenant, rng)
+
+        after = time_dashboard(client, args.repeat)
+        legacy_after = time_legacy_query(target, args.repeat) if args.legacy else None
+
+    rows = args.tenants * args.expenses_per_tenant
+    print(f"Dashboard median: {before * 1000:.1f} ms alone, {after * 1000:.1f} ms with "
+          f"{args.tenants} other tenants ({rows} expenses) in the shared category")
+    if args.legacy:
+        print(f"Legacy budget annotation median: {legacy_before * 1000:.1f} ms -> {legacy_after * 1000:.1f} ms")
+    if after > before * args.tolerance:
+        print("Dashboard latency grows with other tenants' data", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Render time of the expense list page with a large table.
+
+Renders core/expense_list.html for a page of unsaved expenses (no database
+needed) in three setups:
+
+  uncached     filesystem/app-directories loaders, fragment cache missed on
+               every render (how the page rendered before caching)
+  compiled     cached template loader, fragment cache still missed
+  fragment     cached template loader, expense rows served from the
+               `{% cache %}` fragment of an unchanged data version
+
+    python -m benchmarks.templates --rows 500
+"""
+import argparse
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from benchmarks.common import setup_django
+
+TEMPLATE = 'core/expense_list.html'
+LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
+
+def backend(cached):
+    from django.conf import settings
+    from django.template.backends.django import DjangoTemplates
+
+    options = dict(settings.TEMPLATES[0]['OPTIONS'])
+    options['loaders'] = [('django.template.loaders.cached.Loader', LOADERS)] if cached else LOADERS
+    return DjangoTemplates({
+        'NAME': 'cached' if cached else 'uncached', 'DIRS': settings.TEMPLATES[0]['DIRS'],
+        'APP_DIRS': False, 'OPTIONS': options,
+    })
+
+
+def make_context(rows):
+    from core.models import Category, Expense
+    from core.pagination import KeysetPage
+
+    categories = [Category(pk=index, name=f'Category {index}') for index in range(1, 11)]
+    expenses = [
+        Expense(pk=index, amount=Decimal(index) / 4, category=categories[index % 10],
+                description=f'Expense {index}', date=date(2024, 11, 30) - timedelta(days=index // 20))
+        for index in range(1, rows + 1)
+    ]
+    page = KeysetPage(expenses, f'{expenses[-1].date.isoformat()}_{expenses[-1].pk}', rows)
+    return {'object_list': expenses, 'page_obj': page}
+
+
+def measure(engine, request, context, repeat, new_version):
+    from core import caching
+
+    timings = []
+    for _ in range(repeat + 1):
+        if new_version:
+            # A write by the user: the next render misses the fragment
+            caching.invalidate_user(request.user.pk)
+        started = time.perf_counter()
+        template = engine.get_template(TEMPLATE)
+        html = template.render(context, request)
+        timings.append((time.perf_counter() - started) * 1000)
+    assert 'Expense 1<' in html
+    return timings[1:]  # the first render warms up imports and the caches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=500, help="Expenses in the rendered table")
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.core.cache import cache
+    from django.test import RequestFactory
+    from core.models import User
+
+    cache.clear()
+    request = RequestFactory().get('/expenses/', {'page_size': args.rows})
+    request.user = User(pk=1, username='benchmark')
+    context = make_context(args.rows)
+
+    results = {}
+    for name, cached, new_version in (('uncached', False, True), ('compiled', True, True), ('fragment', True, False)):
+        timings = measure(backend(cached), request, context, args.repeat, new_version)
+        results[name] = statistics.median(timings)
+        print(f"{name:>9}: p50 {results[name]:7.2f} ms  p95 {statistics.quantiles(timings, n=20)[-1]:7.2f} ms  "
+              f"({args.rows} rows)")
+    print(f"speedup: {results['uncached'] / results['fragment']:.1f}x with both caches", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+"""
+Scaling benchmark for the core views.
+
+For each scale (total number of expense rows) a fresh throwaway database is
+filled by `benchmarks.data.generate`, and the dashboard, budget, expense and
+category list pages of one of its users are requested through the Django test
+client. For every page the run records the number of queries, p50/p95 latency
+(the dashboard cache is cleared before each request, so it is always measured
+cold) and the peak of Python allocations while serving one request.
+
+Results are compared against a JSON baseline; the run fails when a page issues
+more queries than the baseline or when latency or memory exceed it by more
+than the threshold. Record a new baseline with --save-baseline.
+
+    python -m benchmarks.views --scales 1000 100000 1000000
+    python -m benchmarks.views --save-baseline
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+from benchmarks.common import scratch_database, setup_django
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+PAGES = (
+    ('dashboard', 'core:dashboard'),
+    ('budget_list', 'core:budget_list'),
+    ('expense_list', 'core:expense_list'),
+    ('category_list', 'core:category_list'),
+)
+
+
+def measure_page(client, url, repeat):
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    def get():
+        cache.clear()
+        response = client.get(url)
+        assert response.status_code == 200, f"{url} returned {response.status_code}"
+        return response
+
+    get()  # warm up imports and template loading
+
+    with CaptureQueriesContext(connection) as queries:
+        get()
+    # The next request resets the query log, so count before it starts.
+    query_count = len(queries)
+
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        get()
+        timings.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    get()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        'queries': query_count,
+        'p50_ms': round(statistics.median(timings), 2),
+        'p95_ms': round(statistics.quantiles(timings, n=20)[-1], 2),
+        'peak_kib': round(peak / 1024),
+    }
+
+
+def run_scale(rows, users, repeat, seed):
+    from django.core.cache import cache
+    from django.test import Client
+    from django.urls import reverse
+    from benchmarks.data import generate
+
+    with scratch_database():
+        cache.clear()
+        started = time.perf_counter()
+        target = generate(users, max(1, rows // users), seed=seed)[0]
+        print(f"  generated {rows} expenses in {time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+        client = Client()
+        client.force_login(target)
+        return {name: measure_page(client, reverse(url_name), repeat) for name, url_name in PAGES}
+
+
+def compare(results, baseline, threshold):
+    failures = []
+    for scale, pages in results.items():
+        for page, measured in pages.items():
+            expected = baseline.get(scale, {}).get(page)
+            if not expected:
+                continue
+            if measured['queries'] > expected['queries']:
+                failures.append(f"{page} @ {scale}: {measured['queries']} queries, baseline {expected['queries']}")
+            for metric in ('p95_ms', 'peak_kib'):
+                if measured[metric] > expected[metric] * (1 + threshold):
+                    failures.append(f"{page} @ {scale}: {metric} {measured[metric]}, baseline {expected[metric]}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', type=int, nargs='+', default=[1000, 100000], help="Total expense rows per run")
+    parser.add_argument('--users', type=int, default=10, help="Users sharing the rows at each scale")
+    parser.add_argument('--repeat', type=int, default=20, help="Timed requests per page")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--baseline', default=BASELINE, help="Baseline JSON file")
+    parser.add_argument('--save-baseline', action='store_true', help="Write the results as the new baseline")
+    parser.add_argument('--threshold', type=float, default=0.5, help="Allowed relative regression of latency/memory")
+    parser.add_argument('--output', help="Also write the results to this JSON file")
+    args = parser.parse_args()
+
+    setup_django()
+
+    results = {}
+    for rows in args.scales:
+        print(f"Scale {rows}:", file=sys.stderr)
+        results[str(rows)] = run_scale(rows, args.users, args.repeat, args.seed)
+
+    report = json.dumps(results, indent=2, sort_keys=True)
+    print(report)
+    if args.output:
+        with open(args.output, 'w') as output:
+            output.write(report + '\n')
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as existing:
+                baseline = json.load(existing)
+        baseline.update(results)
+        with open(args.baseline, 'w') as output:
+            output.write(json.dumps(baseline, indent=2, sort_keys=True) + '\n')
+        return
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline first", file=sys.stderr)
+        return
+    with open(args.baseline) as existing:
+        failures = compare(results, json.load(existing), args.threshold)
+    for failure in failures:
+        print(f"REGRESSION {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
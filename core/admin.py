@@ -1,6 +1,8 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
-from .models import User, Category, Expense, Income, Budget, SavingsGoal
+from .models import ApiToken, User, CategorizationRule, Category, Expense, Income, Budget, SavingsGoal, SavingsContribution, MonthlyRollup, RecurringTransaction
+from . import recurring
+from .search import matching_ids, terms
 
 
 class CustomUserAdmin(UserAdmin):
@@ -16,6 +18,18 @@ class CustomUserAdmin(UserAdmin):
     )
 
 
+class FullTextSearchMixin:
+    # Descriptions are matched through the full-text index rather than the
+    # default LIKE '%...%' scan; only the best matches are listed.
+    search_limit = 1000
+
+    def get_search_results(self, request, queryset, search_term):
+        words = terms(search_term)
+        if not words:
+            return queryset, False
+        return queryset.filter(pk__in=matching_ids(self.model, words, limit=self.search_limit)), False
+
+
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
     list_display = ['name', 'user', 'description']
@@ -23,16 +37,17 @@ class CategoryAdmin(admin.ModelAdmin):
 
 
 @admin.register(Expense)
-class ExpenseAdmin(admin.ModelAdmin):
+class ExpenseAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ['amount', 'user', 'category', 'description', 'date']
     list_filter = ['category', ('date', admin.DateFieldListFilter)]
     search_fields = ['description']
 
 
 @admin.register(Income)
-class IncomeAdmin(admin.ModelAdmin):
+class IncomeAdmin(FullTextSearchMixin, admin.ModelAdmin):
     list_display = ['amount', 'user', 'description', 'date']
     list_filter = [('date', admin.DateFieldListFilter)]
+    search_fields = ['description']
 
 
 @admin.register(Budget)
@@ -41,10 +56,52 @@ class BudgetAdmin(admin.ModelAdmin):
     list_filter = ['category', 'start_date', 'end_date']
 
 
+class SavingsContributionInline(admin.TabularInline):
+    model = SavingsContribution
+    extra = 0
+
+
 @admin.register(SavingsGoal)
 class SavingsGoalAdmin(admin.ModelAdmin):
     list_display = ['goal_name', 'user', 'target_amount', 'current_amount', 'deadline']
     list_filter = ['deadline']
+    # Maintained from the contributions
+    readonly_fields = ['current_amount']
+    inlines = [SavingsContributionInline]
+
+
+@admin.register(RecurringTransaction)
+class RecurringTransactionAdmin(admin.ModelAdmin):
+    list_display = ['user', 'kind', 'amount', 'category', 'frequency', 'interval', 'next_due_date', 'end_date']
+    list_filter = ['kind', 'frequency']
+    readonly_fields = ['next_due_date']
+
+    def save_model(self, request, obj, form, change):
+        recurring.reschedule_edited(form)
+        super().save_model(request, obj, form, change)
+
+
+@admin.register(CategorizationRule)
+class CategorizationRuleAdmin(admin.ModelAdmin):
+    list_display = ['user', 'priority', 'match_type', 'pattern', 'min_amount', 'max_amount', 'category']
+    list_filter = ['match_type']
+
+
+@admin.register(MonthlyRollup)
+class MonthlyRollupAdmin(admin.ModelAdmin):
+    list_display = ['user', 'month', 'category', 'expense_total', 'expense_count', 'income_total', 'income_count']
+    list_filter = ['month']
+    readonly_fields = ['user', 'month', 'category', 'expense_total', 'expense_count', 'income_total', 'income_count']
+
+
+@admin.register(ApiToken)
+class ApiTokenAdmin(admin.ModelAdmin):
+    list_display = ['user', 'name', 'created']
+    readonly_fields = ['user', 'digest', 'created']
+
+    def has_add_permission(self, request):
+        # Keys are only shown once, by `manage.py create_api_token`
+        return False
 
 
-admin.site.register(User, CustomUserAdmin)
\ No newline at end of file
+admin.site.register(User, CustomUserAdmin)
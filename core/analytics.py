@@ -0,0 +1,113 @@
+"""
+Per-month, per-category expense and income series for charts.
+
+The series for any range come from one grouped query over the monthly rollup
+table, which already holds a row per (user, month, category). Closed months
+(before the current one) only change through back-dated edits, and those
+invalidate exactly the months they touch, so each closed month is cached on
+its own and a repeated request only queries the open months and cache misses.
+"""
+from datetime import date, datetime
+from decimal import Decimal
+
+from django.db.models import Sum
+
+from . import caching
+from .models import MonthlyRollup
+
+ZERO = Decimal('0.00')
+UNCATEGORIZED = 'Uncategorized'
+MAX_MONTHS = 120
+
+
+def parse_month(value):
+    """Parse 'YYYY-MM' into the first day of that month; raises ValueError."""
+    return datetime.strptime(value, '%Y-%m').date()
+
+
+def add_months(month, count):
+    """Move the first day of a month by `count` months; raises ValueError outside years 1 to 9999."""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def months_since_first(month):
+    """How many months `month` is after January of year 1, the earliest a date can hold."""
+    return (month.year - 1) * 12 + month.month - 1
+
+
+def month_label(month):
+    # strftime('%Y') does not zero-pad years before 1000 on every platform
+    return f'{month.year:04d}-{month.month:02d}'
+
+
+def month_range(start, end):
+    """First days of every month from `start` to `end`, inclusive."""
+    months = [start]
+    while months[-1] < end:
+        months.append(add_months(months[-1], 1))
+    return months
+
+
+def query_months(user_id, months):
+    """Read the given months from the rollups; returns {month: {'expenses': {name: total}, 'income': total}}."""
+    data = {month: {'expenses': {}, 'income': ZERO} for month in months}
+    rows = MonthlyRollup.objects.filter(
+        user_id=user_id, month__gte=min(months), month__lte=max(months)
+    ).values('month', 'category__name').annotate(
+        # A user's copy of a default category has the same name; chart them as one.
+        expense_total=Sum('expense_total'),
+        expense_count=Sum('expense_count'),
+        income_total=Sum('income_total'),
+    ).order_by()
+    for row in rows:
+        month = data.get(row['month'])
+        if month is None:
+            continue
+        if row['expense_count']:
+            name = row['category__name'] or UNCATEGORIZED
+            month['expenses'][name] = month['expenses'].get(name, ZERO) + row['expense_total']
+        month['income'] += row['income_total']
+    return data
+
+
+def load_months(user_id, months, today=None):
+    current = (today or date.today()).replace(day=1)
+    closed = [month for month in months if month < current]
+    data = caching.get_analytics_months(user_id, closed)
+    missing = [month for month in months if month not in data]
+    if missing:
+        fetched = query_months(user_id, missing)
+        caching.set_analytics_months(user_id, {month: fetched[month] for month in missing if month < current})
+        data.update(fetched)
+    return data
+
+
+def monthly_series(user_id, start, end, year_over_year=False, today=None):
+    """
+    Build the chart data for the months from `start` to `end` (first days,
+    inclusive). With `year_over_year` the expense and income totals of the same
+    months one year earlier are included under 'previous_year'.
+    """
+    months = month_range(start, end)
+    previous = [add_months(month, -12) for month in months] if year_over_year else []
+    data = load_months(user_id, sorted(set(months + previous)), today)
+
+    categories = sorted({name for month in months for name in data[month]['expenses']})
+    series = {
+        'months': [month_label(month) for month in months],
+        'categories': categories,
+        'expenses': {
+            name: [data[month]['expenses'].get(name, ZERO) for month in months]
+            for name in categories
+        },
+        'expense_totals': [sum(data[month]['expenses'].values(), ZERO) for month in months],
+        'income': [data[month]['income'] for month in months],
+    }
+    if year_over_year:
+        series['previous_year'] = {
+            'months': [month_label(month) for month in previous],
+            'expense_totals': [sum(data[month]['expenses'].values(), ZERO) for month in previous],
+            'income': [data[month]['income'] for month in previous],
+        }
+    return series
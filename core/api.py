@@ -0,0 +1,419 @@
+"""
+JSON API over expenses, incomes, budgets, categories and savings goals.
+
+Clients authenticate either with the session cookie (writes then need the
+CSRF token, as forms do) or with an `Authorization: Token <key>` header
+carrying the key of an ApiToken (`python manage.py create_api_token <user>`).
+
+    GET    /api/<resource>/             list the user's objects
+    POST   /api/<resource>/             create one
+    GET    /api/<resource>/<id>/        read one
+    PUT    /api/<resource>/<id>/        replace one (PATCH: change some fields)
+    DELETE /api/<resource>/<id>/        delete one
+    POST   /api/transactions/batch/     create many expenses and incomes at once
+
+Request bodies are validated by the same ModelForms as the HTML views, so
+the rules (such as choosing only the user's own categories) are the same.
+Expense and income lists are filtered with `start`, `end` (YYYY-MM-DD) and,
+for expenses, `category` (an id, or `none`), and are cursor paginated like
+the HTML lists: follow `next_cursor` with `?cursor=`. Budgets, categories and
+savings goals are few per user and returned whole. Expenses created without
+a category get one from the user's categorization rules, as in the forms.
+"""
+import json
+from datetime import date
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.forms.models import model_to_dict
+from django.http import Http404, HttpResponse, JsonResponse
+from django.middleware.csrf import CsrfViewMiddleware
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+
+from . import rollups
+from .categories import effective_categories, name_conflict
+from .categorization import categorize
+from .conditional import SyncConditionalGetMixin
+from .forms import BudgetForm, CategoryForm, ExpenseForm, IncomeForm, SavingsGoalForm
+from .ledger import bulk_create_transactions
+from .models import ApiToken, Budget, Category, Expense, Income, SavingsGoal
+from .pagination import InvalidCursor, KeysetPaginationMixin
+
+MAX_BATCH_SIZE = 1000
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class ApiError(Exception):
+    def __init__(self, status, message, errors=None):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.errors = errors
+
+    def response(self):
+        body = {'error': self.message}
+        if self.errors:
+            body['errors'] = self.errors
+        return JsonResponse(body, status=self.status)
+
+
+def authenticate(request):
+    """Return (user, via_session) for the request or raise ApiError(401)."""
+    header = request.headers.get('Authorization')
+    if header:
+        scheme, _, key = header.partition(' ')
+        if scheme.lower() not in ('token', 'bearer') or not key.strip():
+            raise ApiError(401, "Use an 'Authorization: Token <key>' header.")
+        token = ApiToken.objects.select_related('user').filter(digest=ApiToken.hash(key.strip())).first()
+        if token is None or not token.user.is_active:
+            raise ApiError(401, "Invalid token.")
+        return token.user, False
+    if not request.user.is_authenticated:
+        raise ApiError(401, "Authentication credentials were not provided.")
+    return request.user, True
+
+
+def parse_body(request):
+    try:
+        data = json.loads(request.body or b'{}')
+    except (ValueError, UnicodeDecodeError):
+        raise ApiError(400, "The request body must be JSON.")
+    if not isinstance(data, dict):
+        raise ApiError(400, "The request body must be a JSON object.")
+    return data
+
+
+def parse_date(params, name):
+    try:
+        return date.fromisoformat(params[name]) if params.get(name) else None
+    except ValueError:
+        raise ApiError(400, f"'{name}' must be a date in YYYY-MM-DD format.")
+
+
+def form_errors(form):
+    return json.loads(form.errors.as_json())
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class ApiView(SyncConditionalGetMixin, View):
+    """
+    Base view: authenticates the request, enforces CSRF only for session
+    authenticated writes (token clients have no cookie to forge), answers
+    unchanged GETs with 304 Not Modified and turns ApiError and Http404 into
+    JSON responses.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        try:
+            request.user, via_session = authenticate(request)
+            if via_session and request.method not in SAFE_METHODS:
+                if CsrfViewMiddleware(lambda request: None).process_view(request, None, (), {}) is not None:
+                    raise ApiError(403, "CSRF verification failed.")
+            return super().dispatch(request, *args, **kwargs)
+        except ApiError as error:
+            return error.response()
+        except Http404 as error:
+            return ApiError(404, str(error) or "Not found.").response()
+
+    def http_method_not_allowed(self, request, *args, **kwargs):
+        response = ApiError(405, f"Method {request.method} not allowed.").response()
+        response['Allow'] = ', '.join(method.upper() for method in self._allowed_methods())
+        return response
+
+    def render(self, data, status=200):
+        return JsonResponse(data, status=status, encoder=DjangoJSONEncoder)
+
+
+class ResourceMixin:
+    """Shared by the list and detail views of one model; subclasses set the attributes and define serialize()."""
+    model = None
+    form_class = None
+
+    def get_queryset(self):
+        return self.model.objects.filter(user=self.request.user)
+
+    def get_form(self, data, instance=None):
+        return self.form_class(data, instance=instance)
+
+    def save(self, form):
+        form.instance.user = self.request.user
+        return form.save()
+
+
+class CollectionView(ResourceMixin, ApiView):
+    def get_list_queryset(self):
+        return self.get_queryset()
+
+    def get(self, request):
+        return self.render({'results': [self.serialize(obj) for obj in self.get_list_queryset()]})
+
+    def post(self, request):
+        form = self.get_form(parse_body(request))
+        if not form.is_valid():
+            raise ApiError(400, "Invalid data.", form_errors(form))
+        with transaction.atomic():
+            obj = self.save(form)
+        return self.render(self.serialize(obj), status=201)
+
+
+class TransactionCollectionView(KeysetPaginationMixin, CollectionView):
+    """Filtered, cursor-paginated list of expenses or incomes, newest first."""
+
+    def filter_queryset(self, queryset):
+        start, end = parse_date(self.request.GET, 'start'), parse_date(self.request.GET, 'end')
+        if start:
+            queryset = queryset.filter(date__gte=start)
+        if end:
+            queryset = queryset.filter(date__lte=end)
+        return queryset
+
+    def get(self, request):
+        queryset = self.filter_queryset(self.get_queryset()).order_by(*self.ordering)
+        page_size = self.get_paginate_by(queryset)
+        try:
+            _, page, rows, _ = self.paginate_queryset(queryset, page_size)
+        except InvalidCursor:
+            raise ApiError(400, "Invalid cursor.")
+        return self.render({
+            'results': [self.serialize(obj) for obj in rows],
+            'next_cursor': page.next_cursor,
+        })
+
+
+class ObjectView(ResourceMixin, ApiView):
+    def get_object(self):
+        try:
+            return self.get_queryset().get(pk=self.kwargs['pk'])
+        except self.model.DoesNotExist:
+            raise Http404(f"No such {self.model._meta.verbose_name}.")
+
+    def get(self, request, pk):
+        return self.render(self.serialize(self.get_object()))
+
+    def put(self, request, pk, partial=False):
+        obj = self.get_object()
+        data = parse_body(request)
+        if partial:
+            # Unchanged fields keep their stored values
+            data = {**model_to_dict(obj, fields=self.form_class._meta.fields), **data}
+        form = self.get_form(data, instance=obj)
+        if not form.is_valid():
+            raise ApiError(400, "Invalid data.", form_errors(form))
+        with transaction.atomic():
+            obj = self.save(form)
+        return self.render(self.serialize(obj))
+
+    def patch(self, request, pk):
+        return self.put(request, pk, partial=True)
+
+    def delete(self, request, pk):
+        self.get_object().delete()
+        return HttpResponse(status=204)
+
+
+# Resources
+
+class ExpenseResource(ResourceMixin):
+    model = Expense
+    form_class = ExpenseForm
+
+    def get_form(self, data, instance=None):
+        return self.form_class(data, instance=instance, user=self.request.user)
+
+    def get_object(self):
+        obj = super().get_object()
+        # Lets the rollup signals move the old amount without re-reading the row
+        rollups.remember(obj)
+        return obj
+
+    def serialize(self, expense):
+        return {
+            'id': expense.pk, 'date': expense.date, 'amount': expense.amount,
+            'category': expense.category_id, 'description': expense.description,
+        }
+
+
+class ExpenseCollectionView(ExpenseResource, TransactionCollectionView):
+    def save(self, form):
+        categorize(self.request.user.pk, [form.instance])
+        return super().save(form)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        category = self.request.GET.get('category')
+        if category == 'none':
+            queryset = queryset.filter(category=None)
+        elif category:
+            if not category.isdigit():
+                raise ApiError(400, "'category' must be a category id or 'none'.")
+            queryset = queryset.filter(category_id=int(category))
+        return queryset
+
+
+class ExpenseObjectView(ExpenseResource, ObjectView):
+    pass
+
+
+class IncomeResource(ResourceMixin):
+    model = Income
+    form_class = IncomeForm
+
+    def get_object(self):
+        obj = super().get_object()
+        rollups.remember(obj)
+        return obj
+
+    def serialize(self, income):
+        return {'id': income.pk, 'date': income.date, 'amount': income.amount, 'description': income.description}
+
+
+class IncomeCollectionView(IncomeResource, TransactionCollectionView):
+    pass
+
+
+class IncomeObjectView(IncomeResource, ObjectView):
+    pass
+
+
+class BudgetResource(ResourceMixin):
+    model = Budget
+    form_class = BudgetForm
+
+    def get_queryset(self):
+        return Budget.objects.filter(user=self.request.user).order_by('start_date', 'pk')
+
+    def get_form(self, data, instance=None):
+        return self.form_class(data, instance=instance, user=self.request.user)
+
+    def save(self, form):
+        duplicates = Budget.objects.filter(user=self.request.user, category=form.cleaned_data['category'])
+        if form.instance.pk:
+            duplicates = duplicates.exclude(pk=form.instance.pk)
+        if duplicates.exists():
+            raise ApiError(400, "You already have a budget for this category.")
+        return super().save(form)
+
+    def serialize(self, budget):
+        return {
+            'id': budget.pk, 'category': budget.category_id, 'amount': budget.amount,
+            'start_date': budget.start_date, 'end_date': budget.end_date,
+        }
+
+
+class BudgetCollectionView(BudgetResource, CollectionView):
+    pass
+
+
+class BudgetObjectView(BudgetResource, ObjectView):
+    pass
+
+
+class CategoryResource(ResourceMixin):
+    model = Category
+    form_class = CategoryForm
+
+    def save(self, form):
+        if form.instance.pk is None or 'name' in form.changed_data:
+            conflict = name_conflict(self.request.user.pk, form.cleaned_data['name'])
+            if conflict:
+                raise ApiError(400, conflict)
+        return super().save(form)
+
+    def serialize(self, category):
+        return {
+            'id': category.pk, 'name': category.name, 'description': category.description,
+            'default': category.user_id is None,
+        }
+
+
+class CategoryCollectionView(CategoryResource, CollectionView):
+    def get_list_queryset(self):
+        # The user's effective categories, usually straight from the cache
+        return effective_categories(self.request.user.pk).values()
+
+
+class CategoryObjectView(CategoryResource, ObjectView):
+    def get_queryset(self):
+        # Default categories can be read but only changed by an administrator
+        if self.request.method in SAFE_METHODS:
+            return Category.objects.filter(pk__in=[c.pk for c in effective_categories(self.request.user.pk).values()])
+        return Category.objects.filter(user=self.request.user)
+
+
+class SavingsGoalResource(ResourceMixin):
+    model = SavingsGoal
+    form_class = SavingsGoalForm
+
+    def get_queryset(self):
+        return SavingsGoal.objects.filter(user=self.request.user).with_progress().order_by('deadline', 'pk')
+
+    def save(self, form):
+        if form.instance.pk is None:
+            goal = super().save(form)
+        else:
+            # Leave current_amount alone so concurrent contributions are kept
+            goal = form.save(commit=False)
+            goal.save(update_fields=self.form_class._meta.fields)
+        # Re-read for the progress annotations
+        return self.get_queryset().get(pk=goal.pk)
+
+    def serialize(self, goal):
+        return {
+            'id': goal.pk, 'goal_name': goal.goal_name, 'target_amount': goal.target_amount,
+            'current_amount': goal.current_amount, 'deadline': goal.deadline,
+            'percentage_achieved': goal.percentage_achieved, 'days_to_deadline': goal.days_to_deadline,
+            'status': goal.status,
+        }
+
+
+class SavingsGoalCollectionView(SavingsGoalResource, CollectionView):
+    pass
+
+
+class SavingsGoalObjectView(SavingsGoalResource, ObjectView):
+    pass
+
+
+class TransactionBatchView(ApiView):
+    """
+    Create up to MAX_BATCH_SIZE expenses and incomes in one request:
+
+        {"expenses": [{"amount": "12.50", "category": 3, "date": "2024-11-05", "description": "Lunch"}, ...],
+         "incomes": [{"amount": "2500", "date": "2024-11-01", "description": "Salary"}, ...]}
+
+    Every row is validated first; if any is invalid nothing is written and
+    the errors are returned by list and row index. Otherwise all rows are
+    written with bulk_create in one transaction and their ids are returned.
+    """
+
+    def post(self, request):
+        data = parse_body(request)
+        rows = {kind: data.get(kind) or [] for kind in ('expenses', 'incomes')}
+        if not all(isinstance(value, list) and all(isinstance(row, dict) for row in value) for value in rows.values()):
+            raise ApiError(400, "'expenses' and 'incomes' must be lists of objects.")
+        if sum(len(value) for value in rows.values()) > MAX_BATCH_SIZE:
+            raise ApiError(400, f"A batch can hold at most {MAX_BATCH_SIZE} transactions.")
+
+        categories = effective_categories(request.user.pk)
+        forms = {
+            'expenses': [ExpenseForm(row, user=request.user, categories=categories) for row in rows['expenses']],
+            'incomes': [IncomeForm(row) for row in rows['incomes']],
+        }
+        errors = {
+            kind: {index: form_errors(form) for index, form in enumerate(kind_forms) if not form.is_valid()}
+            for kind, kind_forms in forms.items()
+        }
+        errors = {kind: kind_errors for kind, kind_errors in errors.items() if kind_errors}
+        if errors:
+            raise ApiError(400, "Invalid data; nothing was saved.", errors)
+
+        created = {}
+        for kind, kind_forms in forms.items():
+            created[kind] = [form.save(commit=False) for form in kind_forms]
+            for obj in created[kind]:
+                obj.user = request.user
+        categorize(request.user.pk, created['expenses'])
+        bulk_create_transactions(expenses=created['expenses'], incomes=created['incomes'])
+        return self.render({kind: [obj.pk for obj in objs] for kind, objs in created.items()}, status=201)
@@ -1,6 +1,22 @@
 from django.apps import AppConfig
+from django.db import connections
+from django.db.models.signals import post_migrate
+
+
+def provision_default_categories(sender, using='default', **kwargs):
+    # Runs after every migrate (and test database setup), so a fresh database
+    # has the default categories without a separate command.
+    from .categories import provision_defaults
+    from .models import Category
+    # Not when core's tables were just migrated away
+    if Category._meta.db_table in connections[using].introspection.table_names():
+        provision_defaults(using=using)
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        post_migrate.connect(provision_default_categories, sender=self)
@@ -0,0 +1,152 @@
+"""
+Per-user caching of computed dashboard and analytics data.
+
+Entries are keyed on (user, year, month) plus two version tokens: one per
+user and one shared by everybody for changes to default categories. Writes to
+a single month's transactions delete just that month's entry; changes that
+show up on every month (budgets, savings goals, category names) replace the
+version token, which orphans all of the user's entries at once.
+
+Analytics cache one entry per closed month and share the same version
+tokens and month invalidation, so a back-dated edit drops exactly the months
+it touched.
+
+Each user's effective categories (see core.categories) are cached under the
+same version tokens, which category saves and deletes already replace. Their
+categorization rules (see core.categorization) have a token of their own,
+since editing a rule changes nothing already shown.
+
+A third per-user token, the data version, is replaced on every write that
+drops any of the user's entries; pages derive their ETags from it (see
+core.conditional).
+
+Version tokens are random rather than counters so that an evicted version
+key can never resurrect stale entries written under an older token.
+"""
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+GLOBAL_VERSION_KEY = 'dashboard:version'
+
+
+def _user_version_key(user_id):
+    return f'dashboard:{user_id}:version'
+
+
+def _data_version_key(user_id):
+    return f'data:{user_id}:version'
+
+
+def _rules_version_key(user_id):
+    return f'rules:{user_id}:version'
+
+
+def _tokens(keys):
+    tokens = cache.get_many(keys)
+    for key in keys:
+        if key not in tokens:
+            cache.add(key, uuid4().hex, None)
+            tokens[key] = cache.get(key)
+    return tuple(tokens[key] for key in keys)
+
+
+def _versions(user_id):
+    return _tokens([GLOBAL_VERSION_KEY, _user_version_key(user_id)])
+
+
+def data_version(user_id):
+    """
+    A token that changes whenever anything the user sees changes: any write
+    that invalidates their cached months or versions, or a default category.
+    """
+    return ':'.join(_tokens([GLOBAL_VERSION_KEY, _user_version_key(user_id), _data_version_key(user_id)]))
+
+
+def dashboard_key(user_id, year, month, versions=None):
+    global_version, user_version = versions or _versions(user_id)
+    # Savings goals show the days left until their deadline, so entries are
+    # also keyed on today's date and yesterday's simply stop being read.
+    today = timezone.localdate()
+    return f'dashboard:{global_version}:{user_id}:{user_version}:{today:%Y%m%d}:{year}-{month:02d}'
+
+
+def get_dashboard(user_id, year, month):
+    return cache.get(dashboard_key(user_id, year, month))
+
+
+def set_dashboard(user_id, year, month, data):
+    cache.set(dashboard_key(user_id, year, month), data, settings.DASHBOARD_CACHE_TIMEOUT)
+
+
+def analytics_key(user_id, month, versions=None):
+    global_version, user_version = versions or _versions(user_id)
+    return f'analytics:{global_version}:{user_id}:{user_version}:{month:%Y-%m}'
+
+
+def get_analytics_months(user_id, months):
+    """Return the cached analytics of the given months (first days) as a {month: data} dict."""
+    versions = _versions(user_id)
+    keys = {analytics_key(user_id, month, versions): month for month in months}
+    return {keys[key]: data for key, data in cache.get_many(list(keys)).items()}
+
+
+def set_analytics_months(user_id, data_by_month):
+    versions = _versions(user_id)
+    cache.set_many(
+        {analytics_key(user_id, month, versions): data for month, data in data_by_month.items()},
+        settings.ANALYTICS_CACHE_TIMEOUT,
+    )
+
+
+def categories_key(user_id, versions=None):
+    global_version, user_version = versions or _versions(user_id)
+    return f'categories:{global_version}:{user_id}:{user_version}'
+
+
+def _get_or_set(key, compute):
+    # The key is taken before computing, so a change saved meanwhile leaves
+    # the result under a version that is never read again.
+    value = cache.get(key)
+    if value is None:
+        value = compute()
+        cache.set(key, value, settings.CATEGORY_CACHE_TIMEOUT)
+    return value
+
+
+def get_or_set_categories(user_id, compute):
+    return _get_or_set(categories_key(user_id), compute)
+
+
+def rules_key(user_id):
+    (version,) = _tokens([_rules_version_key(user_id)])
+    return f'rules:{user_id}:{version}'
+
+
+def get_or_set_rules(user_id, compute):
+    return _get_or_set(rules_key(user_id), compute)
+
+
+def invalidate_months(user_id, months):
+    """Drop the cached dashboards and analytics of the given months (dates within the month)."""
+    versions = _versions(user_id)
+    keys = set()
+    for day in months:
+        keys.add(dashboard_key(user_id, day.year, day.month, versions))
+        keys.add(analytics_key(user_id, day.replace(day=1), versions))
+    cache.delete_many(keys)
+    cache.set(_data_version_key(user_id), uuid4().hex, None)
+
+
+def invalidate_user(user_id):
+    cache.set(_user_version_key(user_id), uuid4().hex, None)
+
+
+def invalidate_rules(user_id):
+    cache.set(_rules_version_key(user_id), uuid4().hex, None)
+
+
+def invalidate_all():
+    cache.set(GLOBAL_VERSION_KEY, uuid4().hex, None)
@@ -0,0 +1,100 @@
+"""
+Each user's effective categories.
+
+A user sees the default categories (user=None) plus their own; a category of
+theirs with the same name as a default one (e.g. a copy made to change its
+description) shadows it. The resulting {name: Category} map, ordered by name,
+is computed with one query and cached per user under the dashboard version
+tokens, which every Category save and delete replaces (see core.signals).
+
+The default categories themselves are defined in data/default_categories.json
+and provisioned after every `migrate` (see CoreConfig.ready).
+"""
+import json
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models import Q
+
+from . import caching
+from .models import Category
+
+DEFAULT_CATEGORIES_FILE = Path(__file__).resolve().parent / 'data' / 'default_categories.json'
+
+
+def _load(user_id):
+    categories = {}
+    for category in Category.objects.filter(Q(user=None) | Q(user_id=user_id)).order_by('name'):
+        if category.user_id is not None or category.name not in categories:
+            categories[category.name] = category
+    return categories
+
+
+def effective_categories(user_id):
+    """Return the user's effective categories as a {name: Category} dict ordered by name."""
+    return caching.get_or_set_categories(user_id, lambda: _load(user_id))
+
+
+aeffective_categories = sync_to_async(effective_categories)
+
+
+def lookup(user_id):
+    """Case-insensitive {lowercase name: category id} map of the user's effective categories."""
+    by_name = {}
+    for name, category in effective_categories(user_id).items():
+        # An exact-case match from the user's own categories wins
+        if category.user_id is not None or name.lower() not in by_name:
+            by_name[name.lower()] = category.pk
+    return by_name
+
+
+def name_conflict(user_id, name):
+    """Return why the user cannot create a category called `name`, or None if they can."""
+    existing = effective_categories(user_id).get(name)
+    if existing is None:
+        return None
+    if existing.user_id is not None:
+        return "You already have a category with this name."
+    return "This name is reserved for a default category."
+
+
+def load_definitions(path=DEFAULT_CATEGORIES_FILE):
+    """Read a JSON list of {"name": ..., "description": ...} category definitions."""
+    with open(path, encoding='utf-8') as file:
+        definitions = json.load(file)
+    return {definition['name']: definition.get('description', '') for definition in definitions}
+
+
+def provision_defaults(definitions=None, using='default'):
+    """
+    Create the missing default categories and update changed descriptions.
+
+    Returns the number of categories created and updated. One query reads
+    the existing defaults by name, then at most one INSERT and one UPDATE
+    write the difference. The defaults' partial unique index drops rows
+    that a concurrent run inserted first, and user-owned categories with
+    the same names are left alone.
+    """
+    if definitions is None:
+        definitions = load_definitions()
+    with transaction.atomic(using=using):
+        existing = {
+            category.name: category
+            for category in Category.objects.using(using).filter(user=None, name__in=list(definitions))
+        }
+        missing = [
+            Category(user=None, name=name, description=description)
+            for name, description in definitions.items() if name not in existing
+        ]
+        changed = [
+            category for name, category in existing.items() if category.description != definitions[name]
+        ]
+        for category in changed:
+            category.description = definitions[category.name]
+        Category.objects.using(using).bulk_create(missing, ignore_conflicts=True)
+        Category.objects.using(using).bulk_update(changed, ['description'])
+    if missing or changed:
+        # Bulk writes send no signals; every user sees the defaults
+        caching.invalidate_all()
+    return len(missing), len(changed)
@@ -0,0 +1,156 @@
+"""
+Automatic categorization of expenses from each user's CategorizationRules.
+
+A user's rules are compiled into a single alternation, in priority order,
+with an empty group after each rule telling which one matched:
+
+    (?:rule 1)()|(?:rule 2)()|...
+
+At any position the regex engine tries the alternatives in order, so a
+search returns the first rule matching at the leftmost position where any
+rule matches; searching again from just after that position finds the
+others, and the lowest group number wins. Most descriptions match no rule or
+one, so this is one or two searches per expense instead of one per rule, and
+the engine skips positions no rule can start at.
+
+A rule without a pattern (only an amount range, or just `*`) matches every
+description, so it is kept out of the expression, which would otherwise match
+at every position: it is the result when no rule before it matches, and the
+rules after it can never apply.
+
+Rules are literal text with `*` wildcards, never user-written regular
+expressions (see CategorizationRule.expression), and only the first
+MATCH_LENGTH characters of a description are matched, so the time one
+expense takes is bounded however long its description is.
+
+Amount ranges cannot be expressed in the pattern, so the amounts at which any
+rule starts or stops applying split the line into bands, and each band gets
+its own expression holding only the rules that apply in it (built the first
+time an amount falls into it).
+
+The rules are read with one query and cached per user until one of them is
+saved or deleted (see core.signals); compiled rule sets are kept per process
+for each distinct list of rules.
+"""
+import re
+from bisect import bisect_left
+from functools import lru_cache
+
+from . import caching
+from .models import CategorizationRule
+
+# The alternative of one rule; the empty group after the pattern is how a
+# match tells which rule it came from.
+ALTERNATIVE = r'(?:{})()'
+# The alternative of a rule without a pattern, which matches any description
+ANY = ALTERNATIVE.format('')
+# Bank descriptions are short; a longer one is matched on its beginning only.
+MATCH_LENGTH = 256
+
+
+def _load(user_id):
+    return tuple(
+        CategorizationRule.objects.filter(user_id=user_id).order_by('priority', 'pk').values_list(
+            'category_id', 'match_type', 'pattern', 'min_amount', 'max_amount',
+        )
+    )
+
+
+def user_rules(user_id):
+    """The user's rules as (category id, match type, pattern, min, max) tuples in the order they are tried."""
+    return caching.get_or_set_rules(user_id, lambda: _load(user_id))
+
+
+class RuleSet:
+    """Compiled matcher for an ordered list of rule tuples (see user_rules)."""
+
+    def __init__(self, rules):
+        self.rules = []
+        for category_id, match_type, pattern, min_amount, max_amount in rules:
+            alternative = ALTERNATIVE.format(CategorizationRule.expression(match_type, pattern))
+            self.rules.append((alternative, category_id, min_amount, max_amount))
+        self.bounds = sorted({
+            bound for *_, min_amount, max_amount in self.rules for bound in (min_amount, max_amount)
+            if bound is not None
+        })
+        self._matchers = {}
+
+    def __bool__(self):
+        return bool(self.rules)
+
+    def _band(self, amount):
+        # Which rules apply only changes at a bound, so amounts strictly
+        # between two bounds, or equal to the same bound, share a matcher.
+        if amount is None:
+            return None
+        index = bisect_left(self.bounds, amount)
+        return index, index < len(self.bounds) and self.bounds[index] == amount
+
+    def _build(self, amount):
+        alternatives, categories, fallback = [], {}, None
+        for alternative, category_id, min_amount, max_amount in self.rules:
+            if min_amount is not None and (amount is None or amount < min_amount):
+                continue
+            if max_amount is not None and (amount is None or amount > max_amount):
+                continue
+            if alternative == ANY:
+                fallback = category_id
+                break
+            alternatives.append(alternative)
+            # Rule expressions have no groups of their own
+            categories[len(alternatives)] = category_id
+        if not alternatives:
+            return None if fallback is None else (None, categories, fallback)
+        return re.compile('|'.join(alternatives), re.IGNORECASE), categories, fallback
+
+    def match(self, description, amount=None):
+        """Return the category id of the first rule matching the expense, or None."""
+        band = self._band(amount)
+        if band not in self._matchers:
+            self._matchers[band] = self._build(amount)
+        matcher = self._matchers[band]
+        if matcher is None:
+            return None
+        expression, categories, fallback = matcher
+        if expression is None:
+            return fallback
+        description = (description or '')[:MATCH_LENGTH]
+        best = None
+        found = expression.search(description)
+        while found:
+            if best is None or found.lastindex < best:
+                best = found.lastindex
+                if best == 1:
+                    # No rule comes before the first
+                    break
+            found = expression.search(description, found.start() + 1)
+        return categories[best] if best is not None else fallback
+
+
+@lru_cache(maxsize=256)
+def compile_rules(rules):
+    return RuleSet(rules)
+
+
+def rules_for(user_id):
+    """The user's compiled RuleSet."""
+    return compile_rules(user_rules(user_id))
+
+
+def categorize(user_id, expenses):
+    """
+    Give the uncategorized `expenses` of the user the category of their first
+    matching rule, in place, and return how many got one.
+    """
+    rule_set = None
+    categorized = 0
+    for expense in expenses:
+        if expense.category_id is not None:
+            continue
+        if rule_set is None:
+            rule_set = rules_for(user_id)
+            if not rule_set:
+                break
+        expense.category_id = rule_set.match(expense.description, expense.amount)
+        categorized += expense.category_id is not None
+    return categorized
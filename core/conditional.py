@@ -0,0 +1,68 @@
+"""
+Conditional GET for pages that show only the requesting user's data.
+
+The ETag of a page hashes the user's data version (core.caching), the path
+with its query string, today's date (the defaults and day counts of several
+pages depend on it) and the CSRF cookie (pages embed a token derived from it).
+A reload or a polling client sending If-None-Match then gets a
+304 Not Modified from Django's `condition` decorator without any of the
+view's queries or template rendering.
+"""
+import hashlib
+
+from asgiref.sync import sync_to_async
+from django.contrib import messages
+from django.utils import timezone
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from . import caching
+
+
+def user_data_etag(request, *args, **kwargs):
+    if not request.user.is_authenticated:
+        return None
+    # Flash messages are only shown once, so such a response must be rendered
+    if len(messages.get_messages(request)):
+        return None
+    parts = (
+        str(request.user.pk), caching.data_version(request.user.pk), request.get_full_path(),
+        timezone.localdate().isoformat(), request.META.get('CSRF_COOKIE', ''),
+    )
+    return hashlib.sha256('|'.join(parts).encode()).hexdigest()[:40]
+
+
+def revalidate(response):
+    # Browsers must ask again every time, and shared caches must not keep a
+    # copy of one user's page.
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    For async views, after AsyncLoginRequiredMixin: answer GET and HEAD with
+    304 Not Modified while the user's data version is unchanged.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return await super().dispatch(request, *args, **kwargs)
+        etag = await sync_to_async(user_data_etag)(request)
+        handler = super().dispatch
+
+        @condition(etag_func=lambda request, *args, **kwargs: etag)
+        async def view(request, *args, **kwargs):
+            return await handler(request, *args, **kwargs)
+
+        return revalidate(await view(request, *args, **kwargs))
+
+
+class SyncConditionalGetMixin:
+    """ConditionalGetMixin for synchronous views."""
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return super().dispatch(request, *args, **kwargs)
+        view = condition(etag_func=user_data_etag)(super().dispatch)
+        return revalidate(view(request, *args, **kwargs))
@@ -0,0 +1,19 @@
+from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from . import caching
+
+
+def data_version(request):
+    """
+    The user's data version (see core.caching) for keying `{% cache %}`
+    fragments. It is read from the cache only by templates that use it.
+    """
+    def version():
+        user = request.user
+        return caching.data_version(user.pk) if user.is_authenticated else ''
+
+    return {
+        'data_version': SimpleLazyObject(version),
+        'fragment_cache_timeout': settings.TEMPLATE_FRAGMENT_CACHE_TIMEOUT,
+    }
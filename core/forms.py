@@ -0,0 +1,142 @@
+from django import forms
+from django.core.exceptions import ValidationError
+
+from .categories import effective_categories
+from .importers import FORMATS
+from .models import Budget, CategorizationRule, Category, Expense, Income, RecurringTransaction, SavingsGoal
+
+
+class TransactionImportForm(forms.Form):
+    file = forms.FileField(help_text="CSV or OFX/QFX bank statement")
+    file_format = forms.ChoiceField(
+        choices=[('', 'Detect from file name')] + [(name, name.upper()) for name in FORMATS],
+        required=False,
+        label="Format",
+    )
+
+
+class UserCategoryField(forms.ModelChoiceField):
+    """
+    A category select limited to one user's effective categories (their own
+    plus the defaults they have not shadowed). Choices and validation both
+    come from the cached category map, so rendering or submitting the form
+    costs no category queries however many categories other users have.
+    """
+
+    def __init__(self, user, categories=None, **kwargs):
+        if categories is None:
+            categories = effective_categories(user.pk)
+        self.categories = {category.pk: category for category in categories.values()}
+        super().__init__(queryset=Category.objects.none(), **kwargs)
+        self.set_choices()
+
+    def set_choices(self):
+        self.queryset = Category.objects.filter(pk__in=list(self.categories))
+        self.choices = [('', self.empty_label)] + [(pk, category.name) for pk, category in self.categories.items()]
+
+    def add(self, category):
+        # Keep a category the user no longer sees (e.g. a default they have
+        # since shadowed) selectable on the rows that already use it.
+        self.categories[category.pk] = category
+        self.set_choices()
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        try:
+            return self.categories[int(value)]
+        except (KeyError, TypeError, ValueError):
+            raise ValidationError(self.error_messages['invalid_choice'], code='invalid_choice')
+
+
+class UserCategoryFormMixin:
+    """
+    ModelForm mixin replacing the `category` field with a UserCategoryField
+    for `user`. Callers validating many rows can pass the user's
+    `categories` map once instead of reading it from the cache per form.
+    """
+
+    def __init__(self, *args, user, categories=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        field = self.fields['category']
+        self.fields['category'] = UserCategoryField(
+            user, categories, required=field.required, label=field.label, help_text=field.help_text,
+        )
+        if self.instance.category_id and self.instance.category_id not in self.fields['category'].categories:
+            self.fields['category'].add(self.instance.category)
+
+    def _get_validation_exclusions(self):
+        # UserCategoryField has already checked the category against the map;
+        # model validation would look every row's category up again.
+        exclude = super()._get_validation_exclusions()
+        exclude.add('category')
+        return exclude
+
+
+class ExpenseForm(UserCategoryFormMixin, forms.ModelForm):
+    class Meta:
+        model = Expense
+        fields = ['amount', 'category', 'description', 'date']
+
+
+class IncomeForm(forms.ModelForm):
+    class Meta:
+        model = Income
+        fields = ['amount', 'description', 'date']
+
+
+class BudgetForm(UserCategoryFormMixin, forms.ModelForm):
+    class Meta:
+        model = Budget
+        fields = ['category', 'amount', 'start_date', 'end_date']
+
+
+class RecurringTransactionForm(UserCategoryFormMixin, forms.ModelForm):
+    class Meta:
+        model = RecurringTransaction
+        fields = ['kind', 'amount', 'category', 'description', 'frequency', 'interval', 'start_date', 'end_date']
+
+
+class CategorizationRuleForm(UserCategoryFormMixin, forms.ModelForm):
+    class Meta:
+        model = CategorizationRule
+        fields = ['priority', 'match_type', 'pattern', 'min_amount', 'max_amount', 'category']
+
+
+class SavingsGoalForm(forms.ModelForm):
+    # current_amount only changes through contributions
+    class Meta:
+        model = SavingsGoal
+        fields = ['goal_name', 'target_amount', 'deadline']
+
+
+class SavingsGoalEditForm(forms.ModelForm):
+    """
+    The goal form of the pages. "Amount Saved" is edited as a total, but
+    saved as a contribution of the difference to `shown_amount`, the total
+    the form was rendered with, so contributions recorded meanwhile are kept.
+    """
+    shown_amount = forms.DecimalField(
+        max_digits=10, decimal_places=2, required=False, widget=forms.HiddenInput
+    )
+
+    class Meta:
+        model = SavingsGoal
+        fields = ['goal_name', 'target_amount', 'current_amount', 'deadline']
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['shown_amount'].initial = 0 if self.instance._state.adding else self.instance.current_amount
+
+    def amount_change(self):
+        shown = self.cleaned_data.get('shown_amount')
+        if shown is None:
+            # Posted without the field (not from the page): against the saved total
+            shown = self.initial.get('current_amount') or 0
+        return self.cleaned_data['current_amount'] - shown
+
+
+class CategoryForm(forms.ModelForm):
+    class Meta:
+        model = Category
+        fields = ['name', 'description']
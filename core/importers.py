@@ -0,0 +1,260 @@
+"""
+Streaming import of bank statements into expenses and incomes.
+
+Files are parsed record by record (CSV rows or OFX <STMTTRN> blocks) from a
+binary stream, and valid records are written with `bulk_create` in batches, one
+transaction per batch. Memory use therefore depends on the batch size, not on
+the size of the file. Rows that cannot be imported are reported with their
+line (CSV) or transaction (OFX) number and do not stop the import.
+
+CSV files need `date`, `amount` and `description` columns and may have
+`category` and `type` (expense/income) columns. Without a `type`, negative
+amounts are expenses and positive amounts are incomes, as on a bank statement.
+"""
+import codecs
+import csv
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+
+from django.core.exceptions import ValidationError
+
+from . import categories, categorization
+from .ledger import bulk_create_transactions
+from .models import CategorizationRule, Expense, Income
+
+FORMATS = ('csv', 'ofx')
+DATE_FORMATS = ('%Y-%m-%d', '%m/%d/%Y', '%Y%m%d')
+READ_SIZE = 64 * 1024
+
+
+class RowError(ValueError):
+    pass
+
+
+@dataclass
+class ImportResult:
+    expenses: int = 0
+    incomes: int = 0
+    errors: list = field(default_factory=list)
+
+    @property
+    def created(self):
+        return self.expenses + self.incomes
+
+
+def detect_format(filename):
+    extension = filename.rsplit('.', 1)[-1].lower()
+    if extension in ('ofx', 'qfx'):
+        return 'ofx'
+    return 'csv'
+
+
+def _text_chunks(stream):
+    # Decode incrementally so a multi-byte character split across two reads is
+    # not mangled.
+    decoder = codecs.getincrementaldecoder('utf-8-sig')(errors='replace')
+    while True:
+        chunk = stream.read(READ_SIZE)
+        if not chunk:
+            break
+        yield decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+    yield decoder.decode(b'', final=True)
+
+
+def _text_lines(stream):
+    pending = ''
+    for text in _text_chunks(stream):
+        pending += text
+        *lines, pending = pending.split('\n')
+        for line in lines:
+            yield line + '\n'
+    if pending:
+        yield pending
+
+
+def parse_csv(stream):
+    """
+    Yield (line number, record) pairs from a CSV stream. A line the csv module
+    cannot parse (such as a field over csv.field_size_limit()) is yielded with
+    a RowError in place of its record, and reading goes on after it.
+    """
+    reader = csv.DictReader(_text_lines(stream))
+    try:
+        fieldnames = reader.fieldnames
+    except csv.Error as error:
+        yield reader.reader.line_num, RowError(f"Unreadable header: {error}")
+        return
+    if fieldnames is None:
+        return
+    reader.fieldnames = [name.strip().lower() for name in fieldnames]
+    while True:
+        try:
+            record = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as error:
+            # Every failed read consumes at least the offending line. The
+            # DictReader only copies line_num after a successful read.
+            yield reader.reader.line_num, RowError(f"Unreadable line: {error}")
+            continue
+        yield reader.line_num, {key: (value or '').strip() for key, value in record.items() if key}
+
+
+OFX_TAG = re.compile(r'<(/?)([A-Za-z0-9.]+)>([^<]*)')
+
+
+def parse_ofx(stream):
+    """
+    Yield (transaction number, record) pairs from an OFX/QFX stream.
+
+    Handles both SGML (OFX 1.x, unclosed leaf tags) and XML (OFX 2.x) files by
+    tokenizing tags out of a rolling buffer.
+    """
+    record = None
+    number = 0
+
+    def tokens():
+        buffer = ''
+        for text in _text_chunks(stream):
+            buffer += text
+            # Hold back the last tag: its name or value may continue in the next chunk.
+            cut = buffer.rfind('<')
+            if cut < 0:
+                buffer = ''
+                continue
+            yield from OFX_TAG.findall(buffer[:cut])
+            buffer = buffer[cut:]
+        yield from OFX_TAG.findall(buffer)
+
+    for closing, tag, value in tokens():
+        tag = tag.upper()
+        if tag == 'STMTTRN':
+            if closing and record is not None:
+                number += 1
+                yield number, record
+                record = None
+            elif not closing:
+                record = {}
+        elif record is not None and not closing and value.strip():
+            record[tag] = value.strip()
+
+    if record is not None:
+        number += 1
+        yield number, record
+
+
+def _ofx_to_record(record):
+    description = ' - '.join(part for part in (record.get('NAME'), record.get('MEMO')) if part)
+    return {
+        'date': record.get('DTPOSTED', '')[:8],
+        'amount': record.get('TRNAMT', ''),
+        'description': description,
+    }
+
+
+def _parse_date(value):
+    value = value.strip()
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.strptime(value, date_format).date()
+        except ValueError:
+            continue
+    raise RowError(f"Invalid date '{value}'")
+
+
+def _parse_amount(value):
+    cleaned = value.replace(',', '').replace('$', '').strip()
+    if cleaned.startswith('(') and cleaned.endswith(')'):
+        cleaned = '-' + cleaned[1:-1]
+    try:
+        amount = Decimal(cleaned)
+    except InvalidOperation:
+        raise RowError(f"Invalid amount '{value}'")
+    try:
+        Expense._meta.get_field('amount').clean(abs(amount), None)
+    except ValidationError as error:
+        raise RowError(f"Invalid amount '{value}': {' '.join(error.messages)}")
+    return amount
+
+
+class CategoryResolver:
+    """
+    Map imported rows to the user's categories.
+
+    A row's `category` column is matched by name (case-insensitively) against
+    the user's own categories, which shadow the default ones. Rows without a
+    known category fall back to `rules`, a list of (substring, category name)
+    pairs tried in order against the description, then to the user's saved
+    CategorizationRules; both are compiled into one matcher (see
+    core.categorization).
+    """
+
+    def __init__(self, user, rules=()):
+        self.by_name = categories.lookup(user.pk)
+        extra = tuple(
+            (self.by_name[name.lower()], CategorizationRule.CONTAINS, substring, None, None)
+            for substring, name in rules if name.lower() in self.by_name
+        )
+        self.rules = categorization.compile_rules(extra + categorization.user_rules(user.pk))
+
+    def resolve(self, name, description, amount=None):
+        if name and name.lower() in self.by_name:
+            return self.by_name[name.lower()]
+        return self.rules.match(description, amount)
+
+
+def _build(user, record, resolver):
+    day = _parse_date(record.get('date', ''))
+    amount = _parse_amount(record.get('amount', ''))
+    if not amount:
+        # Neither an expense nor an income
+        raise RowError(f"Zero amount '{record['amount']}'")
+    description = record.get('description') or None
+    kind = record.get('type', '').lower()
+    if kind not in ('', 'expense', 'income'):
+        raise RowError(f"Invalid type '{record['type']}'")
+    if not kind:
+        kind = 'expense' if amount < 0 else 'income'
+
+    if kind == 'income':
+        return Income(user=user, amount=abs(amount), description=description, date=day)
+    category_id = resolver.resolve(record.get('category'), description, abs(amount))
+    return Expense(user=user, amount=abs(amount), category_id=category_id, description=description, date=day)
+
+
+def import_transactions(user, stream, file_format='csv', batch_size=1000, rules=()):
+    """Import a CSV or OFX stream for `user` and return an ImportResult."""
+    if file_format not in FORMATS:
+        raise ValueError(f"Unsupported format '{file_format}'")
+
+    if file_format == 'ofx':
+        records = ((number, _ofx_to_record(record)) for number, record in parse_ofx(stream))
+    else:
+        records = parse_csv(stream)
+
+    resolver = CategoryResolver(user, rules)
+    result = ImportResult()
+    expenses, incomes = [], []
+
+    def flush():
+        bulk_create_transactions(expenses, incomes, batch_size=batch_size)
+        result.expenses += len(expenses)
+        result.incomes += len(incomes)
+        expenses.clear()
+        incomes.clear()
+
+    for number, record in records:
+        try:
+            if isinstance(record, RowError):
+                raise record
+            obj = _build(user, record, resolver)
+        except RowError as error:
+            result.errors.append((number, str(error)))
+            continue
+        (incomes if isinstance(obj, Income) else expenses).append(obj)
+        if len(expenses) + len(incomes) >= batch_size:
+            flush()
+    flush()
+    return result
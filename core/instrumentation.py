@@ -0,0 +1,169 @@
+"""
+Per-request query instrumentation.
+
+QueryInstrumentationMiddleware wraps every database call made while a request
+is handled (through `connection.execute_wrapper`) and records the number of
+queries, the time spent in SQL and queries that were repeated with the same
+SQL, which usually means an N+1 pattern. The numbers are sent back as a
+`Server-Timing` header, logged as one JSON line per request on the
+`core.instrumentation` logger and, when QUERY_INSTRUMENTATION_REPORT is on,
+kept per view so the staff-only report page can show latency percentiles.
+
+Everything is opt-in through the QUERY_INSTRUMENTATION setting; when it is
+off the middleware removes itself at startup. It runs sync or async like the
+rest of the stack. Queries run while a streaming response is consumed happen
+after the middleware returns and are not counted.
+"""
+import json
+import logging
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+logger = logging.getLogger('core.instrumentation')
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - started
+            self.count += 1
+            self.statements[sql] += 1
+
+    @property
+    def duplicates(self):
+        return sum(count - 1 for count in self.statements.values() if count > 1)
+
+    def most_repeated(self):
+        sql, count = self.statements.most_common(1)[0] if self.statements else ('', 0)
+        return sql if count > 1 else None
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))
+    return ordered[index]
+
+
+class RequestStats:
+    """Bounded, per-process samples of request metrics, grouped by view."""
+
+    def __init__(self, max_samples):
+        self.max_samples = max_samples
+        self.samples = {}
+        self.lock = threading.Lock()
+
+    def record(self, key, total_ms, db_ms, queries):
+        with self.lock:
+            samples = self.samples.setdefault(key, deque(maxlen=self.max_samples))
+            samples.append((total_ms, db_ms, queries))
+
+    def summary(self):
+        with self.lock:
+            snapshot = {key: list(samples) for key, samples in self.samples.items()}
+        rows = []
+        for key, samples in sorted(snapshot.items()):
+            totals = [sample[0] for sample in samples]
+            rows.append({
+                'view': key,
+                'requests': len(samples),
+                'p50_ms': percentile(totals, 0.50),
+                'p95_ms': percentile(totals, 0.95),
+                'p99_ms': percentile(totals, 0.99),
+                'db_p95_ms': percentile([sample[1] for sample in samples], 0.95),
+                'max_queries': max(sample[2] for sample in samples),
+            })
+        return rows
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+
+
+stats = RequestStats(max_samples=1000)
+
+
+class QueryInstrumentationMiddleware:
+    # Both, like Django's own middleware: under ASGI the async views keep
+    # running in the event loop instead of being adapted to a thread.
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.QUERY_INSTRUMENTATION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        stats.max_samples = settings.QUERY_INSTRUMENTATION_SAMPLES
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with self.recording(recorder):
+            response = self.get_response(request)
+        return self.report(request, response, recorder, started)
+
+    async def __acall__(self, request):
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        # Async views query through sync_to_async, whose thread has its own
+        # connections; wrap those rather than the event loop's.
+        recording = await sync_to_async(self.recording)(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(recording.close)()
+        return self.report(request, response, recorder, started)
+
+    @staticmethod
+    def recording(recorder):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(recorder))
+        return stack
+
+    def report(self, request, response, recorder, started):
+        total_ms = (time.perf_counter() - started) * 1000
+        db_ms = recorder.duration * 1000
+
+        match = request.resolver_match
+        # Unresolved paths share one bucket so stray URLs cannot grow the stats.
+        view_name = match.view_name if match else '<unresolved>'
+        response['Server-Timing'] = (
+            f'db;dur={db_ms:.1f};desc="{recorder.count} queries", total;dur={total_ms:.1f}'
+        )
+        logger.info(json.dumps({
+            'event': 'request',
+            'method': request.method,
+            'path': request.path,
+            'view': view_name,
+            'status': response.status_code,
+            'queries': recorder.count,
+            'duplicate_queries': recorder.duplicates,
+            'most_repeated_sql': recorder.most_repeated(),
+            'db_ms': round(db_ms, 2),
+            'total_ms': round(total_ms, 2),
+        }))
+        if settings.QUERY_INSTRUMENTATION_REPORT:
+            stats.record(view_name, total_ms, db_ms, recorder.count)
+        return response
@@ -0,0 +1,22 @@
+"""
+Bulk writes of expenses and incomes.
+
+`bulk_create` skips the save signals that keep the monthly rollups and the
+dashboard cache in sync, so every bulk write path (imports, recurring
+transactions, the API batch endpoint, ...) goes through here instead.
+"""
+from django.db import transaction
+
+from . import caching, rollups
+from .models import Expense, Income
+
+
+def bulk_create_transactions(expenses=(), incomes=(), batch_size=1000):
+    expenses, incomes = list(expenses), list(incomes)
+    with transaction.atomic():
+        Expense.objects.bulk_create(expenses, batch_size=batch_size)
+        Income.objects.bulk_create(incomes, batch_size=batch_size)
+        touched = rollups.record_bulk(expenses + incomes)
+    for user_id, months in touched.items():
+        caching.invalidate_months(user_id, months)
+    return expenses, incomes
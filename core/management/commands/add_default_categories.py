@@ -1,28 +1,22 @@
-from django.core.management.base import BaseCommand
-from core.models import Category
+from django.core.management.base import BaseCommand, CommandError
+from core.categories import DEFAULT_CATEGORIES_FILE, load_definitions, provision_defaults
+
 
 class Command(BaseCommand):
-    help = "Create default categories"
+    help = "Create or update the default categories from a JSON data file"
 
-    def handle(self, *args, **kwargs):
-        default_categories = [
-            {"name": "Clothing", "description": "Clothing, footwear, and accessories"},
-            {"name": "Entertainment", "description": "Movies, games, and recreational activities"},
-            {"name": "Groceries", "description": "Groceries, food, and household supplies"},
-            {"name": "Healthcare", "description": "Medical expenses and insurance"},
-            {"name": "Housing", "description": "Rent, utilities, and mortgage payments"},
-            {"name": "Miscellaneous", "description": "Other expenses not covered by other categories"},
-            {"name": "Savings", "description": "Money set aside for future uses"},
-            {"name": "Transportation", "description": "Public transport, fuel, and vehicle maintenance"},
-            {"name": "Utilities", "description": "Electricity, water, and other utility bills"},
-        ]
+    def add_arguments(self, parser):
+        parser.add_argument('--file', default=DEFAULT_CATEGORIES_FILE,
+                            help="JSON list of {\"name\", \"description\"} objects (default: the bundled list)")
+        parser.add_argument('--database', default='default')
 
-        for category_data in default_categories:
-            category, created = Category.objects.get_or_create(
-                name=category_data["name"],
-                defaults={"description": category_data["description"], "user": None}
-            )
-            if created:
-                self.stdout.write(self.style.SUCCESS(f"Created default category: {category.name}"))
-            else:
-                self.stdout.write(self.style.WARNING(f"Category already exists: {category.name}"))
+    def handle(self, *args, **options):
+        try:
+            definitions = load_definitions(options['file'])
+        except (OSError, ValueError, KeyError, TypeError) as error:
+            raise CommandError(f"Cannot read {options['file']}: {error}")
+        created, updated = provision_defaults(definitions, using=options['database'])
+        self.stdout.write(self.style.SUCCESS(
+            f"{created} default categories created, {updated} updated, "
+            f"{len(definitions) - created - updated} unchanged"
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.models import ApiToken, User
+
+
+class Command(BaseCommand):
+    help = "Create a JSON API token for a user and print its key"
+
+    def add_arguments(self, parser):
+        parser.add_argument('username')
+        parser.add_argument('--name', default='', help="Label to tell the user's tokens apart")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"No user named '{options['username']}'")
+        token, key = ApiToken.issue(user, options['name'])
+        # Only the digest is stored, so this is the one chance to see the key
+        self.stdout.write(key)
@@ -0,0 +1,30 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from core.models import User
+from core.exporters import FORMATS, export_ledger
+
+
+class Command(BaseCommand):
+    help = "Stream a user's expenses, incomes, budgets and savings goals as CSV or newline-delimited JSON"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', required=True, help="Username whose ledger is exported")
+        parser.add_argument('--format', choices=list(FORMATS), default='csv')
+        parser.add_argument('--start', type=date.fromisoformat, help="First date to export (YYYY-MM-DD)")
+        parser.add_argument('--end', type=date.fromisoformat, help="Last date to export (YYYY-MM-DD)")
+        parser.add_argument('--output', help="File to write to (defaults to standard output)")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist")
+
+        chunks = export_ledger(user, options['format'], options['start'], options['end'])
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8', newline='') as output:
+                output.writelines(chunks)
+        else:
+            for chunk in chunks:
+                self.stdout.write(chunk, ending='')
@@ -0,0 +1,43 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from core.models import User
+from core.importers import detect_format, import_transactions, FORMATS
+
+
+class Command(BaseCommand):
+    help = "Import expenses and incomes for a user from a CSV or OFX file"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or OFX/QFX file to import")
+        parser.add_argument('--user', required=True, help="Username that will own the transactions")
+        parser.add_argument('--format', choices=FORMATS, help="File format (detected from the extension by default)")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows written per transaction")
+        parser.add_argument(
+            '--rules',
+            help='JSON file mapping description substrings to category names, e.g. {"uber": "Transportation"}',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['user']}' does not exist")
+
+        rules = ()
+        if options['rules']:
+            with open(options['rules'], encoding='utf-8') as rules_file:
+                rules = list(json.load(rules_file).items())
+
+        file_format = options['format'] or detect_format(options['path'])
+        with open(options['path'], 'rb') as stream:
+            result = import_transactions(
+                user, stream, file_format, batch_size=options['batch_size'], rules=rules
+            )
+
+        for number, message in result.errors:
+            self.stdout.write(self.style.WARNING(f"Row {number}: {message}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {result.expenses} expense(s) and {result.incomes} income(s), "
+            f"skipped {len(result.errors)} row(s)"
+        ))
@@ -0,0 +1,28 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from core import recurring
+
+
+class Command(BaseCommand):
+    help = "Create the expenses and incomes of all recurring transactions that are due"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help="Materialize occurrences up to this day (YYYY-MM-DD, default today)")
+        parser.add_argument('--batch-size', type=int, default=recurring.BATCH_SIZE, help="Schedules per transaction")
+
+    def handle(self, *args, **options):
+        until = None
+        if options['date']:
+            try:
+                until = date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError("--date must be in YYYY-MM-DD format")
+        if options['batch_size'] < 1:
+            raise CommandError("--batch-size must be positive")
+
+        result = recurring.materialize(until, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Processed {result.schedules} due schedule(s): "
+            f"created {result.expenses} expense(s) and {result.incomes} income(s)"
+        ))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.models import User
+from core import rollups
+
+
+class Command(BaseCommand):
+    help = "Check the monthly rollups against the raw Expense/Income tables and rebuild them"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', help="Only process the user with this username")
+        parser.add_argument(
+            '--check', action='store_true',
+            help="Only report drift; exit with an error status if any is found",
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist")
+
+        drift = rollups.find_drift(user)
+        for (user_id, month, category_id), found, expected in drift:
+            self.stdout.write(self.style.WARNING(
+                f"Drift for user {user_id}, {month:%Y-%m}, category {category_id}: "
+                f"stored {found}, expected {expected}"
+            ))
+
+        if options['check']:
+            if drift:
+                raise CommandError(f"{len(drift)} rollup row(s) out of sync")
+            self.stdout.write(self.style.SUCCESS("Rollups are in sync"))
+            return
+
+        count = rollups.rebuild(user)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {count} rollup row(s), fixed {len(drift)} drifted row(s)"))
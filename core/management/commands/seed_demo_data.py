@@ -0,0 +1,82 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+
+from core.models import User
+from core import seeding
+
+
+def _init_worker():
+    # Processes started with "spawn" import nothing from the parent; forked
+    # ones must not reuse the parent's database connections.
+    import django
+    django.setup()
+    connections.close_all()
+
+
+def _seed(user_id, index, expenses, seed, today, batch_size):
+    return seeding.seed_user(user_id, index, expenses, seed=seed, today=today, batch_size=batch_size)
+
+
+class Command(BaseCommand):
+    help = "Fill the database with deterministic synthetic users, transactions, budgets and savings goals"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10, help="Number of users to create")
+        parser.add_argument('--expenses-per-user', type=int, default=10000, help="Expenses generated per user")
+        parser.add_argument('--seed', type=int, default=0, help="Random seed; the same seed gives the same data")
+        parser.add_argument('--prefix', default='demo', help="Usernames are <prefix><n>")
+        parser.add_argument('--password', default='demo-password', help="Password of every created user")
+        parser.add_argument(
+            '--workers', type=int,
+            help="Worker processes (default: one per CPU, or 1 on SQLite which allows a single writer)",
+        )
+        parser.add_argument('--batch-size', type=int, default=seeding.BATCH_SIZE, help="Rows per bulk insert")
+
+    def handle(self, *args, **options):
+        count, prefix = options['users'], options['prefix']
+        if count < 1 or options['expenses_per_user'] < 0 or options['batch_size'] < 1:
+            raise CommandError("--users and --batch-size must be positive, --expenses-per-user not negative")
+        usernames = [f'{prefix}{index}' for index in range(count)]
+        if User.objects.filter(username__in=usernames).exists():
+            raise CommandError(f"Users named '{prefix}<n>' already exist; pick another --prefix")
+
+        workers = options['workers']
+        if workers is None:
+            workers = 1 if connection.vendor == 'sqlite' else os.cpu_count() or 1
+        workers = max(1, min(workers, count))
+
+        today = date.today()
+        started = time.perf_counter()
+        seeding.default_categories()
+        # Hash once: every demo user shares the password.
+        password = make_password(options['password'])
+        users = [User.objects.create(username=name, email=f'{name}@example.com', password=password) for name in usernames]
+        jobs = [
+            (user.pk, index, options['expenses_per_user'], options['seed'], today, options['batch_size'])
+            for index, user in enumerate(users)
+        ]
+
+        total = 0
+        if workers == 1:
+            for job in jobs:
+                total += _seed(*job)
+                self.stdout.write(f"Seeded {total} expenses")
+        else:
+            connections.close_all()
+            context = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn')
+            with ProcessPoolExecutor(workers, mp_context=context, initializer=_init_worker) as pool:
+                for future in as_completed([pool.submit(_seed, *job) for job in jobs]):
+                    total += future.result()
+                    self.stdout.write(f"Seeded {total} expenses")
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {count} user(s) and {total} expenses in {elapsed:.1f}s ({total / max(elapsed, 1e-9):,.0f} rows/s)"
+        ))
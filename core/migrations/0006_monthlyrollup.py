@@ -0,0 +1,60 @@
+# Generated by Django 5.1.3 on 2026-10-18 01:31
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+from django.db.models.functions import TruncMonth
+
+
+def populate_rollups(apps, schema_editor):
+    Expense = apps.get_model('core', 'Expense')
+    Income = apps.get_model('core', 'Income')
+    MonthlyRollup = apps.get_model('core', 'MonthlyRollup')
+
+    rows = {}
+    expenses = Expense.objects.annotate(month=TruncMonth('date')).values('user_id', 'month', 'category_id').annotate(
+        total=Sum('amount'), count=Count('id')
+    ).order_by()
+    for row in expenses:
+        rows[(row['user_id'], row['month'], row['category_id'])] = MonthlyRollup(
+            user_id=row['user_id'], month=row['month'], category_id=row['category_id'],
+            expense_total=row['total'], expense_count=row['count'],
+        )
+    incomes = Income.objects.annotate(month=TruncMonth('date')).values('user_id', 'month').annotate(
+        total=Sum('amount'), count=Count('id')
+    ).order_by()
+    for row in incomes:
+        rollup = rows.setdefault(
+            (row['user_id'], row['month'], None),
+            MonthlyRollup(user_id=row['user_id'], month=row['month'], category_id=None),
+        )
+        rollup.income_total, rollup.income_count = row['total'], row['count']
+    MonthlyRollup.objects.bulk_create(rows.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_alter_income_date_alter_income_description'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='First day of the month')),
+                ('expense_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('expense_count', models.PositiveIntegerField(default=0)),
+                ('income_total', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('income_count', models.PositiveIntegerField(default=0)),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='core.category')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'month', 'category'), name='unique_rollup_per_category'), models.UniqueConstraint(condition=models.Q(('category__isnull', True)), fields=('user', 'month'), name='unique_rollup_uncategorized')],
+            },
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
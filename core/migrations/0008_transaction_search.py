@@ -0,0 +1,65 @@
+from django.db import migrations
+
+TABLES = ('core_expense', 'core_income')
+
+
+def sqlite_statements(table):
+    index = f'{table}_search'
+    return [
+        # External-content FTS5 index: the text stays in the transaction table,
+        # the index only holds the tokens. Prefix indexes make 'term*' queries cheap.
+        f"""CREATE VIRTUAL TABLE {index} USING fts5(
+            description, content='{table}', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )""",
+        f"""CREATE TRIGGER {index}_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {index}(rowid, description) VALUES (new.id, new.description);
+        END""",
+        f"""CREATE TRIGGER {index}_delete AFTER DELETE ON {table} BEGIN
+            INSERT INTO {index}({index}, rowid, description) VALUES ('delete', old.id, old.description);
+        END""",
+        f"""CREATE TRIGGER {index}_update AFTER UPDATE OF description ON {table} BEGIN
+            INSERT INTO {index}({index}, rowid, description) VALUES ('delete', old.id, old.description);
+            INSERT INTO {index}(rowid, description) VALUES (new.id, new.description);
+        END""",
+        f"INSERT INTO {index}({index}) VALUES ('rebuild')",
+    ]
+
+
+def create_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table in TABLES:
+        if vendor == 'sqlite':
+            statements = sqlite_statements(table)
+        elif vendor == 'postgresql':
+            # Must match the expression in core.search exactly to be used.
+            statements = [
+                f"CREATE INDEX {table}_search_idx ON {table} "
+                f"USING gin (to_tsvector('simple', coalesce(description, '')))"
+            ]
+        else:
+            statements = []
+        for statement in statements:
+            schema_editor.execute(statement)
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    for table in TABLES:
+        if vendor == 'sqlite':
+            for suffix in ('insert', 'delete', 'update'):
+                schema_editor.execute(f'DROP TRIGGER IF EXISTS {table}_search_{suffix}')
+            schema_editor.execute(f'DROP TABLE IF EXISTS {table}_search')
+        elif vendor == 'postgresql':
+            schema_editor.execute(f'DROP INDEX IF EXISTS {table}_search_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_transaction_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.1.3 on 2026-10-18 02:33
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def record_opening_balances(apps, schema_editor):
+    # Goals created before contributions existed keep their saved amount as a
+    # single opening contribution, so current_amount stays the sum of them.
+    SavingsGoal = apps.get_model('core', 'SavingsGoal')
+    SavingsContribution = apps.get_model('core', 'SavingsContribution')
+    SavingsContribution.objects.bulk_create(
+        SavingsContribution(goal_id=pk, amount=amount, note='Opening balance')
+        for pk, amount in SavingsGoal.objects.exclude(current_amount=0).values_list('pk', 'current_amount').iterator()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_recurringtransaction'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SavingsContribution',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('date', models.DateField(default=django.utils.timezone.localdate)),
+                ('note', models.CharField(blank=True, max_length=200)),
+                ('goal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='contributions', to='core.savingsgoal')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['goal', 'date'], name='contribution_goal_date_idx')],
+            },
+        ),
+        migrations.RunPython(record_opening_balances, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,13 @@
+import hashlib
+import re
+import secrets
+from decimal import Decimal
+
+from django.core.exceptions import ValidationError
+from django.core.validators import MinValueValidator
 from django.db import models
+from django.db.models import Case, ExpressionWrapper, F, FloatField, Func, IntegerField, OuterRef, Subquery, Sum, Value, When
+from django.db.models.functions import Cast, Coalesce, NullIf, Round
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 
@@ -21,6 +30,13 @@ class Category(models.Model):
     class Meta:
         verbose_name_plural = 'Categories'
         unique_together = ['user', 'name']
+        constraints = [
+            # NULLs never collide in unique_together, so default categories
+            # (user=None) need their own index to keep their names unique.
+            models.UniqueConstraint(
+                fields=['name'], condition=models.Q(user__isnull=True), name='unique_default_category_name',
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -29,10 +45,16 @@ class Category(models.Model):
 class Expense(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='expenses')
     amount = models.DecimalField(max_digits=10, decimal_places=2)
-    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name='expenses')
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='expenses')
     description = models.TextField(blank=True, null=True)
     date = models.DateField(default=timezone.now)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'date'], name='expense_user_date_idx'),
+            models.Index(fields=['user', 'category', 'date'], name='expense_user_category_date_idx'),
+        ]
+
     def __str__(self):
         return f"{self.amount} - {self.category} on {self.date}"
 
@@ -43,10 +65,40 @@ class Income(models.Model):
     description = models.TextField(verbose_name="Source of Income", blank=True, null=True)
     date = models.DateField(verbose_name="Date of Credit", default=timezone.now)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'date'], name='income_user_date_idx'),
+        ]
+
     def __str__(self):
         return f"{self.amount} on {self.date}"
 
 
+class BudgetQuerySet(models.QuerySet):
+    def with_spend(self, start=None, end=None):
+        """
+        Annotate each budget with `value_spent` and `budget_available` in one query.
+
+        Spend is the sum of the budget owner's expenses in the budget's category,
+        computed by a correlated subquery served by the (user, category, date)
+        index. By default it covers the budget's own start_date..end_date range;
+        pass a half-open [start, end) window to measure another period instead.
+        """
+        expenses = Expense.objects.filter(user=OuterRef('user'), category=OuterRef('category'))
+        if start is None:
+            expenses = expenses.filter(date__gte=OuterRef('start_date'), date__lte=OuterRef('end_date'))
+        else:
+            expenses = expenses.filter(date__gte=start, date__lt=end)
+        spent = expenses.order_by().values('category').annotate(total=Sum('amount')).values('total')
+
+        money = models.DecimalField(max_digits=10, decimal_places=2)
+        return self.select_related('category').annotate(
+            value_spent=Coalesce(Subquery(spent, output_field=money), Value(Decimal('0.00')), output_field=money),
+        ).annotate(
+            budget_available=ExpressionWrapper(F('amount') - F('value_spent'), output_field=money),
+        )
+
+
 class Budget(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='budgets')
     category = models.ForeignKey(Category, on_delete=models.CASCADE)
@@ -54,17 +106,236 @@ class Budget(models.Model):
     start_date = models.DateField()
     end_date = models.DateField()
 
+    objects = BudgetQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.category} budget: {self.amount}"
 
 
+class DaysUntil(Func):
+    """Whole days from `day` until the date in `expression` (negative once it has passed)."""
+    output_field = IntegerField()
+    arg_joiner = ' - '
+    template = '(%(expressions)s)'
+
+    def __init__(self, expression, day):
+        super().__init__(expression, Value(day, output_field=models.DateField()))
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        return super().as_sql(
+            compiler, connection,
+            template='CAST(julianday(%(expressions)s) AS INTEGER)', arg_joiner=') - julianday(',
+            **extra_context,
+        )
+
+
+class SavingsGoalQuerySet(models.QuerySet):
+    ACHIEVED = 'achieved'
+    OVERDUE = 'overdue'
+    ON_TRACK = 'on_track'
+
+    def with_progress(self, today=None):
+        """
+        Annotate each goal with `percentage_achieved`, `amount_to_goal`,
+        `days_to_deadline` and `status` (achieved, overdue or on_track) in SQL.
+        """
+        today = today or timezone.localdate()
+        money = models.DecimalField(max_digits=10, decimal_places=2)
+        # Divide as floats: SQLite stores whole amounts as integers and would
+        # truncate the quotient.
+        ratio = Cast('current_amount', FloatField()) * 100 / NullIf('target_amount', Value(0))
+        return self.annotate(
+            percentage_achieved=Coalesce(Round(ratio, 2), Value(0.0), output_field=FloatField()),
+            amount_to_goal=ExpressionWrapper(F('target_amount') - F('current_amount'), output_field=money),
+            days_to_deadline=DaysUntil('deadline', today),
+            status=Case(
+                When(current_amount__gte=F('target_amount'), then=Value(self.ACHIEVED)),
+                When(deadline__lt=today, then=Value(self.OVERDUE)),
+                default=Value(self.ON_TRACK),
+                output_field=models.CharField(),
+            ),
+        )
+
+
 class SavingsGoal(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='savings_goals')
     goal_name = models.CharField(max_length=200)
     target_amount = models.DecimalField(max_digits=10, decimal_places=2)
+    # Running total of the goal's contributions, kept in sync by core.signals
     current_amount = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     deadline = models.DateField()
 
+    objects = SavingsGoalQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.goal_name} - {self.current_amount}/{self.target_amount}"
-    
\ No newline at end of file
+
+
+class SavingsContribution(models.Model):
+    # Money put into (or, when negative, taken out of) a savings goal
+    goal = models.ForeignKey(SavingsGoal, on_delete=models.CASCADE, related_name='contributions')
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    date = models.DateField(default=timezone.localdate)
+    note = models.CharField(max_length=200, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['goal', 'date'], name='contribution_goal_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.amount} to {self.goal.goal_name} on {self.date}"
+
+
+class RecurringTransaction(models.Model):
+    EXPENSE = 'expense'
+    INCOME = 'income'
+    KIND_CHOICES = [(EXPENSE, 'Expense'), (INCOME, 'Income')]
+
+    DAILY = 'daily'
+    WEEKLY = 'weekly'
+    MONTHLY = 'monthly'
+    YEARLY = 'yearly'
+    FREQUENCY_CHOICES = [(DAILY, 'Daily'), (WEEKLY, 'Weekly'), (MONTHLY, 'Monthly'), (YEARLY, 'Yearly')]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='recurring_transactions')
+    kind = models.CharField(max_length=7, choices=KIND_CHOICES, default=EXPENSE)
+    amount = models.DecimalField(max_digits=10, decimal_places=2)
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='+',
+                                 help_text="Expenses only")
+    description = models.TextField(blank=True, null=True)
+    # Like an rrule: every `interval` days/weeks/months/years from start_date,
+    # until end_date (inclusive) if set.
+    frequency = models.CharField(max_length=7, choices=FREQUENCY_CHOICES, default=MONTHLY)
+    interval = models.PositiveSmallIntegerField(default=1, validators=[MinValueValidator(1)])
+    start_date = models.DateField(default=timezone.localdate)
+    end_date = models.DateField(blank=True, null=True)
+    # Date of the next occurrence that has not been materialized yet; None once
+    # the schedule has ended. Maintained by core.recurring.
+    next_due_date = models.DateField(blank=True, null=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['next_due_date'], name='recurring_next_due_idx'),
+        ]
+
+    def clean(self):
+        if self.end_date and self.start_date and self.end_date < self.start_date:
+            raise ValidationError({'end_date': "The end date must not be before the start date."})
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.next_due_date is None:
+            self.next_due_date = self.start_date
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.get_kind_display()} {self.amount} {self.get_frequency_display().lower()}: {self.description or ''}"
+
+
+class CategorizationRule(models.Model):
+    """
+    Picks a category for an expense saved or imported without one (see
+    core.categorization). A rule matches when the description contains,
+    starts with or ends with its pattern, ignoring case, and the amount is
+    within the optional range; `*` in a pattern stands for any text. Rules
+    are tried by priority, then in the order they were created.
+    """
+    CONTAINS = 'substring'
+    STARTS_WITH = 'prefix'
+    ENDS_WITH = 'suffix'
+    MATCH_CHOICES = [(CONTAINS, 'Contains'), (STARTS_WITH, 'Starts with'), (ENDS_WITH, 'Ends with')]
+    WILDCARD = '*'
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='categorization_rules')
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='+')
+    match_type = models.CharField(max_length=9, choices=MATCH_CHOICES, default=CONTAINS)
+    pattern = models.CharField(max_length=200, blank=True, help_text="* matches any text")
+    min_amount = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    max_amount = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    priority = models.PositiveSmallIntegerField(default=100, help_text="Lower numbers are tried first")
+
+    class Meta:
+        ordering = ['priority', 'pk']
+
+    @classmethod
+    def expression(cls, match_type, pattern):
+        """
+        The regular expression a rule stands for. Users never write regular
+        expressions, so every rule runs in time linear in the description
+        per position tried: the text after each `*` is found at its earliest
+        occurrence inside an atomic group, which the engine never backtracks
+        into (the earliest occurrence always leaves the most room for the
+        rest).
+        """
+        texts = [re.escape(text) for text in pattern.split(cls.WILDCARD) if text]
+        if not texts:
+            return ''
+        anchored_start = match_type == cls.STARTS_WITH and not pattern.startswith(cls.WILDCARD)
+        anchored_end = match_type == cls.ENDS_WITH and not pattern.endswith(cls.WILDCARD)
+        end = r'\Z' if anchored_end else ''
+        if len(texts) == 1:
+            expression = texts[0] + end
+        else:
+            rest = [rf'(?>[\s\S]*?{text})' for text in texts[1:-1]] + [rf'(?>[\s\S]*?{texts[-1]}{end})']
+            expression = texts[0] + ''.join(rest)
+        return (r'\A' if anchored_start else '') + expression
+
+    def clean(self):
+        if not self.pattern.strip(self.WILDCARD) and self.min_amount is None and self.max_amount is None:
+            raise ValidationError("A rule needs a pattern or an amount range.")
+        if self.min_amount is not None and self.max_amount is not None and self.min_amount > self.max_amount:
+            raise ValidationError({'max_amount': "The maximum must not be below the minimum."})
+
+    def __str__(self):
+        if self.pattern.strip(self.WILDCARD):
+            condition = f"{self.get_match_type_display().lower()} '{self.pattern}'"
+        else:
+            condition = "any description"
+        return f"{condition} -> {self.category}"
+
+
+class MonthlyRollup(models.Model):
+    # Running totals per user, month and category, kept in sync by core.signals.
+    # Incomes have no category, so they always land in the category=None row.
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='monthly_rollups')
+    month = models.DateField(help_text="First day of the month")
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+    expense_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    expense_count = models.PositiveIntegerField(default=0)
+    income_total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    income_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'month', 'category'], name='unique_rollup_per_category'),
+            models.UniqueConstraint(
+                fields=['user', 'month'],
+                condition=models.Q(category__isnull=True),
+                name='unique_rollup_uncategorized',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.user} {self.month:%Y-%m} {self.category}: -{self.expense_total} / +{self.income_total}"
+
+
+class ApiToken(models.Model):
+    # Authenticates JSON API clients (core.api) with an "Authorization: Token <key>"
+    # header. Only a SHA-256 digest of the key is stored.
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='api_tokens')
+    name = models.CharField(max_length=100, blank=True)
+    digest = models.CharField(max_length=64, unique=True, editable=False)
+    created = models.DateTimeField(default=timezone.now, editable=False)
+
+    @staticmethod
+    def hash(key):
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    @classmethod
+    def issue(cls, user, name=''):
+        """Create a token for `user` and return (token, key); the key cannot be recovered later."""
+        key = secrets.token_urlsafe(32)
+        return cls.objects.create(user=user, name=name, digest=cls.hash(key)), key
+
+    def __str__(self):
+        return f"{self.user}: {self.name or 'API token'}"
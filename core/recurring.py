@@ -0,0 +1,159 @@
+"""
+Materialization of recurring transactions.
+
+Each RecurringTransaction stores the date of its next unmaterialized occurrence
+in `next_due_date`, which is indexed. `materialize` selects only schedules due
+by a given day, across all users, in batches: every occurrence up to that day
+is created through `ledger.bulk_create_transactions` and `next_due_date` is
+moved past it in the same transaction. Running it twice for the same day
+therefore creates nothing the second time, and a failed batch leaves its
+schedules due for the next run. Edits to a schedule's dates or frequency, in
+the pages or the admin, go through `reschedule`, which keeps occurrences
+already created from coming due again.
+"""
+import calendar
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .ledger import bulk_create_transactions
+from .models import Expense, Income, RecurringTransaction
+
+BATCH_SIZE = 500
+# The fields that decide when a schedule's occurrences fall
+SCHEDULE_FIELDS = ('frequency', 'interval', 'start_date', 'end_date')
+
+
+def add_months(day, months, anchor_day):
+    """Move `day` by `months`, keeping `anchor_day` or the month's last day if shorter."""
+    index = day.year * 12 + day.month - 1 + months
+    year, month = divmod(index, 12)
+    month += 1
+    return day.replace(year=year, month=month, day=min(anchor_day, calendar.monthrange(year, month)[1]))
+
+
+def following(schedule, day):
+    """Return the occurrence after `day`, or None once the schedule has ended."""
+    interval = schedule.interval or 1
+    if schedule.frequency == RecurringTransaction.DAILY:
+        day = day + timedelta(days=interval)
+    elif schedule.frequency == RecurringTransaction.WEEKLY:
+        day = day + timedelta(weeks=interval)
+    elif schedule.frequency == RecurringTransaction.MONTHLY:
+        day = add_months(day, interval, schedule.start_date.day)
+    else:
+        day = add_months(day, 12 * interval, schedule.start_date.day)
+    if schedule.end_date and day > schedule.end_date:
+        return None
+    return day
+
+
+def occurrences(schedule, until):
+    """Build the unsaved transactions due up to `until` and advance `next_due_date` past them."""
+    transactions = []
+    while schedule.next_due_date is not None and schedule.next_due_date <= until:
+        if schedule.end_date and schedule.next_due_date > schedule.end_date:
+            schedule.next_due_date = None
+            break
+        if schedule.kind == RecurringTransaction.INCOME:
+            transactions.append(Income(
+                user_id=schedule.user_id, amount=schedule.amount,
+                description=schedule.description, date=schedule.next_due_date,
+            ))
+        else:
+            transactions.append(Expense(
+                user_id=schedule.user_id, amount=schedule.amount, category_id=schedule.category_id,
+                description=schedule.description, date=schedule.next_due_date,
+            ))
+        schedule.next_due_date = following(schedule, schedule.next_due_date)
+    return transactions
+
+
+def last_materialized(schedule):
+    """The latest occurrence already created for the (persisted) `schedule`, or None."""
+    if schedule.next_due_date is None and schedule.end_date is None:
+        return None
+    last, day = None, schedule.start_date
+    while day is not None and (schedule.next_due_date is None or day < schedule.next_due_date):
+        if schedule.end_date and day > schedule.end_date:
+            break
+        last, day = day, following(schedule, day)
+    return last
+
+
+def first_after(schedule, day):
+    """The first occurrence of `schedule` after `day` (its first one if None), or None if there is none."""
+    occurrence = schedule.start_date
+    if schedule.end_date and occurrence > schedule.end_date:
+        return None
+    while occurrence is not None and day is not None and occurrence <= day:
+        occurrence = following(schedule, occurrence)
+    return occurrence
+
+
+def reschedule(previous, schedule):
+    """
+    Set `schedule.next_due_date` after its dates, frequency or interval were
+    changed from those of `previous`, the persisted schedule. Occurrences
+    already materialized are never due again: the schedule resumes at its
+    first date after the last of them, which also revives an ended schedule
+    whose end date moved later.
+    """
+    if previous.next_due_date is not None and previous.next_due_date == previous.start_date:
+        # Nothing materialized yet, so the schedule simply starts over
+        schedule.next_due_date = first_after(schedule, None)
+    else:
+        schedule.next_due_date = first_after(schedule, last_materialized(previous))
+
+
+def reschedule_edited(form):
+    """
+    Reschedule the existing schedule a ModelForm edits if the form changed
+    any of SCHEDULE_FIELDS; call it before saving. The form has already
+    applied the new values, so its initial ones are what was materialized from.
+    """
+    schedule = form.instance
+    if schedule._state.adding or not set(form.changed_data) & set(SCHEDULE_FIELDS):
+        return
+    previous = RecurringTransaction(
+        next_due_date=schedule.next_due_date,
+        **{name: form.initial[name] if name in form.fields else getattr(schedule, name) for name in SCHEDULE_FIELDS},
+    )
+    reschedule(previous, schedule)
+
+
+@dataclass
+class MaterializeResult:
+    schedules: int = 0
+    expenses: int = 0
+    incomes: int = 0
+
+
+def materialize(until=None, batch_size=BATCH_SIZE):
+    """Create every occurrence due on or before `until` (default today) for all users."""
+    until = until or timezone.localdate()
+    result = MaterializeResult()
+    while True:
+        with transaction.atomic():
+            # Locked rows are being handled by a concurrent run (on backends
+            # with row locks); skip them rather than creating their rows twice.
+            due = list(
+                RecurringTransaction.objects.select_for_update(skip_locked=True)
+                .filter(next_due_date__lte=until)
+                .order_by('next_due_date', 'pk')[:batch_size]
+            )
+            if not due:
+                return result
+
+            expenses, incomes = [], []
+            for schedule in due:
+                for instance in occurrences(schedule, until):
+                    (incomes if isinstance(instance, Income) else expenses).append(instance)
+            bulk_create_transactions(expenses=expenses, incomes=incomes)
+            RecurringTransaction.objects.bulk_update(due, ['next_due_date'])
+
+        result.schedules += len(due)
+        result.expenses += len(expenses)
+        result.incomes += len(incomes)
@@ -0,0 +1,212 @@
+"""
+Incremental maintenance of the MonthlyRollup table.
+
+Every Expense/Income write is translated into a delta against the
+(user, month, category) row it belongs to, so the dashboard can read monthly
+totals without scanning the transaction tables. `rebuild` and `find_drift`
+recompute the same numbers from scratch for the `rebuild_rollups` command.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import Expense, Income, MonthlyRollup
+
+ZERO = Decimal('0.00')
+# SQLite sums decimals as floats; round back to the column's precision.
+CENT = Decimal('0.01')
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def snapshot(instance):
+    """Return the (user_id, month, category_id, amount) bucket an instance counts towards."""
+    model = type(instance)
+    day = model._meta.get_field('date').to_python(instance.date)
+    amount = model._meta.get_field('amount').to_python(instance.amount)
+    category_id = instance.category_id if isinstance(instance, Expense) else None
+    return instance.user_id, month_start(day), category_id, amount
+
+
+def remember(instance):
+    # Record the state that is currently persisted so the next save can be
+    # turned into a "remove old bucket, add new bucket" delta.
+    instance._rollup_snapshot = snapshot(instance)
+
+
+def apply_delta(user_id, month, category_id, expense=ZERO, expense_count=0, income=ZERO, income_count=0):
+    if not (expense or expense_count or income or income_count):
+        return
+    rows = MonthlyRollup.objects.filter(user_id=user_id, month=month, category_id=category_id)
+    changes = dict(
+        expense_total=F('expense_total') + expense,
+        expense_count=F('expense_count') + expense_count,
+        income_total=F('income_total') + income,
+        income_count=F('income_count') + income_count,
+    )
+    if rows.update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            MonthlyRollup.objects.create(
+                user_id=user_id,
+                month=month,
+                category_id=category_id,
+                expense_total=expense,
+                expense_count=expense_count,
+                income_total=income,
+                income_count=income_count,
+            )
+    except IntegrityError:
+        # Another request created the row between our update and insert.
+        rows.update(**changes)
+
+
+def _apply_instance(instance, bucket, sign):
+    user_id, month, category_id, amount = bucket
+    if isinstance(instance, Expense):
+        apply_delta(user_id, month, category_id, expense=sign * amount, expense_count=sign)
+    else:
+        apply_delta(user_id, month, category_id, income=sign * amount, income_count=sign)
+
+
+def load_snapshot(instance):
+    # Instances fetched by an update view already carry a snapshot; anything
+    # else saved over an existing row costs one lookup of the persisted state.
+    if instance._state.adding or hasattr(instance, '_rollup_snapshot'):
+        return
+    persisted = type(instance)._base_manager.filter(pk=instance.pk).first()
+    if persisted is not None:
+        instance._rollup_snapshot = snapshot(persisted)
+
+
+def record_save(instance, created):
+    """Apply a save to the rollups and return the months it touched."""
+    previous = None if created else getattr(instance, '_rollup_snapshot', None)
+    current = snapshot(instance)
+    instance._rollup_snapshot = current
+    if previous == current:
+        return set()
+    if previous is not None:
+        _apply_instance(instance, previous, -1)
+    _apply_instance(instance, current, 1)
+    return {bucket[1] for bucket in (previous, current) if bucket is not None}
+
+
+def record_delete(instance):
+    """Apply a delete to the rollups and return the month it touched."""
+    bucket = getattr(instance, '_rollup_snapshot', None) or snapshot(instance)
+    _apply_instance(instance, bucket, -1)
+    return bucket[1]
+
+
+def record_bulk(objects):
+    """
+    Apply freshly bulk-created transactions to the rollups.
+
+    `bulk_create` sends no signals, so callers that use it must report the new
+    rows here. Deltas are merged per bucket first, so a batch costs one update
+    per (user, month, category) rather than one per row. Returns the touched
+    months per user id.
+    """
+    deltas = defaultdict(lambda: [ZERO, 0, ZERO, 0])
+    for instance in objects:
+        user_id, month, category_id, amount = snapshot(instance)
+        delta = deltas[(user_id, month, category_id)]
+        if isinstance(instance, Expense):
+            delta[0] += amount
+            delta[1] += 1
+        else:
+            delta[2] += amount
+            delta[3] += 1
+        instance._rollup_snapshot = (user_id, month, category_id, amount)
+
+    touched = defaultdict(set)
+    for (user_id, month, category_id), (expense, expense_count, income, income_count) in deltas.items():
+        apply_delta(user_id, month, category_id, expense, expense_count, income, income_count)
+        touched[user_id].add(month)
+    return touched
+
+
+def fold_category(category):
+    """Move the totals of a category being deleted into the uncategorized row."""
+    for row in MonthlyRollup.objects.filter(category=category):
+        apply_delta(
+            row.user_id, row.month, None,
+            expense=row.expense_total, expense_count=row.expense_count,
+            income=row.income_total, income_count=row.income_count,
+        )
+
+
+def compute_expected(user=None):
+    """Recompute rollup totals from the raw Expense and Income tables."""
+    expected = defaultdict(lambda: [ZERO, 0, ZERO, 0])
+    expenses = Expense.objects.all()
+    incomes = Income.objects.all()
+    if user is not None:
+        expenses = expenses.filter(user=user)
+        incomes = incomes.filter(user=user)
+
+    grouped = expenses.annotate(month=TruncMonth('date')).values('user_id', 'month', 'category_id').annotate(
+        total=Sum('amount'), count=Count('id')
+    ).order_by()
+    for row in grouped:
+        bucket = expected[(row['user_id'], row['month'], row['category_id'])]
+        bucket[0], bucket[1] = row['total'].quantize(CENT), row['count']
+
+    grouped = incomes.annotate(month=TruncMonth('date')).values('user_id', 'month').annotate(
+        total=Sum('amount'), count=Count('id')
+    ).order_by()
+    for row in grouped:
+        bucket = expected[(row['user_id'], row['month'], None)]
+        bucket[2], bucket[3] = row['total'].quantize(CENT), row['count']
+
+    return expected
+
+
+def find_drift(user=None):
+    """Return a list of (key, stored, expected) tuples where the rollups disagree with the raw tables."""
+    expected = compute_expected(user)
+    stored = {}
+    rollups = MonthlyRollup.objects.all() if user is None else MonthlyRollup.objects.filter(user=user)
+    for row in rollups:
+        stored[(row.user_id, row.month, row.category_id)] = [
+            row.expense_total, row.expense_count, row.income_total, row.income_count,
+        ]
+
+    empty = [ZERO, 0, ZERO, 0]
+    drift = []
+    for key in sorted(set(expected) | set(stored), key=lambda k: (k[0], k[1], k[2] or 0)):
+        found, wanted = stored.get(key, empty), expected.get(key, empty)
+        if found != wanted:
+            drift.append((key, found, wanted))
+    return drift
+
+
+@transaction.atomic
+def rebuild(user=None):
+    """Replace the stored rollups with totals recomputed from the raw tables."""
+    expected = compute_expected(user)
+    rollups = MonthlyRollup.objects.all() if user is None else MonthlyRollup.objects.filter(user=user)
+    rollups.delete()
+    MonthlyRollup.objects.bulk_create(
+        [
+            MonthlyRollup(
+                user_id=user_id,
+                month=month,
+                category_id=category_id,
+                expense_total=totals[0],
+                expense_count=totals[1],
+                income_total=totals[2],
+                income_count=totals[3],
+            )
+            for (user_id, month, category_id), totals in expected.items()
+        ],
+        batch_size=1000,
+    )
+    return len(expected)
@@ -0,0 +1,125 @@
+"""
+Full-text search over transaction descriptions and category names.
+
+Descriptions are indexed by the database (migration 0008): an FTS5 table per
+transaction table kept in sync by triggers on SQLite, a GIN index over
+`to_tsvector('simple', description)` on PostgreSQL. Every word of the query
+is matched as a prefix, so "groc sup" finds "Grocery supplies", and the most
+recently added RANK_WINDOW matches are ordered by relevance (bm25 / ts_rank),
+then newest first.
+
+Category names are few per user, so the user's cached effective categories
+are matched in Python; expenses in a matching category follow the description
+matches, newest first. On other backends descriptions fall back to an
+unindexed `icontains` scan.
+
+Django rebuilds SQLite tables for some schema changes, which drops their
+triggers: a migration that does so on Expense or Income must re-create them.
+"""
+import re
+from dataclasses import dataclass, field
+from functools import reduce
+from operator import and_
+
+from django.db import connection
+from django.db.models import Q
+
+from .categories import effective_categories
+from .models import Expense, Income
+
+MAX_TERMS = 8
+DEFAULT_LIMIT = 50
+# Only the most recently added matches are ranked, which keeps very common
+# words from forcing a relevance score for every row in the ledger.
+RANK_WINDOW = 1000
+
+
+@dataclass
+class SearchResults:
+    expenses: list = field(default_factory=list)
+    incomes: list = field(default_factory=list)
+    categories: list = field(default_factory=list)
+
+
+def terms(text):
+    """Split the query into lowercase words, dropping punctuation the match syntaxes would choke on."""
+    return re.findall(r'[^\W_]+', text.lower())[:MAX_TERMS]
+
+
+def _sqlite_ids(table, words, user_id, limit):
+    index = f'{table}_search'
+    match = ' '.join(f'"{word}"*' for word in words)
+    user_filter = 't.user_id = %s AND ' if user_id is not None else ''
+    # FTS5 walks its index in rowid order and stops after RANK_WINDOW rows, so
+    # bm25 is only computed for those however common the words are.
+    sql = (
+        f'SELECT id FROM ('
+        f'SELECT t.id AS id, t.date AS date, bm25({index}) AS score FROM {index} JOIN {table} t ON t.id = {index}.rowid '
+        f'WHERE {user_filter}{index} MATCH %s ORDER BY {index}.rowid DESC LIMIT %s'
+        f') ORDER BY score, date DESC, id DESC LIMIT %s'
+    )
+    params = ([user_id] if user_id is not None else []) + [match, RANK_WINDOW, limit]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _postgresql_ids(table, words, user_id, limit):
+    # The vector expression must stay identical to the one in the GIN index.
+    vector = "to_tsvector('simple', coalesce({}.description, ''))"
+    match = ' & '.join(f'{word}:*' for word in words)
+    user_filter = 't.user_id = %s AND ' if user_id is not None else ''
+    sql = (
+        f'SELECT c.id FROM ('
+        f"SELECT t.id, t.date, t.description FROM {table} t, to_tsquery('simple', %s) query "
+        f'WHERE {user_filter}{vector.format("t")} @@ query ORDER BY t.id DESC LIMIT %s'
+        f") c, to_tsquery('simple', %s) query "
+        f'ORDER BY ts_rank({vector.format("c")}, query) DESC, c.date DESC, c.id DESC LIMIT %s'
+    )
+    params = [match] + ([user_id] if user_id is not None else []) + [RANK_WINDOW, match, limit]
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def matching_ids(model, words, user_id=None, limit=DEFAULT_LIMIT):
+    """Ids of `model` rows whose description matches every word as a prefix, best match first."""
+    table = model._meta.db_table
+    if connection.vendor == 'sqlite':
+        return _sqlite_ids(table, words, user_id, limit)
+    if connection.vendor == 'postgresql':
+        return _postgresql_ids(table, words, user_id, limit)
+    queryset = model.objects.filter(reduce(and_, (Q(description__icontains=word) for word in words)))
+    if user_id is not None:
+        queryset = queryset.filter(user_id=user_id)
+    return list(queryset.order_by('-date', '-pk').values_list('pk', flat=True)[:limit])
+
+
+def _in_order(queryset, ids):
+    by_id = queryset.in_bulk(ids)
+    return [by_id[pk] for pk in ids if pk in by_id]
+
+
+def category_matches(name, words):
+    name_words = terms(name)
+    return all(any(candidate.startswith(word) for candidate in name_words) for word in words)
+
+
+def search(user, text, limit=DEFAULT_LIMIT):
+    words = terms(text)
+    results = SearchResults()
+    if not words:
+        return results
+
+    results.categories = [
+        category for name, category in effective_categories(user.pk).items() if category_matches(name, words)
+    ]
+
+    expense_ids = matching_ids(Expense, words, user.pk, limit)
+    if results.categories and len(expense_ids) < limit:
+        expense_ids += Expense.objects.filter(
+            user=user, category__in=results.categories
+        ).exclude(pk__in=expense_ids).order_by('-date', '-pk').values_list('pk', flat=True)[:limit - len(expense_ids)]
+    results.expenses = _in_order(Expense.objects.select_related('category'), expense_ids)
+    results.incomes = _in_order(Income.objects.all(), matching_ids(Income, words, user.pk, limit))
+    return results
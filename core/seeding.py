@@ -0,0 +1,119 @@
+"""
+Synthetic ledgers for demos, load tests and benchmarks.
+
+`seed_user` fills one user's ledger with expenses whose category mix and
+amounts roughly follow real spending: a few categories (groceries,
+transportation) take most transactions, amounts are log-normal around a
+per-category median and dates are spread over the last two years. It adds
+twice-monthly salaries, budgets for the current month and a few savings goals.
+
+Every user gets its own random generator seeded from `(seed, index)`, so the
+same seed always produces the same data no matter how users are spread over
+worker processes. Rows are generated in date order one batch at a time and
+written through `ledger.bulk_create_transactions`, so each batch touches only
+a few monthly rollup rows and memory stays flat however large the ledger is.
+"""
+import math
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from .categories import load_definitions, provision_defaults
+from .ledger import bulk_create_transactions
+from .models import Budget, Category, Expense, Income, SavingsContribution, SavingsGoal
+
+# (name, share of transactions, median amount)
+CATEGORY_PROFILE = (
+    ('Groceries', 0.30, 45),
+    ('Transportation', 0.18, 20),
+    ('Entertainment', 0.12, 30),
+    ('Utilities', 0.08, 90),
+    ('Clothing', 0.08, 60),
+    ('Healthcare', 0.06, 80),
+    ('Housing', 0.04, 1200),
+    ('Savings', 0.04, 200),
+    ('Miscellaneous', 0.10, 25),
+)
+HISTORY_DAYS = 730
+BATCH_SIZE = 5000
+
+
+def default_categories():
+    """Return the shared categories used by the generator, creating missing ones."""
+    names = [name for name, _, _ in CATEGORY_PROFILE]
+    provision_defaults({name: '' for name in names} | load_definitions())
+    by_name = {category.name: category for category in Category.objects.filter(user=None, name__in=names)}
+    return [by_name[name] for name in names]
+
+
+def _amount(rng, median):
+    value = math.exp(rng.gauss(math.log(median), 0.6))
+    return Decimal(f'{min(value, 99999):.2f}')
+
+
+def _month_bounds(day):
+    start = day.replace(day=1)
+    end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return start, end
+
+
+def seed_user(user_id, index, expenses, seed=0, today=None, categories=None, batch_size=BATCH_SIZE):
+    """
+    Generate the ledger of one existing user and return the number of expenses
+    written. `index` is the user's position in the seeded set and, with `seed`,
+    picks its random generator.
+    """
+    rng = random.Random(f'{seed}:{index}')
+    today = today or date.today()
+    first_day = today - timedelta(days=HISTORY_DAYS)
+    categories = categories or default_categories()
+    weights = [share for _, share, _ in CATEGORY_PROFILE]
+    medians = {category.pk: median for category, (_, _, median) in zip(categories, CATEGORY_PROFILE)}
+
+    batches = math.ceil(expenses / batch_size)
+    days = HISTORY_DAYS + 1
+    for batch in range(batches):
+        size = min(batch_size, expenses - batch * batch_size)
+        # Each batch covers its own slice of the history, so the rollup update
+        # after it touches a handful of months instead of all of them.
+        low = batch * days // batches
+        high = max(low, (batch + 1) * days // batches - 1)
+        offsets = sorted(rng.randint(low, high) for _ in range(size))
+        chosen = rng.choices(categories, weights=weights, k=size)
+        bulk_create_transactions(expenses=[
+            Expense(
+                user_id=user_id,
+                amount=_amount(rng, medians[category.pk]),
+                category=category,
+                description=f'{category.name} #{rng.randint(1, 10 ** 6)}',
+                date=first_day + timedelta(days=offset),
+            )
+            for offset, category in zip(offsets, chosen)
+        ], batch_size=size)
+
+    incomes = []
+    day = first_day.replace(day=1)
+    while day <= today:
+        for payday in (1, 15):
+            incomes.append(Income(user_id=user_id, amount=_amount(rng, 2500), description='Salary', date=day.replace(day=payday)))
+        day = (day + timedelta(days=32)).replace(day=1)
+    bulk_create_transactions(incomes=incomes)
+
+    month_start, month_end = _month_bounds(today)
+    Budget.objects.bulk_create([
+        Budget(user_id=user_id, category=category, amount=Decimal(medians[category.pk] * 10),
+               start_date=month_start, end_date=month_end)
+        for category in rng.sample(categories, 5)
+    ])
+    goals = SavingsGoal.objects.bulk_create([
+        SavingsGoal(user_id=user_id, goal_name=f'Goal {number}', target_amount=Decimal(rng.randint(500, 20000)),
+                    current_amount=Decimal(rng.randint(0, 500)),
+                    deadline=today + timedelta(days=rng.randint(-30, 720)))
+        for number in range(3)
+    ])
+    # bulk_create skips the signals, so the running totals are set directly above
+    SavingsContribution.objects.bulk_create([
+        SavingsContribution(goal=goal, amount=goal.current_amount, date=today, note='Opening balance')
+        for goal in goals if goal.current_amount
+    ])
+    return expenses
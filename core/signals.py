@@ -0,0 +1,108 @@
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from . import caching, rollups
+from .models import Budget, CategorizationRule, Category, Expense, Income, SavingsContribution, SavingsGoal, User
+
+
+@receiver(pre_save, sender=Expense)
+@receiver(pre_save, sender=Income)
+def capture_persisted_transaction(sender, instance, raw=False, **kwargs):
+    if not raw:
+        rollups.load_snapshot(instance)
+
+
+@receiver(post_save, sender=Expense)
+@receiver(post_save, sender=Income)
+def update_rollups_on_save(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        months = rollups.record_save(instance, created)
+        caching.invalidate_months(instance.user_id, months)
+
+
+@receiver(post_delete, sender=Expense)
+@receiver(post_delete, sender=Income)
+def update_rollups_on_delete(sender, instance, origin=None, **kwargs):
+    # When the delete cascades from a User the user's rollups are removed by the
+    # same cascade, so there is nothing to keep in sync.
+    origin_model = getattr(origin, 'model', type(origin))
+    if origin is None or origin_model in (Expense, Income):
+        month = rollups.record_delete(instance)
+        caching.invalidate_months(instance.user_id, [month])
+
+
+@receiver(pre_delete, sender=Category)
+def fold_rollups_of_deleted_category(sender, instance, **kwargs):
+    # Expenses of a deleted category become uncategorized (SET_NULL) through a
+    # bulk UPDATE that fires no Expense signals, so move their totals here.
+    rollups.fold_category(instance)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_dashboards_on_category_change(sender, instance, **kwargs):
+    # Category names appear on every month of the dashboard.
+    if instance.user_id is None:
+        caching.invalidate_all()
+    else:
+        caching.invalidate_user(instance.user_id)
+
+
+@receiver(post_save, sender=CategorizationRule)
+@receiver(post_delete, sender=CategorizationRule)
+def invalidate_rules_on_change(sender, instance, **kwargs):
+    # Also sent for the rules of a deleted category, which cascade one by one
+    # because of this receiver.
+    caching.invalidate_rules(instance.user_id)
+
+
+@receiver(post_save, sender=Budget)
+@receiver(post_delete, sender=Budget)
+@receiver(post_save, sender=SavingsGoal)
+@receiver(post_delete, sender=SavingsGoal)
+def invalidate_dashboards_on_user_change(sender, instance, **kwargs):
+    # Budgets and savings goals are listed on every month of the dashboard.
+    caching.invalidate_user(instance.user_id)
+
+
+def _add_to_goal(contribution, amount):
+    # A single UPDATE ... SET current_amount = current_amount + x, so concurrent
+    # contributions to the same goal cannot overwrite each other.
+    SavingsGoal.objects.filter(pk=contribution.goal_id).update(current_amount=F('current_amount') + amount)
+    caching.invalidate_user(contribution.goal.user_id)
+
+
+@receiver(pre_save, sender=SavingsContribution)
+def capture_persisted_contribution(sender, instance, raw=False, **kwargs):
+    if not raw and instance.pk is not None and not instance._state.adding:
+        instance._persisted_amount = sender.objects.filter(pk=instance.pk).values_list('amount', flat=True).first()
+
+
+@receiver(post_save, sender=SavingsContribution)
+def update_goal_on_contribution(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        delta = instance.amount
+    else:
+        delta = instance.amount - getattr(instance, '_persisted_amount', instance.amount)
+    if delta:
+        _add_to_goal(instance, delta)
+    instance._persisted_amount = instance.amount
+
+
+@receiver(post_delete, sender=SavingsContribution)
+def update_goal_on_contribution_delete(sender, instance, origin=None, **kwargs):
+    # Skip deletes cascading from the goal or its user: the goal goes too.
+    origin_model = getattr(origin, 'model', type(origin))
+    if origin is None or origin_model is SavingsContribution:
+        _add_to_goal(instance, -instance.amount)
+
+
+@receiver(post_save, sender=User)
+def reset_dashboards_of_new_user(sender, instance, created, **kwargs):
+    # Some databases reuse primary keys, so never let a new account see entries
+    # cached for a deleted one.
+    if created:
+        caching.invalidate_user(instance.pk)
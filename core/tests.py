@@ -1,10 +1,33 @@
-from django.test import TestCase, Client
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
+from django.utils import timezone
 from django.contrib.auth import get_user_model
 from datetime import date, timedelta, datetime
 from django.db.models import Sum
-
-from core.models import User, Expense, Income, Category, Budget, SavingsGoal
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.http import StreamingHttpResponse
+from decimal import Decimal
+import csv
+import json
+from io import BytesIO, StringIO
+from tempfile import NamedTemporaryFile
+import os
+import time
+from unittest import mock, skipUnless
+
+from core.models import ApiToken, CategorizationRule, User, Expense, Income, Category, Budget, SavingsGoal, SavingsContribution, MonthlyRollup, RecurringTransaction
+from core import rollups, views
+from core.categories import effective_categories, load_definitions, provision_defaults
+from core.categorization import RuleSet, categorize, rules_for
+from core.forms import CategorizationRuleForm, ExpenseForm, RecurringTransactionForm
+from core.importers import import_transactions
+from core.instrumentation import QueryInstrumentationMiddleware, QueryRecorder, stats as request_stats
+from core.utils import month_filter, month_window
 
 
 class DashboardViewTests(TestCase):
@@ -86,6 +109,15 @@ class DashboardViewTests(TestCase):
         self.assertContains(response, "200.00")
         self.assertContains(response, "100.00")
 
+    def test_month_outside_the_calendar_shows_the_current_month(self):
+        today = timezone.now()
+        for query in ('?month=13&year=2024', '?month=0', '?month=12&year=9999', '?month=1&year=0'):
+            response = self.client.get(reverse('core:dashboard') + query)
+            self.assertEqual(response.status_code, 200, query)
+            self.assertEqual(
+                (response.context['selected_month'], response.context['selected_year']), (today.month, today.year), query
+            )
+
     def test_dashboard_unauthenticated_redirect(self):
         self.client.logout()
         response = self.client.get(reverse('core:dashboard'))
@@ -322,6 +354,301 @@ class CategoryModelTest(TestCase):
             Category.objects.get(pk=self.user_category.id)
 
 
+class EffectiveCategoryCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', email='testuser@example.com', password='password123')
+        self.client.login(username='testuser', password='password123')
+        # Only this test's categories, not the defaults created by migrate
+        Category.objects.filter(user=None).delete()
+        self.food = Category.objects.create(name='Food', user=None, description='Shared food')
+        Category.objects.create(name='Rent', user=None)
+        self.own_food = Category.objects.create(name='Food', user=self.user, description='Mine')
+
+    def test_user_categories_shadow_defaults(self):
+        categories = effective_categories(self.user.pk)
+        self.assertEqual(list(categories), ['Food', 'Rent'])
+        self.assertEqual(categories['Food'], self.own_food)
+        self.assertEqual(categories['Rent'].user_id, None)
+
+    def test_cached_until_a_category_changes(self):
+        effective_categories(self.user.pk)
+        with self.assertNumQueries(0):
+            effective_categories(self.user.pk)
+
+        Category.objects.create(name='Travel', user=None)
+        self.assertIn('Travel', effective_categories(self.user.pk))
+        self.own_food.delete()
+        self.assertEqual(effective_categories(self.user.pk)['Food'], self.food)
+
+    def test_list_view_reads_the_cache(self):
+        self.client.get(reverse('core:category_list'))
+        # Session and user only
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('core:category_list'))
+        self.assertContains(response, 'Mine')
+        self.assertNotContains(response, 'Shared food')
+
+    def test_create_rejects_default_name_without_querying(self):
+        effective_categories(self.user.pk)
+        with self.assertNumQueries(2):
+            response = self.client.post(reverse('core:category_create'), {'name': 'Rent', 'description': ''})
+        self.assertContains(response, "This name is reserved for a default category.")
+
+    def test_import_resolves_through_the_cache(self):
+        rows = 'date,amount,description,category\n2024-11-01,-5.00,Sandwich,food\n2024-11-02,-900,November,Rent\n'
+        import_transactions(self.user, BytesIO(rows.encode()))
+        self.assertEqual(
+            list(Expense.objects.order_by('date').values_list('category_id', flat=True)),
+            [self.own_food.pk, Category.objects.get(name='Rent').pk],
+        )
+
+
+class DefaultCategoryProvisioningTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', email='testuser@example.com', password='password123')
+
+    def test_migrate_provisions_the_bundled_defaults(self):
+        definitions = load_definitions()
+        self.assertEqual(
+            dict(Category.objects.filter(user=None).values_list('name', 'description')), definitions
+        )
+        self.assertEqual(provision_defaults(), (0, 0))
+
+    def test_provisions_in_a_bounded_number_of_queries(self):
+        Category.objects.filter(user=None).delete()
+        definitions = {f'Category {index}': f'Description {index}' for index in range(50)}
+        Category.objects.create(user=self.user, name='Category 1', description='Mine')
+        # Savepoint, select, insert, release
+        with self.assertNumQueries(4):
+            self.assertEqual(provision_defaults(definitions), (50, 0))
+        self.assertEqual(Category.objects.filter(user=None).count(), 50)
+        self.assertEqual(Category.objects.get(user=self.user).description, 'Mine')
+
+    def test_updates_changed_descriptions_and_invalidates_the_cache(self):
+        effective_categories(self.user.pk)
+        definitions = load_definitions() | {'Groceries': 'Food and household supplies', 'Gifts': ''}
+        self.assertEqual(provision_defaults(definitions), (1, 1))
+        categories = effective_categories(self.user.pk)
+        self.assertEqual(categories['Groceries'].description, 'Food and household supplies')
+        self.assertIn('Gifts', categories)
+
+    def test_command_reads_another_file(self):
+        with NamedTemporaryFile('w', suffix='.json', delete=False) as data:
+            json.dump([{'name': 'Pets', 'description': 'Food and vet'}, {'name': 'Groceries'}], data)
+        self.addCleanup(os.remove, data.name)
+        out = StringIO()
+        call_command('add_default_categories', '--file', data.name, stdout=out)
+        self.assertIn('1 default categories created, 1 updated, 0 unchanged', out.getvalue())
+        self.assertEqual(Category.objects.get(user=None, name='Groceries').description, '')
+
+    def test_command_rejects_an_unreadable_file(self):
+        with self.assertRaises(CommandError):
+            call_command('add_default_categories', '--file', 'missing.json', stdout=StringIO())
+
+
+class ExpenseFormCategoryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', email='testuser@example.com', password='password123')
+        self.other = User.objects.create_user(username='otheruser', email='otheruser@example.com', password='password456')
+        self.client.login(username='testuser', password='password123')
+        # Only this test's categories, not the defaults created by migrate
+        Category.objects.filter(user=None).delete()
+        self.default = Category.objects.create(name='Transport', user=None)
+        self.own = Category.objects.create(name='Groceries', user=self.user)
+        self.foreign = Category.objects.create(name='Private', user=self.other)
+
+    def test_choices_are_the_users_effective_categories(self):
+        form = ExpenseForm(user=self.user)
+        self.assertEqual([label for value, label in form.fields['category'].choices][1:], ['Groceries', 'Transport'])
+
+    def test_render_does_not_query_categories_once_cached(self):
+        self.client.get(reverse('core:expense_create'))
+        # Session and user only
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('core:expense_create'))
+        self.assertContains(response, 'Groceries')
+        self.assertNotContains(response, 'Private')
+
+    def test_other_users_category_is_rejected(self):
+        response = self.client.post(reverse('core:expense_create'), {
+            'amount': 10, 'category': self.foreign.pk, 'description': 'Sneaky', 'date': '2024-11-05',
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('category', response.context['form'].errors)
+        self.assertFalse(Expense.objects.exists())
+
+    def test_shadowed_category_stays_selectable_on_existing_rows(self):
+        expense = Expense.objects.create(user=self.user, amount=5, category=self.default, date=date(2024, 11, 5))
+        Category.objects.create(name='Transport', user=self.user)
+        form = ExpenseForm(user=self.user, instance=expense)
+        self.assertIn(self.default.pk, [value for value, label in form.fields['category'].choices])
+
+    def test_recurring_form_uses_the_same_choices(self):
+        form = RecurringTransactionForm(user=self.user)
+        self.assertNotIn(self.foreign.pk, [value for value, label in form.fields['category'].choices])
+        self.assertFalse(form.fields['category'].required)
+
+
+class CategorizationRuleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', email='testuser@example.com', password='password123')
+        self.other = User.objects.create_user(username='otheruser', email='otheruser@example.com', password='password456')
+        self.client.login(username='testuser', password='password123')
+        self.groceries = Category.objects.get(user=None, name='Groceries')
+        self.transport = Category.objects.get(user=None, name='Transportation')
+        self.dining = Category.objects.create(user=self.user, name='Dining')
+
+    def add_rule(self, pattern, category, **fields):
+        return CategorizationRule.objects.create(user=self.user, pattern=pattern, category=category, **fields)
+
+    def test_first_rule_by_priority_wins(self):
+        rule_set = RuleSet([
+            (1, CategorizationRule.CONTAINS, 'uber eats', None, None),
+            (2, CategorizationRule.STARTS_WITH, 'uber', None, None),
+            (3, CategorizationRule.CONTAINS, 'a.b', None, None),
+        ])
+        self.assertEqual(rule_set.match('Dinner - UBER EATS'), 1)
+        self.assertEqual(rule_set.match('UBER trip to uber eats'), 1)
+        self.assertEqual(rule_set.match('Uber *Trip'), 2)
+        self.assertEqual(rule_set.match('Suburban'), None)
+        # Patterns are literal text
+        self.assertEqual(rule_set.match('axb'), None)
+        self.assertEqual(rule_set.match('pay a.b'), 3)
+        self.assertEqual(rule_set.match(None), None)
+
+    def test_anchors_and_wildcards(self):
+        rule_set = RuleSet([
+            (1, CategorizationRule.STARTS_WITH, 'amzn*mktp', None, None),
+            (2, CategorizationRule.ENDS_WITH, 'coffee*', None, None),
+            (3, CategorizationRule.ENDS_WITH, 'gas*station', None, None),
+            (4, CategorizationRule.CONTAINS, 'city*parking*meter', None, None),
+        ])
+        self.assertEqual(rule_set.match('AMZN Mktp US*2X3'), 1)
+        self.assertEqual(rule_set.match('Refund AMZN Mktp'), None)
+        self.assertEqual(rule_set.match('Corner Coffee #12'), 2)
+        self.assertEqual(rule_set.match('Gas Station gas and station'), 3)
+        self.assertEqual(rule_set.match('Gas Station 42'), None)
+        self.assertEqual(rule_set.match('CITY OF X PARKING - METER 9'), 4)
+        self.assertEqual(rule_set.match('meter parking city'), None)
+
+    def test_matching_time_is_bounded(self):
+        # Nested wildcards against a long near-miss would backtrack
+        # exponentially with user-written regular expressions.
+        rule_set = RuleSet([(1, CategorizationRule.ENDS_WITH, 'a*a*a*a*a*b', None, None)])
+        started = time.perf_counter()
+        self.assertIsNone(rule_set.match('a' * 250 + 'c'))
+        self.assertIsNone(rule_set.match('a' * 100000 + 'b'))  # only the beginning is matched
+        self.assertLess(time.perf_counter() - started, 1)
+        self.assertEqual(rule_set.match('aaaaab'), 1)
+
+    def test_amount_ranges(self):
+        rule_set = RuleSet([
+            (1, CategorizationRule.CONTAINS, 'shell', Decimal('40'), None),
+            (2, CategorizationRule.CONTAINS, 'shell', None, Decimal('10')),
+            (3, CategorizationRule.CONTAINS, '', Decimal('1000'), Decimal('2000')),
+        ])
+        self.assertEqual(rule_set.match('SHELL 123', Decimal('40')), 1)
+        self.assertEqual(rule_set.match('SHELL 123', Decimal('10')), 2)
+        self.assertEqual(rule_set.match('SHELL 123', Decimal('25')), None)
+        self.assertEqual(rule_set.match('SHELL 123', None), None)
+        self.assertEqual(rule_set.match('Landlord', Decimal('2000')), 3)
+        self.assertEqual(rule_set.match('Landlord', Decimal('2000.01')), None)
+
+    def test_rules_without_pattern_match_any_description(self):
+        rule_set = RuleSet([
+            (1, CategorizationRule.CONTAINS, 'rent', None, None),
+            (2, CategorizationRule.CONTAINS, '*', None, None),
+            (3, CategorizationRule.CONTAINS, 'uber', None, None),
+        ])
+        self.assertEqual(rule_set.match('Uber to the rent office'), 1)
+        self.assertEqual(rule_set.match('Uber'), 2)
+        self.assertEqual(rule_set.match(''), 2)
+        # Kept out of the expression, which only has the rules before them
+        expression, categories, fallback = rule_set._matchers[None]
+        self.assertEqual((expression.groups, categories, fallback), (1, {1: 1}, 2))
+
+    def test_rules_are_cached_until_they_change(self):
+        rule = self.add_rule('uber', self.transport)
+        rules_for(self.user.pk)
+        with self.assertNumQueries(0):
+            rule_set = rules_for(self.user.pk)
+        self.assertEqual(rule_set.match('Uber'), self.transport.pk)
+
+        rule.category = self.dining
+        rule.save()
+        self.assertEqual(rules_for(self.user.pk).match('Uber'), self.dining.pk)
+        self.dining.delete()
+        self.assertFalse(rules_for(self.user.pk))
+
+    def test_categorize_fills_only_blank_categories(self):
+        self.add_rule('market', self.groceries)
+        expenses = [
+            Expense(user=self.user, amount=5, description='Farmers market'),
+            Expense(user=self.user, amount=5, description='Market', category=self.dining),
+            Expense(user=self.user, amount=5, description='Cinema'),
+        ]
+        self.assertEqual(categorize(self.user.pk, expenses), 1)
+        self.assertEqual([expense.category_id for expense in expenses], [self.groceries.pk, self.dining.pk, None])
+        self.assertEqual(categorize(self.other.pk, [Expense(user=self.other, amount=5, description='Market')]), 0)
+
+    def test_import_applies_saved_rules_after_the_category_column(self):
+        self.add_rule('metro', self.transport)
+        self.add_rule('', self.dining, max_amount=20)
+        rows = (
+            'date,amount,description,category\n'
+            '2024-11-01,-2.50,METRO CARD,\n'
+            '2024-11-02,-12.00,Corner Bistro,\n'
+            '2024-11-03,-3.00,Metro snacks,groceries\n'
+            '2024-11-04,-80.00,Hardware store,\n'
+        )
+        import_transactions(self.user, BytesIO(rows.encode()), rules=[('hardware', 'Dining')])
+        self.assertEqual(
+            list(Expense.objects.order_by('date').values_list('category_id', flat=True)),
+            [self.transport.pk, self.dining.pk, self.groceries.pk, self.dining.pk],
+        )
+
+    def test_new_expense_without_category_uses_the_rules(self):
+        self.add_rule('bistro', self.dining)
+        self.client.post(reverse('core:expense_create'), {
+            'amount': 12, 'category': '', 'description': 'Corner Bistro', 'date': '2024-11-05',
+        })
+        self.client.post(reverse('core:expense_create'), {
+            'amount': 12, 'category': self.groceries.pk, 'description': 'Bistro supplies', 'date': '2024-11-05',
+        })
+        self.assertEqual(
+            list(Expense.objects.order_by('pk').values_list('category_id', flat=True)), [self.dining.pk, self.groceries.pk]
+        )
+        self.assertFalse(rollups.find_drift(self.user))
+
+    def test_form_validates_rules(self):
+        data = {'priority': 1, 'match_type': CategorizationRule.CONTAINS, 'category': self.dining.pk}
+        form = CategorizationRuleForm({**data, 'pattern': '', 'min_amount': 5, 'max_amount': 1}, user=self.user)
+        self.assertIn('max_amount', form.errors)
+        for pattern in ('', '**'):
+            form = CategorizationRuleForm({**data, 'pattern': pattern}, user=self.user)
+            self.assertFalse(form.is_valid(), pattern)
+        form = CategorizationRuleForm({**data, 'match_type': 'regex', 'pattern': '(a+)+$'}, user=self.user)
+        self.assertIn('match_type', form.errors)
+        form = CategorizationRuleForm({**data, 'pattern': '(a+)+$'}, user=self.user)
+        self.assertTrue(form.is_valid(), form.errors)
+
+    def test_views_are_limited_to_the_owner(self):
+        response = self.client.post(reverse('core:rule_create'), {
+            'priority': 10, 'match_type': CategorizationRule.CONTAINS, 'pattern': 'uber', 'category': self.transport.pk,
+        })
+        self.assertRedirects(response, reverse('core:rule_list'))
+        rule = CategorizationRule.objects.get(user=self.user)
+        self.assertContains(self.client.get(reverse('core:rule_list')), 'uber')
+        foreign = CategorizationRule.objects.create(user=self.other, pattern='x', category=self.groceries)
+        self.assertEqual(self.client.get(reverse('core:rule_update', args=[foreign.pk])).status_code, 404)
+        self.client.post(reverse('core:rule_delete', args=[rule.pk]))
+        self.assertFalse(CategorizationRule.objects.filter(user=self.user).exists())
+
+
 class BudgetModelTest(TestCase):
 
     def setUp(self):
@@ -513,4 +840,1219 @@ class SavingsGoalModelTest(TestCase):
 
         self.assertContains(response, "30 days to go")
         self.assertContains(response, "60 days to go")
-        
\ No newline at end of file
+        
+
+class SavingsContributionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', password='password123', email='testuser@example.com')
+        self.client.login(username='testuser', password='password123')
+        self.goal = SavingsGoal.objects.create(
+            user=self.user, goal_name='Vacation', target_amount=1000, deadline=date.today() + timedelta(days=30)
+        )
+
+    def test_contributions_keep_running_total(self):
+        first = SavingsContribution.objects.create(goal=self.goal, amount=Decimal('100.00'))
+        SavingsContribution.objects.create(goal=self.goal, amount=Decimal('50.50'))
+        first.amount = Decimal('80.00')
+        first.save()
+        self.goal.refresh_from_db()
+        self.assertEqual(self.goal.current_amount, Decimal('130.50'))
+
+        first.delete()
+        self.goal.refresh_from_db()
+        self.assertEqual(self.goal.current_amount, Decimal('50.50'))
+
+    def test_stale_instances_do_not_lose_updates(self):
+        # Both contributions hold the goal as it was before either was saved
+        stale = SavingsGoal.objects.get(pk=self.goal.pk)
+        SavingsContribution.objects.create(goal=self.goal, amount=Decimal('10.00'))
+        SavingsContribution.objects.create(goal=stale, amount=Decimal('20.00'))
+        self.goal.refresh_from_db()
+        self.assertEqual(self.goal.current_amount, Decimal('30.00'))
+
+    def test_progress_is_annotated_in_sql(self):
+        today = date.today()
+        SavingsContribution.objects.create(goal=self.goal, amount=Decimal('250.00'))
+        achieved = SavingsGoal.objects.create(user=self.user, goal_name='Done', target_amount=100, deadline=today)
+        SavingsContribution.objects.create(goal=achieved, amount=Decimal('150.00'))
+        overdue = SavingsGoal.objects.create(
+            user=self.user, goal_name='Late', target_amount=300, deadline=today - timedelta(days=2)
+        )
+
+        goals = {goal.goal_name: goal for goal in SavingsGoal.objects.with_progress(today)}
+        self.assertEqual(goals['Vacation'].percentage_achieved, 25.0)
+        self.assertEqual(goals['Vacation'].amount_to_goal, Decimal('750.00'))
+        self.assertEqual(goals['Vacation'].days_to_deadline, 30)
+        self.assertEqual(goals['Vacation'].status, 'on_track')
+        self.assertEqual(goals['Done'].percentage_achieved, 150.0)
+        self.assertEqual(goals['Done'].status, 'achieved')
+        self.assertEqual(goals['Late'].days_to_deadline, -2)
+        self.assertEqual(goals['Late'].status, 'overdue')
+        self.assertEqual(goals[overdue.goal_name].percentage_achieved, 0)
+
+    def test_list_needs_one_query_for_any_number_of_goals(self):
+        SavingsGoal.objects.bulk_create([
+            SavingsGoal(user=self.user, goal_name=f'Goal {index}', target_amount=100, current_amount=index,
+                        deadline=date.today() + timedelta(days=index))
+            for index in range(1, 50)
+        ])
+        # Session, user and the goals themselves
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('core:savings_goal_list'))
+        self.assertContains(response, '49.00%')
+        self.assertContains(response, '30 days to go')
+
+    def test_create_goal_records_opening_balance(self):
+        self.client.post(reverse('core:savings_goal_create'), {
+            'goal_name': 'Car', 'target_amount': 5000, 'current_amount': 400, 'deadline': date.today() + timedelta(days=90),
+        })
+        goal = SavingsGoal.objects.get(goal_name='Car')
+        self.assertEqual(goal.current_amount, 400)
+        self.assertEqual(list(goal.contributions.values_list('amount', 'note')), [(400, 'Opening balance')])
+
+    def test_edit_keeps_contributions_made_while_the_form_was_open(self):
+        url = reverse('core:savings_goal_update', args=[self.goal.pk])
+        SavingsContribution.objects.create(goal=self.goal, amount=Decimal('100.00'))
+        response = self.client.get(url)
+        self.assertEqual(response.context['form']['shown_amount'].value(), Decimal('100.00'))
+
+        SavingsContribution.objects.create(goal=self.goal, amount=Decimal('50.00'))
+        data = {'goal_name': 'Trip', 'target_amount': 1000, 'deadline': self.goal.deadline, 'shown_amount': '100.00'}
+        self.client.post(url, {**data, 'current_amount': '100.00'})
+        self.goal.refresh_from_db()
+        self.assertEqual(self.goal.goal_name, 'Trip')
+        self.assertEqual(self.goal.current_amount, Decimal('150.00'))
+        self.assertFalse(self.goal.contributions.filter(note='Adjustment').exists())
+
+        # A changed total only adds the difference to what the user saw
+        self.client.post(url, {**data, 'current_amount': '130.00'})
+        self.goal.refresh_from_db()
+        self.assertEqual(self.goal.current_amount, Decimal('180.00'))
+
+    def test_contribute_view(self):
+        url = reverse('core:savings_contribution_create', args=[self.goal.pk])
+        response = self.client.post(url, {'amount': '75.25', 'date': date.today(), 'note': 'Bonus'})
+        self.assertRedirects(response, reverse('core:savings_goal_list'))
+        self.goal.refresh_from_db()
+        self.assertEqual(self.goal.current_amount, Decimal('75.25'))
+        self.assertContains(self.client.get(url), 'Bonus')
+
+        other = User.objects.create_user(username='otheruser', password='password456', email='otheruser@example.com')
+        self.client.force_login(other)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class MonthlyRollupTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', email='testuser@example.com', password='password123')
+        self.food = Category.objects.create(user=self.user, name='Food')
+        self.rent = Category.objects.create(user=self.user, name='Rent')
+
+    def rollup(self, month, category=None):
+        return MonthlyRollup.objects.get(user=self.user, month=month, category=category)
+
+    def test_create_update_and_delete_keep_rollups_in_sync(self):
+        expense = Expense.objects.create(user=self.user, amount=40, category=self.food, date=date(2024, 11, 5))
+        Expense.objects.create(user=self.user, amount=60, category=self.food, date=date(2024, 11, 9))
+        self.assertEqual(self.rollup(date(2024, 11, 1), self.food).expense_total, 100)
+
+        expense.amount = 10
+        expense.category = self.rent
+        expense.date = date(2024, 12, 2)
+        expense.save()
+        self.assertEqual(self.rollup(date(2024, 11, 1), self.food).expense_total, 60)
+        self.assertEqual(self.rollup(date(2024, 12, 1), self.rent).expense_total, 10)
+
+        expense.delete()
+        self.assertEqual(self.rollup(date(2024, 12, 1), self.rent).expense_count, 0)
+        self.assertEqual(rollups.find_drift(), [])
+
+    def test_update_view_moves_amount_between_months(self):
+        income = Income.objects.create(user=self.user, amount=100, description="Salary", date=date(2024, 11, 1))
+        self.client.login(username='testuser', password='password123')
+        self.client.post(reverse('core:income_update', kwargs={'pk': income.pk}), {
+            'amount': 150.00,
+            'description': 'Salary',
+            'date': '2024-10-31',
+        })
+
+        self.assertEqual(self.rollup(date(2024, 11, 1)).income_total, 0)
+        self.assertEqual(self.rollup(date(2024, 10, 1)).income_total, 150)
+
+    def test_deleting_category_folds_totals_into_uncategorized(self):
+        Expense.objects.create(user=self.user, amount=25, category=self.food, date=date(2024, 11, 5))
+        self.food.delete()
+
+        self.assertEqual(self.rollup(date(2024, 11, 1)).expense_total, 25)
+        self.assertEqual(rollups.find_drift(), [])
+
+    def test_rebuild_command_detects_and_fixes_drift(self):
+        Expense.objects.create(user=self.user, amount=25, category=self.food, date=date(2024, 11, 5))
+        MonthlyRollup.objects.update(expense_total=999)
+
+        with self.assertRaises(CommandError):
+            call_command('rebuild_rollups', '--check', stdout=StringIO())
+
+        call_command('rebuild_rollups', stdout=StringIO())
+        self.assertEqual(self.rollup(date(2024, 11, 1), self.food).expense_total, 25)
+        call_command('rebuild_rollups', '--check', stdout=StringIO())
+
+
+@skipUnless(connection.vendor == 'sqlite', "Query plans are checked against SQLite's EXPLAIN QUERY PLAN output")
+class TransactionQueryPlanTests(TestCase):
+    tables = ('core_expense', 'core_income', 'core_monthlyrollup')
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', email='testuser@example.com', password='password123')
+        self.client.login(username='testuser', password='password123')
+        category = Category.objects.create(user=self.user, name='Food')
+        Expense.objects.create(user=self.user, amount=10, category=category, description='Lunch', date=date(2024, 11, 5))
+        Income.objects.create(user=self.user, amount=100, description='Salary', date=date(2024, 11, 1))
+
+    def assertTransactionQueriesUseIndexes(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+
+        checked = 0
+        with connection.cursor() as cursor:
+            for query in queries.captured_queries:
+                if not query['sql'].startswith('SELECT') or not any(t in query['sql'] for t in self.tables):
+                    continue
+                cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                for row in cursor.fetchall():
+                    detail = row[-1]
+                    if any(t in detail for t in self.tables):
+                        checked += 1
+                        self.assertTrue(detail.startswith('SEARCH'), f"Full scan in {query['sql']!r}: {detail}")
+                        if '"date" >=' in query['sql']:
+                            # The month range must be part of the index lookup, not a filter on its results.
+                            self.assertIn('date>', detail)
+        self.assertGreater(checked, 0)
+
+    def test_month_window_is_half_open(self):
+        self.assertEqual(month_window(2024, 12), (date(2024, 12, 1), date(2025, 1, 1)))
+        self.assertEqual(month_filter(2024, 2), {'date__gte': date(2024, 2, 1), 'date__lt': date(2024, 3, 1)})
+
+    def test_dashboard_queries_use_indexes(self):
+        self.assertTransactionQueriesUseIndexes(reverse('core:dashboard') + '?month=11&year=2024')
+
+    def test_list_queries_use_indexes(self):
+        self.assertTransactionQueriesUseIndexes(reverse('core:expense_list'))
+        self.assertTransactionQueriesUseIndexes(reverse('core:income_list'))
+
+
+@override_settings(TRANSACTION_PAGE_SIZE=2)
+class TransactionPaginationTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', email='testuser@example.com', password='password123')
+        self.client.login(username='testuser', password='password123')
+        self.category = Category.objects.create(user=self.user, name='Food')
+        for day in (1, 2, 2, 3, 4):
+            Expense.objects.create(
+                user=self.user, amount=day, category=self.category, description=f'Expense {day}', date=date(2024, 11, day)
+            )
+
+    def collect_pages(self, url):
+        pages, cursor = [], None
+        while True:
+            response = self.client.get(url, {'cursor': cursor} if cursor else {})
+            page = response.context['page_obj']
+            pages.append([expense.pk for expense in page.object_list])
+            if not page.has_next:
+                return pages
+            cursor = page.next_cursor
+
+    def test_pages_walk_every_expense_once_newest_first(self):
+        pages = self.collect_pages(reverse('core:expense_list'))
+
+        expected = list(Expense.objects.order_by('-date', '-pk').values_list('pk', flat=True))
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(sum(pages, []), expected)
+
+    def test_page_size_query_parameter(self):
+        response = self.client.get(reverse('core:expense_list'), {'page_size': 4})
+        self.assertEqual(len(response.context['object_list']), 4)
+
+    def test_invalid_cursor_returns_404(self):
+        for cursor in ('not-a-cursor', '2024-01-01_' + '9' * 30, '2024-01-01_0'):
+            response = self.client.get(reverse('core:expense_list'), {'cursor': cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+
+    def test_category_names_do_not_cost_a_query_per_row(self):
+        with CaptureQueriesContext(connection) as first_page:
+            self.client.get(reverse('core:expense_list'), {'page_size': 1})
+        with CaptureQueriesContext(connection) as full_page:
+            response = self.client.get(reverse('core:expense_list'), {'page_size': 5})
+
+        self.assertContains(response, 'Food')
+        self.assertEqual(len(first_page), len(full_page))
+
+
+class BudgetSpendQueryTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', email='testuser@example.com', password='password123')
+        self.other_user = User.objects.create_user(username='otheruser', email='otheruser@example.com', password='password456')
+        self.client.login(username='testuser', password='password123')
+
+    def add_budget(self, name, spent):
+        category, _ = Category.objects.get_or_create(user=None, name=name)
+        Budget.objects.create(
+            user=self.user, category=category, amount=100, start_date=date(2024, 11, 1), end_date=date(2024, 11, 30)
+        )
+        Expense.objects.create(user=self.user, amount=spent, category=category, date=date(2024, 11, 10))
+        # Outside the budget window and another user's spend in the same shared category
+        Expense.objects.create(user=self.user, amount=1000, category=category, date=date(2024, 12, 1))
+        Expense.objects.create(user=self.other_user, amount=1000, category=category, date=date(2024, 11, 10))
+        return category
+
+    def test_with_spend_sums_owner_expenses_inside_budget_window(self):
+        self.add_budget('Groceries', 30)
+        budget = Budget.objects.with_spend().get()
+
+        self.assertEqual(budget.value_spent, 30)
+        self.assertEqual(budget.budget_available, 70)
+
+    def test_with_spend_accepts_another_window(self):
+        self.add_budget('Groceries', 30)
+        budget = Budget.objects.with_spend(date(2024, 12, 1), date(2025, 1, 1)).get()
+        self.assertEqual(budget.value_spent, 1000)
+
+    def test_budget_list_query_count_is_constant(self):
+        self.add_budget('Groceries', 30)
+        with CaptureQueriesContext(connection) as one_budget:
+            self.client.get(reverse('core:budget_list'))
+
+        for index in range(5):
+            self.add_budget(f'Category {index}', index)
+        with self.assertNumQueries(len(one_budget)):
+            response = self.client.get(reverse('core:budget_list'))
+        self.assertEqual(len(response.context['budgets_data']), 6)
+
+
+class DashboardCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', email='testuser@example.com', password='password123')
+        self.client.login(username='testuser', password='password123')
+        self.category = Category.objects.create(user=self.user, name='Food')
+        Expense.objects.create(user=self.user, amount=10, category=self.category, date=date(2024, 11, 5))
+        self.november = reverse('core:dashboard') + '?month=11&year=2024'
+        self.october = reverse('core:dashboard') + '?month=10&year=2024'
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        return len(queries)
+
+    def test_repeat_visit_runs_no_dashboard_queries(self):
+        first = self.count_queries(self.november)
+        # Only the session and user lookups remain on a cache hit.
+        with self.assertNumQueries(2):
+            response = self.client.get(self.november)
+        self.assertGreater(first, 2)
+        self.assertEqual(response.context['balance'], -10)
+
+    def test_expense_write_invalidates_only_its_month(self):
+        self.client.get(self.november)
+        self.client.get(self.october)
+
+        Expense.objects.create(user=self.user, amount=5, category=self.category, date=date(2024, 11, 6))
+        self.assertEqual(self.count_queries(self.october), 2)
+        response = self.client.get(self.november)
+        self.assertEqual(response.context['balance'], -15)
+
+    def test_budget_write_invalidates_every_month(self):
+        self.client.get(self.november)
+        self.client.get(self.october)
+
+        Budget.objects.create(
+            user=self.user, category=self.category, amount=50, start_date=date(2024, 11, 1), end_date=date(2024, 11, 30)
+        )
+        self.assertContains(self.client.get(self.october), 'Food')
+        self.assertContains(self.client.get(self.november), '$40.00')
+
+    def test_other_users_are_not_invalidated(self):
+        other = User.objects.create_user(username='otheruser', email='otheruser@example.com', password='password456')
+        self.client.get(self.november)
+
+        Expense.objects.create(user=other, amount=5, category=self.category, date=date(2024, 11, 6))
+        self.assertEqual(self.count_queries(self.november), 2)
+
+
+class TransactionImportTests(TestCase):
+    csv_data = (
+        "Date,Amount,Description,Category\n"
+        "2024-11-05,-12.50,Lunch,Groceries\n"
+        "11/06/2024,\"-1,000.00\",Rent payment,\n"
+        "2024-11-07,2500,Salary,\n"
+        "2024-13-01,-5,Bad date,\n"
+        "2024-11-08,abc,Bad amount,\n"
+        "2024-11-09,-3.25,Uber ride,\n"
+    )
+    ofx_data = (
+        "OFXHEADER:100\nDATA:OFXSGML\n\n<OFX><BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>\n"
+        "<STMTTRN><TRNTYPE>DEBIT<DTPOSTED>20241105120000[-5:EST]<TRNAMT>-42.10<NAME>GROCERY STORE<MEMO>Card 1234\n"
+        "</STMTTRN>\n"
+        "<STMTTRN><TRNTYPE>CREDIT<DTPOSTED>20241115<TRNAMT>1000.00<NAME>PAYROLL</STMTTRN>\n"
+        "</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1></OFX>\n"
+    )
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', email='testuser@example.com', password='password123')
+        self.groceries = Category.objects.create(user=self.user, name='Groceries')
+        self.transportation = Category.objects.get(user=None, name='Transportation')
+
+    def test_csv_import_creates_transactions_and_reports_bad_rows(self):
+        result = import_transactions(
+            self.user, BytesIO(self.csv_data.encode()), 'csv', batch_size=2, rules=[('uber', 'Transportation')]
+        )
+
+        self.assertEqual((result.expenses, result.incomes), (3, 1))
+        self.assertEqual([number for number, message in result.errors], [5, 6])
+        self.assertEqual(Expense.objects.get(description='Lunch').category, self.groceries)
+        self.assertEqual(Expense.objects.get(description='Rent payment').amount, 1000)
+        self.assertEqual(Expense.objects.get(description='Uber ride').category, self.transportation)
+        self.assertEqual(rollups.find_drift(), [])
+
+    def test_ofx_import(self):
+        result = import_transactions(self.user, BytesIO(self.ofx_data.encode()), 'ofx')
+
+        self.assertEqual((result.expenses, result.incomes, result.errors), (1, 1, []))
+        expense = Expense.objects.get()
+        self.assertEqual((expense.amount, expense.date), (Decimal('42.10'), date(2024, 11, 5)))
+        self.assertEqual(expense.description, 'GROCERY STORE - Card 1234')
+        self.assertEqual(Income.objects.get().description, 'PAYROLL')
+
+    def test_unparseable_lines_and_zero_amounts_are_reported(self):
+        rows = (
+            'date,amount,description\n'
+            f'2024-11-01,-5.00,"{"x" * (csv.field_size_limit() + 1)}"\n'
+            '2024-11-02,0.00,Refund reversal\n'
+            '2024-11-03,-7.00,Lunch\n'
+        )
+        result = import_transactions(self.user, BytesIO(rows.encode()))
+        self.assertEqual(result.expenses, 1)
+        self.assertEqual([number for number, message in result.errors], [2, 3])
+        self.assertIn('Unreadable line', result.errors[0][1])
+        self.assertIn('Zero amount', result.errors[1][1])
+        self.assertFalse(Income.objects.exists())
+
+    @mock.patch('core.importers.READ_SIZE', 7)
+    def test_records_split_across_reads(self):
+        csv_result = import_transactions(self.user, BytesIO(self.csv_data.encode()), 'csv')
+        ofx_result = import_transactions(self.user, BytesIO(self.ofx_data.encode()), 'ofx')
+
+        self.assertEqual((csv_result.created, len(csv_result.errors)), (4, 2))
+        self.assertEqual((ofx_result.created, len(ofx_result.errors)), (2, 0))
+        self.assertTrue(Expense.objects.filter(description='GROCERY STORE - Card 1234', amount=Decimal('42.10')).exists())
+
+    def test_upload_view(self):
+        self.client.login(username='testuser', password='password123')
+        upload = SimpleUploadedFile('statement.csv', self.csv_data.encode(), content_type='text/csv')
+        response = self.client.post(reverse('core:transaction_import'), {'file': upload})
+
+        self.assertContains(response, 'Imported 3 expense(s) and 1 income(s).')
+        self.assertContains(response, "Invalid amount &#x27;abc&#x27;")
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 3)
+
+    def test_management_command(self):
+        with NamedTemporaryFile('w', suffix='.ofx', delete=False) as statement:
+            statement.write(self.ofx_data)
+        self.addCleanup(os.remove, statement.name)
+
+        out = StringIO()
+        call_command('import_transactions', statement.name, '--user', 'testuser', stdout=out)
+        self.assertIn('Imported 1 expense(s) and 1 income(s)', out.getvalue())
+
+
+class LedgerExportTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', email='testuser@example.com', password='password123')
+        self.client.login(username='testuser', password='password123')
+        category = Category.objects.create(user=self.user, name='Food')
+        Expense.objects.create(user=self.user, amount=12.5, category=category, description='Lunch', date=date(2024, 11, 5))
+        Expense.objects.create(user=self.user, amount=99, category=category, description='October', date=date(2024, 10, 5))
+        Income.objects.create(user=self.user, amount=1000, description='Salary', date=date(2024, 11, 1))
+        Budget.objects.create(
+            user=self.user, category=category, amount=200, start_date=date(2024, 11, 1), end_date=date(2024, 11, 30)
+        )
+        SavingsGoal.objects.create(
+            user=self.user, goal_name='Vacation', target_amount=1000, current_amount=200, deadline=date(2025, 6, 1)
+        )
+        other = User.objects.create_user(username='otheruser', email='otheruser@example.com', password='password456')
+        Expense.objects.create(user=other, amount=5, description='Not mine', date=date(2024, 11, 5))
+
+    def test_csv_export_streams_every_record_type(self):
+        response = self.client.get(reverse('core:ledger_export'))
+
+        self.assertIsInstance(response, StreamingHttpResponse)
+        rows = list(csv.DictReader(StringIO(b''.join(response.streaming_content).decode())))
+        self.assertEqual(
+            [row['record_type'] for row in rows], ['expense', 'expense', 'income', 'budget', 'savings_goal']
+        )
+        self.assertEqual(rows[1]['category'], 'Food')
+        self.assertEqual(rows[1]['amount'], '12.50')
+        self.assertEqual(rows[4]['description'], 'Vacation')
+
+    def test_ndjson_export_with_date_range(self):
+        response = self.client.get(reverse('core:ledger_export'), {'format': 'ndjson', 'start': '2024-11-01'})
+
+        records = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([record['record_type'] for record in records], ['expense', 'income', 'budget', 'savings_goal'])
+        self.assertEqual(records[0], {
+            'record_type': 'expense', 'id': records[0]['id'], 'date': '2024-11-05',
+            'amount': '12.50', 'category': 'Food', 'description': 'Lunch',
+        })
+
+    async def test_export_streams_asynchronously_under_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('core:ledger_export'), {'format': 'ndjson'})
+
+        self.assertTrue(response.is_async)
+        content = b''.join([chunk async for chunk in response.streaming_content]).decode()
+        self.assertEqual(
+            [json.loads(line)['record_type'] for line in content.splitlines()],
+            ['expense', 'expense', 'income', 'budget', 'savings_goal'],
+        )
+
+    def test_invalid_parameters(self):
+        self.assertEqual(self.client.get(reverse('core:ledger_export'), {'format': 'xml'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('core:ledger_export'), {'start': '11/01/2024'}).status_code, 400)
+
+    def test_management_command(self):
+        out = StringIO()
+        call_command('export_ledger', '--user', 'testuser', '--format', 'ndjson', '--end', '2024-10-31', stdout=out)
+        # The October expense and the savings goal
+        self.assertEqual(len(out.getvalue().splitlines()), 2)
+
+
+class DashboardQueryCountTests(TestCase):
+    # Session and user lookups made by the middleware on every page
+    middleware_queries = 2
+    dashboard_queries = 4
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', email='testuser@example.com', password='password123')
+        self.client.login(username='testuser', password='password123')
+        self.url = reverse('core:dashboard') + '?month=11&year=2024'
+
+    def add_data(self, count):
+        for index in range(count):
+            category = Category.objects.create(user=self.user, name=f'Category {Category.objects.count()}')
+            Budget.objects.create(
+                user=self.user, category=category, amount=100, start_date=date(2024, 11, 1), end_date=date(2024, 11, 30)
+            )
+            SavingsGoal.objects.create(
+                user=self.user, goal_name=f'Goal {index}', target_amount=100, current_amount=10, deadline=date(2030, 1, 1)
+            )
+            Expense.objects.create(user=self.user, amount=10, category=category, date=date(2024, 11, index % 28 + 1))
+            Income.objects.create(user=self.user, amount=20, date=date(2024, 11, index % 28 + 1))
+
+    def test_query_count_does_not_depend_on_data_volume(self):
+        for count in (0, 1, 10):
+            self.add_data(count)
+            cache.clear()
+            with self.assertNumQueries(self.middleware_queries + self.dashboard_queries):
+                response = self.client.get(self.url)
+            self.assertEqual(response.status_code, 200)
+
+    def test_totals_come_from_one_aggregate(self):
+        self.add_data(3)
+        cache.clear()
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['total_income'], 60)
+        self.assertEqual(response.context['balance'], 30)
+
+
+class SharedCategoryBudgetTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', email='testuser@example.com', password='password123')
+        self.client.login(username='testuser', password='password123')
+        self.groceries = Category.objects.get(user=None, name='Groceries')
+        Budget.objects.create(
+            user=self.user, category=self.groceries, amount=500, start_date=date(2024, 11, 1), end_date=date(2024, 11, 30)
+        )
+        Expense.objects.create(user=self.user, amount=120, category=self.groceries, date=date(2024, 11, 3))
+        for index in range(3):
+            tenant = User.objects.create(username=f'tenant{index}', email=f'tenant{index}@example.com')
+            Budget.objects.create(
+                user=tenant, category=self.groceries, amount=50, start_date=date(2024, 11, 1), end_date=date(2024, 11, 30)
+            )
+            Expense.objects.create(user=tenant, amount=1000, category=self.groceries, date=date(2024, 11, 3))
+
+    def test_dashboard_budget_counts_only_own_expenses_in_default_category(self):
+        cache.clear()
+        response = self.client.get(reverse('core:dashboard') + '?month=11&year=2024')
+
+        [budget] = response.context['budgets']
+        self.assertEqual(budget.value_spent, 120)
+        self.assertEqual(budget.budget_available, 380)
+
+    @skipUnless(connection.vendor == 'sqlite', "Query plans are checked against SQLite's EXPLAIN QUERY PLAN output")
+    def test_spend_subquery_uses_user_category_date_index(self):
+        queryset = Budget.objects.filter(user=self.user).with_spend(date(2024, 11, 1), date(2024, 12, 1))
+        self.assertIn('expense_user_category_date_idx (user_id=? AND category_id=? AND date>? AND date<?)', queryset.explain())
+
+
+@override_settings(QUERY_INSTRUMENTATION=True, QUERY_INSTRUMENTATION_REPORT=True)
+class QueryInstrumentationTests(TestCase):
+    def setUp(self):
+        request_stats.clear()
+        self.user = User.objects.create_user(username='testuser', email='testuser@example.com', password='password123')
+        self.client.login(username='testuser', password='password123')
+
+    def test_server_timing_header_and_log_line(self):
+        with self.assertLogs('core.instrumentation', level='INFO') as logs:
+            response = self.client.get(reverse('core:expense_list'))
+
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", total;dur=[\d.]+$')
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record['view'], 'core:expense_list')
+        self.assertGreater(record['queries'], 0)
+        self.assertEqual(record['duplicate_queries'], 0)
+
+    def test_repeated_queries_are_reported_as_duplicates(self):
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            for _ in range(3):
+                list(User.objects.filter(pk=self.user.pk))
+        self.assertEqual((recorder.count, recorder.duplicates), (3, 2))
+        self.assertIn('core_user', recorder.most_repeated())
+
+    async def test_async_views_are_measured_in_the_event_loop(self):
+        await self.async_client.aforce_login(self.user)
+        await Expense.objects.acreate(user=self.user, amount=5, date=date(2024, 11, 5))
+        with self.assertLogs('core.instrumentation', level='INFO') as logs:
+            response = await self.async_client.get(reverse('core:expense_list'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(QueryInstrumentationMiddleware.async_capable)
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record['view'], 'core:expense_list')
+        self.assertGreater(record['queries'], 0)
+        self.assertIn(f'desc="{record["queries"]} queries"', response['Server-Timing'])
+
+    def test_report_is_staff_only(self):
+        with self.assertLogs('core.instrumentation', level='INFO') as logs:
+            self.client.get(reverse('core:dashboard'))
+            self.assertEqual(self.client.get(reverse('core:query_report')).status_code, 403)
+
+            self.user.is_staff = True
+            self.user.save()
+            response = self.client.get(reverse('core:query_report'))
+        self.assertContains(response, 'core:dashboard')
+        self.assertEqual(
+            [json.loads(record.getMessage())['status'] for record in logs.records], [200, 403, 200]
+        )
+
+    @override_settings(QUERY_INSTRUMENTATION=False)
+    def test_disabled_by_default(self):
+        response = self.client.get(reverse('core:expense_list'))
+        self.assertNotIn('Server-Timing', response)
+
+
+class SeedDemoDataTests(TestCase):
+    def seed(self, *args):
+        call_command('seed_demo_data', '--users', '2', '--expenses-per-user', '300', '--batch-size', '100',
+                     '--workers', '1', *args, stdout=StringIO())
+
+    def ledger(self, prefix):
+        return list(Expense.objects.filter(user__username__startswith=prefix)
+                    .order_by('user__username', 'date', 'pk')
+                    .values_list('user__username', 'date', 'amount', 'category__name', 'description'))
+
+    def test_seeds_users_and_keeps_rollups_in_sync(self):
+        self.seed('--prefix', 'demo')
+
+        users = User.objects.filter(username__startswith='demo')
+        self.assertEqual(users.count(), 2)
+        self.assertTrue(users.first().check_password('demo-password'))
+        self.assertEqual(Expense.objects.filter(user__in=users).count(), 600)
+        self.assertTrue(Income.objects.filter(user__in=users).exists())
+        self.assertEqual(Budget.objects.filter(user__in=users).count(), 10)
+        self.assertEqual(SavingsGoal.objects.filter(user__in=users).count(), 6)
+        self.assertEqual(rollups.find_drift(), [])
+
+    def test_same_seed_gives_same_data(self):
+        self.seed('--prefix', 'a', '--seed', '7')
+        self.seed('--prefix', 'b', '--seed', '7')
+        self.seed('--prefix', 'c', '--seed', '8')
+
+        first = [row[1:] for row in self.ledger('a')]
+        self.assertEqual(first, [row[1:] for row in self.ledger('b')])
+        self.assertNotEqual(first, [row[1:] for row in self.ledger('c')])
+
+    def test_existing_users_are_refused(self):
+        self.seed('--prefix', 'demo')
+        with self.assertRaises(CommandError):
+            self.seed('--prefix', 'demo')
+
+
+@skipUnless(connection.vendor == 'sqlite', "SQLite connection settings")
+class SQLiteConnectionTests(TestCase):
+    def pragma(self, name):
+        with connection.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_connection_is_tuned_on_open(self):
+        self.assertEqual(self.pragma('synchronous'), 1)  # NORMAL
+        self.assertGreater(self.pragma('busy_timeout'), 0)
+        self.assertEqual(connection.transaction_mode, 'IMMEDIATE')
+
+
+class AsyncViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', email='testuser@example.com', password='password123')
+        self.category = Category.objects.create(user=self.user, name='Food')
+        Expense.objects.create(user=self.user, amount=10, category=self.category, date=date(2024, 11, 5))
+        Income.objects.create(user=self.user, amount=25, date=date(2024, 11, 1))
+        Budget.objects.create(
+            user=self.user, category=self.category, amount=50, start_date=date(2024, 11, 1), end_date=date(2024, 11, 30)
+        )
+
+    def test_views_are_async(self):
+        for view in (views.DashboardView, views.ExpenseListView, views.IncomeListView,
+                     views.BudgetListView, views.CategoryListView, views.SavingsGoalListView):
+            self.assertTrue(view.view_is_async, view.__name__)
+
+    async def test_dashboard_under_async_client(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('core:dashboard') + '?month=11&year=2024')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['balance'], 15)
+        self.assertEqual(response.context['budgets'][0].value_spent, 10)
+        self.assertEqual(len(response.context['last_expenses']), 1)
+
+    async def test_list_views_under_async_client(self):
+        await self.async_client.aforce_login(self.user)
+        for name in ('expense_list', 'income_list', 'budget_list', 'category_list', 'savings_goal_list'):
+            response = await self.async_client.get(reverse(f'core:{name}'))
+            self.assertEqual(response.status_code, 200, name)
+        response = await self.async_client.get(reverse('core:expense_list'))
+        self.assertEqual([expense.amount for expense in response.context['object_list']], [10])
+
+    async def test_anonymous_users_are_redirected(self):
+        response = await self.async_client.get(reverse('core:dashboard'))
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse('accounts:login'), response.url)
+
+
+class AnalyticsViewTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', email='testuser@example.com', password='password123')
+        self.client.login(username='testuser', password='password123')
+        self.food = Category.objects.create(user=self.user, name='Food')
+        self.rent = Category.objects.create(user=self.user, name='Rent')
+        Expense.objects.create(user=self.user, amount=10, category=self.food, date=date(2022, 1, 5))
+        Expense.objects.create(user=self.user, amount=700, category=self.rent, date=date(2023, 1, 1))
+        Expense.objects.create(user=self.user, amount=5, category=None, date=date(2024, 12, 31))
+        Income.objects.create(user=self.user, amount=1000, date=date(2023, 1, 15))
+        self.url = reverse('core:analytics') + '?start=2022-01&end=2024-12'
+
+    def test_series_for_36_months_in_one_query(self):
+        # Session and user lookups plus the grouped rollup query
+        with self.assertNumQueries(3):
+            data = self.client.get(self.url).json()
+
+        self.assertEqual(len(data['months']), 36)
+        self.assertEqual(data['months'][12], '2023-01')
+        self.assertEqual(data['categories'], ['Food', 'Rent', 'Uncategorized'])
+        self.assertEqual(data['expenses']['Food'][0], '10.00')
+        self.assertEqual(data['expenses']['Rent'][12], '700.00')
+        self.assertEqual(data['expenses']['Uncategorized'][35], '5.00')
+        self.assertEqual(data['expense_totals'][1], '0.00')
+        self.assertEqual(data['income'][12], '1000.00')
+
+    def test_closed_months_are_cached_until_a_back_dated_edit(self):
+        self.client.get(self.url)
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+        Expense.objects.create(user=self.user, amount=3, category=self.food, date=date(2022, 1, 20))
+        data = self.client.get(self.url).json()
+        self.assertEqual(data['expenses']['Food'][0], '13.00')
+
+    def test_current_month_is_never_cached(self):
+        this_month = timezone.now().date().replace(day=1)
+        url = reverse('core:analytics')
+        self.client.get(url)
+        Expense.objects.create(user=self.user, amount=8, category=self.food, date=this_month)
+        data = self.client.get(url).json()
+        self.assertEqual(data['months'][-1], f'{this_month:%Y-%m}')
+        self.assertEqual(data['expenses']['Food'][-1], '8.00')
+
+    def test_year_over_year(self):
+        data = self.client.get(reverse('core:analytics') + '?start=2024-01&end=2024-12&compare=previous_year').json()
+        self.assertEqual(data['previous_year']['months'][0], '2023-01')
+        self.assertEqual(data['previous_year']['expense_totals'][0], '700.00')
+        self.assertEqual(data['previous_year']['income'][0], '1000.00')
+
+    def test_invalid_ranges_are_rejected(self):
+        for query in ('?start=2024-13', '?start=2024-05&end=2024-01', '?start=2000-01&end=2024-12'):
+            self.assertEqual(self.client.get(reverse('core:analytics') + query).status_code, 400, query)
+
+    def test_ranges_at_the_ends_of_the_calendar(self):
+        url = reverse('core:analytics')
+        data = self.client.get(url + '?end=0001-05').json()
+        self.assertEqual(data['months'], ['0001-01', '0001-02', '0001-03', '0001-04', '0001-05'])
+        data = self.client.get(url + '?start=9999-11&end=9999-12&compare=previous_year').json()
+        self.assertEqual(data['previous_year']['months'], ['9998-11', '9998-12'])
+        self.assertEqual(self.client.get(url + '?start=0001-01&end=0001-03&compare=previous_year').status_code, 400)
+        self.assertEqual(self.client.get(url + '?end=0001-05&compare=previous_year').status_code, 400)
+
+
+class TransactionSearchTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username='testuser', email='testuser@example.com', password='password123')
+        self.client.login(username='testuser', password='password123')
+        self.other = User.objects.create_user(username='otheruser', email='otheruser@example.com', password='password456')
+        self.groceries = Category.objects.create(user=self.user, name='Groceries')
+        self.transport = Category.objects.create(user=self.user, name='Transport')
+        self.bakery = Expense.objects.create(user=self.user, amount=4, category=self.groceries,
+                                             description='Bakery bread', date=date(2024, 11, 1))
+        self.bread = Expense.objects.create(user=self.user, amount=3, category=self.transport,
+                                            description='Bread bread bread for the bus', date=date(2024, 11, 2))
+        self.market = Expense.objects.create(user=self.user, amount=20, category=self.groceries,
+                                             description='Farmers market', date=date(2024, 11, 3))
+        self.salary = Income.objects.create(user=self.user, amount=1000, description='Salary from Bakery Ltd',
+                                            date=date(2024, 11, 1))
+        Expense.objects.create(user=self.other, amount=9, description='Bakery bread', date=date(2024, 11, 1))
+
+    def search(self, query):
+        from core.search import search
+        return search(self.user, query)
+
+    def test_prefix_matching_across_descriptions_and_incomes(self):
+        results = self.search('bak')
+        self.assertEqual(results.expenses, [self.bakery])
+        self.assertEqual(results.incomes, [self.salary])
+
+        # Every word must match
+        self.assertEqual(self.search('bak bread').expenses, [self.bakery])
+        self.assertEqual(self.search('bak bus').expenses, [])
+
+    def test_matches_are_ranked(self):
+        self.assertEqual(self.search('bread').expenses, [self.bread, self.bakery])
+
+    def test_category_names_match(self):
+        results = self.search('groc')
+        self.assertEqual(results.categories, [self.groceries])
+        self.assertEqual(results.expenses, [self.market, self.bakery])
+
+    def test_index_follows_updates_and_deletes(self):
+        self.market.description = 'Hardware store'
+        self.market.save()
+        self.assertEqual(self.search('farm').expenses, [])
+        self.assertEqual(self.search('hardw').expenses, [self.market])
+
+        self.market.delete()
+        self.assertEqual(self.search('hardw').expenses, [])
+
+    def test_bulk_created_rows_are_indexed(self):
+        from core.ledger import bulk_create_transactions
+        bulk_create_transactions(expenses=[Expense(user=self.user, amount=1, description='Zebra crossing', date=date(2024, 11, 4))])
+        self.assertEqual(len(self.search('zebra').expenses), 1)
+
+    def test_punctuation_is_ignored(self):
+        self.assertEqual(self.search('"bak* (').expenses, [self.bakery])
+        self.assertEqual(self.search('***').expenses, [])
+
+    def test_search_page(self):
+        response = self.client.get(reverse('core:search') + '?q=bakery')
+        self.assertContains(response, 'Bakery bread')
+        self.assertContains(response, 'Salary from Bakery Ltd')
+        self.assertEqual(len(response.context['results'].expenses), 1)
+
+
+class RecurringTransactionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', email='testuser@example.com', password='password123')
+        self.other = User.objects.create_user(username='otheruser', email='otheruser@example.com', password='password456')
+        self.housing = Category.objects.create(user=self.user, name='Housing')
+
+    def materialize(self, until, **kwargs):
+        from core import recurring
+        return recurring.materialize(until, **kwargs)
+
+    def test_monthly_schedule_keeps_its_day_of_month(self):
+        rent = RecurringTransaction.objects.create(
+            user=self.user, amount=1200, category=self.housing, description='Rent', start_date=date(2024, 1, 31),
+        )
+        self.assertEqual(rent.next_due_date, date(2024, 1, 31))
+
+        result = self.materialize(date(2024, 4, 30))
+        self.assertEqual(result.expenses, 4)
+        self.assertEqual(
+            list(Expense.objects.filter(user=self.user).order_by('date').values_list('date', flat=True)),
+            [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)],
+        )
+        rent.refresh_from_db()
+        self.assertEqual(rent.next_due_date, date(2024, 5, 31))
+
+    def test_runs_are_idempotent_and_keep_rollups_in_sync(self):
+        RecurringTransaction.objects.create(
+            user=self.user, kind=RecurringTransaction.INCOME, amount=2000, description='Salary',
+            frequency=RecurringTransaction.WEEKLY, interval=2, start_date=date(2024, 11, 1),
+        )
+        RecurringTransaction.objects.create(
+            user=self.other, amount=10, description='Streaming', start_date=date(2024, 11, 15),
+        )
+        self.materialize(date(2024, 11, 30))
+        result = self.materialize(date(2024, 11, 30))
+
+        self.assertEqual((result.schedules, result.expenses, result.incomes), (0, 0, 0))
+        self.assertEqual(Income.objects.filter(user=self.user).count(), 3)  # Nov 1, 15, 29
+        self.assertEqual(Expense.objects.filter(user=self.other).count(), 1)
+        self.assertEqual(rollups.find_drift(), [])
+
+    def test_end_date_stops_the_schedule(self):
+        schedule = RecurringTransaction.objects.create(
+            user=self.user, amount=5, frequency=RecurringTransaction.DAILY,
+            start_date=date(2024, 11, 1), end_date=date(2024, 11, 3),
+        )
+        self.materialize(date(2024, 12, 31))
+        schedule.refresh_from_db()
+        self.assertIsNone(schedule.next_due_date)
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 3)
+
+    def edit(self, schedule, **changes):
+        self.client.login(username='testuser', password='password123')
+        data = {
+            'kind': schedule.kind, 'amount': schedule.amount, 'category': schedule.category_id or '',
+            'description': schedule.description or '', 'frequency': schedule.frequency,
+            'interval': schedule.interval, 'start_date': schedule.start_date, 'end_date': schedule.end_date or '',
+            **changes,
+        }
+        response = self.client.post(reverse('core:recurring_update', args=[schedule.pk]), data)
+        self.assertRedirects(response, reverse('core:recurring_list'))
+        schedule.refresh_from_db()
+
+    def dates(self):
+        return list(Expense.objects.filter(user=self.user).order_by('date').values_list('date', flat=True))
+
+    def test_moving_the_start_date_does_not_repeat_materialized_occurrences(self):
+        rent = RecurringTransaction.objects.create(
+            user=self.user, amount=1200, category=self.housing, description='Rent', start_date=date(2024, 1, 1),
+        )
+        self.materialize(date(2024, 10, 1))
+        self.edit(rent, start_date='2024-01-15')
+        self.assertEqual(rent.next_due_date, date(2024, 10, 15))
+
+        self.materialize(date(2024, 11, 20))
+        self.assertEqual(self.dates(), [date(2024, month, 1) for month in range(1, 11)] + [date(2024, 10, 15), date(2024, 11, 15)])
+        self.assertEqual(rollups.find_drift(), [])
+
+    def test_moving_the_start_date_before_any_run_restarts_the_schedule(self):
+        rent = RecurringTransaction.objects.create(user=self.user, amount=1200, start_date=date(2024, 3, 1))
+        self.edit(rent, start_date='2024-01-15')
+        self.assertEqual(rent.next_due_date, date(2024, 1, 15))
+
+    def test_extending_the_end_date_revives_an_ended_schedule(self):
+        schedule = RecurringTransaction.objects.create(
+            user=self.user, amount=5, start_date=date(2024, 1, 1), end_date=date(2024, 3, 1),
+        )
+        self.materialize(date(2024, 6, 30))
+        schedule.refresh_from_db()
+        self.assertIsNone(schedule.next_due_date)
+
+        self.edit(schedule, end_date='2024-05-01')
+        self.assertEqual(schedule.next_due_date, date(2024, 4, 1))
+        self.materialize(date(2024, 6, 30))
+        self.assertEqual(self.dates(), [date(2024, month, 1) for month in range(1, 6)])
+
+    def test_admin_edits_are_rescheduled_too(self):
+        rent = RecurringTransaction.objects.create(user=self.user, amount=1200, start_date=date(2024, 1, 1))
+        self.materialize(date(2024, 10, 1))
+        admin_user = User.objects.create_superuser(username='admin', email='admin@example.com', password='password789')
+        self.client.force_login(admin_user)
+        response = self.client.post(reverse('admin:core_recurringtransaction_change', args=[rent.pk]), {
+            'user': self.user.pk, 'kind': rent.kind, 'amount': rent.amount, 'category': '', 'description': '',
+            'frequency': rent.frequency, 'interval': rent.interval, 'start_date': '2024-01-15', 'end_date': '',
+        })
+        self.assertRedirects(response, reverse('admin:core_recurringtransaction_changelist'))
+        rent.refresh_from_db()
+        self.assertEqual(rent.next_due_date, date(2024, 10, 15))
+
+    def test_only_due_schedules_are_read(self):
+        for index in range(5):
+            RecurringTransaction.objects.create(user=self.user, amount=1, start_date=date(2030, 1, 1))
+        RecurringTransaction.objects.create(user=self.user, amount=1, start_date=date(2024, 11, 1))
+
+        result = self.materialize(date(2024, 11, 30), batch_size=2)
+        self.assertEqual(result.schedules, 1)
+
+    def test_command(self):
+        RecurringTransaction.objects.create(user=self.user, amount=1, start_date=date(2024, 11, 1))
+        out = StringIO()
+        call_command('materialize_recurring', '--date', '2024-12-01', stdout=out)
+        self.assertIn('created 2 expense(s)', out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('materialize_recurring', '--date', 'tomorrow', stdout=StringIO())
+
+    def test_views_are_scoped_to_the_owner(self):
+        self.client.login(username='testuser', password='password123')
+        response = self.client.post(reverse('core:recurring_create'), {
+            'kind': 'income', 'amount': '100', 'category': self.housing.pk, 'description': 'Allowance',
+            'frequency': 'monthly', 'interval': '1', 'start_date': '2024-11-01',
+        })
+        self.assertRedirects(response, reverse('core:recurring_list'))
+        schedule = RecurringTransaction.objects.get(user=self.user)
+        self.assertIsNone(schedule.category)
+        self.assertContains(self.client.get(reverse('core:recurring_list')), 'Allowance')
+
+        others = RecurringTransaction.objects.create(user=self.other, amount=1, start_date=date(2024, 11, 1))
+        self.assertEqual(self.client.get(reverse('core:recurring_update', args=[others.pk])).status_code, 404)
+
+
+class JsonApiTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', email='testuser@example.com', password='password123')
+        self.other = User.objects.create_user(username='otheruser', email='otheruser@example.com', password='password456')
+        self.token, self.key = ApiToken.issue(self.user, 'script')
+        self.auth = {'HTTP_AUTHORIZATION': f'Token {self.key}'}
+        # Only this test's categories, not the defaults created by migrate
+        Category.objects.filter(user=None).delete()
+        self.food = Category.objects.create(user=self.user, name='Food')
+        self.rent = Category.objects.create(user=None, name='Rent')
+
+    def call(self, method, url, data=None, **extra):
+        body = json.dumps(data) if data is not None else None
+        return getattr(self.client, method)(url, body, content_type='application/json', **{**self.auth, **extra})
+
+    def test_authentication(self):
+        url = reverse('core:api_expenses')
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Token wrong').status_code, 401)
+        self.assertEqual(self.client.get(url, **self.auth).status_code, 200)
+        self.client.login(username='testuser', password='password123')
+        self.assertEqual(self.client.get(url).status_code, 200)
+        self.assertEqual(ApiToken.objects.get().digest, ApiToken.hash(self.key))
+
+    def test_session_writes_need_csrf_but_token_writes_do_not(self):
+        data = {'amount': '10.00', 'category': self.food.pk, 'date': '2024-11-05', 'description': 'Lunch'}
+        client = Client(enforce_csrf_checks=True)
+        client.login(username='testuser', password='password123')
+        response = client.post(reverse('core:api_expenses'), json.dumps(data), content_type='application/json')
+        self.assertEqual(response.status_code, 403)
+
+        client = Client(enforce_csrf_checks=True)
+        response = client.post(reverse('core:api_expenses'), json.dumps(data), content_type='application/json', **self.auth)
+        self.assertEqual(response.status_code, 201)
+
+    def test_expense_crud(self):
+        response = self.call('post', reverse('core:api_expenses'), {
+            'amount': '12.50', 'category': self.food.pk, 'date': '2024-11-05', 'description': 'Lunch',
+        })
+        self.assertEqual(response.status_code, 201)
+        expense_id = response.json()['id']
+        self.assertEqual(response.json()['amount'], '12.50')
+        url = reverse('core:api_expense', args=[expense_id])
+
+        response = self.call('patch', url, {'amount': '20'})
+        self.assertEqual(response.json()['description'], 'Lunch')
+        self.assertEqual(MonthlyRollup.objects.get(user=self.user, category=self.food).expense_total, 20)
+
+        self.assertEqual(self.call('delete', url).status_code, 204)
+        self.assertEqual(self.call('get', url).status_code, 404)
+        self.assertFalse(rollups.find_drift(self.user))
+
+    def test_invalid_and_foreign_data(self):
+        foreign = Category.objects.create(user=self.other, name='Private')
+        response = self.call('post', reverse('core:api_expenses'), {'amount': 'x', 'category': foreign.pk, 'date': '2024-11-05'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.json()['errors']), {'amount', 'category'})
+
+        theirs = Expense.objects.create(user=self.other, amount=5, date=date(2024, 11, 5))
+        self.assertEqual(self.call('get', reverse('core:api_expense', args=[theirs.pk])).status_code, 404)
+        self.assertEqual(self.call('post', reverse('core:api_expenses'), None).status_code, 400)
+
+    def test_filtering_and_cursor_pagination(self):
+        for day in range(1, 11):
+            Expense.objects.create(user=self.user, amount=day, category=self.food if day % 2 else None, date=date(2024, 11, day))
+        Expense.objects.create(user=self.other, amount=1, date=date(2024, 11, 3))
+
+        seen, cursor = [], None
+        while True:
+            params = {'start': '2024-11-03', 'end': '2024-11-09', 'page_size': 3}
+            if cursor:
+                params['cursor'] = cursor
+            body = self.client.get(reverse('core:api_expenses'), params, **self.auth).json()
+            seen += [row['date'] for row in body['results']]
+            cursor = body['next_cursor']
+            if not cursor:
+                break
+        self.assertEqual(seen, [f'2024-11-{day:02d}' for day in range(9, 2, -1)])
+
+        body = self.client.get(reverse('core:api_expenses'), {'category': 'none'}, **self.auth).json()
+        self.assertEqual(len(body['results']), 5)
+        body = self.client.get(reverse('core:api_expenses'), {'category': self.food.pk}, **self.auth).json()
+        self.assertEqual(len(body['results']), 5)
+        self.assertEqual(self.client.get(reverse('core:api_expenses'), {'start': 'soon'}, **self.auth).status_code, 400)
+        for cursor in ('not-a-cursor', '2024-01-01_' + '9' * 30):
+            response = self.client.get(reverse('core:api_expenses'), {'cursor': cursor}, **self.auth)
+            self.assertEqual(response.status_code, 400, cursor)
+
+    def test_batch_writes_everything_or_nothing(self):
+        expenses = [
+            {'amount': str(index), 'category': self.rent.pk, 'date': f'2024-11-{index % 28 + 1:02d}'}
+            for index in range(1, 301)
+        ]
+        incomes = [{'amount': '2500', 'date': '2024-11-01', 'description': 'Salary'}]
+        bad = expenses + [{'amount': '1', 'date': 'yesterday'}]
+        response = self.call('post', reverse('core:api_transaction_batch'), {'expenses': bad, 'incomes': incomes})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.json()['errors']['expenses']), ['300'])
+        self.assertFalse(Expense.objects.exists())
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.call('post', reverse('core:api_transaction_batch'), {'expenses': expenses, 'incomes': incomes})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.json()['expenses']), 300)
+        # Bounded by the monthly rollup rows touched, not by the number of rows
+        self.assertLess(len(queries), 20)
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 300)
+        self.assertFalse(rollups.find_drift(self.user))
+
+    def test_expenses_without_category_use_the_rules(self):
+        CategorizationRule.objects.create(user=self.user, pattern='landlord', category=self.rent)
+        response = self.call('post', reverse('core:api_expenses'), {
+            'amount': '900', 'date': '2024-11-01', 'description': 'Landlord',
+        })
+        self.assertEqual(response.json()['category'], self.rent.pk)
+        response = self.call('post', reverse('core:api_transaction_batch'), {'expenses': [
+            {'amount': '900', 'date': '2024-12-01', 'description': 'Landlord'},
+            {'amount': '900', 'date': '2024-12-01', 'description': 'Landlord', 'category': self.food.pk},
+        ]})
+        self.assertEqual(
+            list(Expense.objects.filter(pk__in=response.json()['expenses']).order_by('pk').values_list('category_id', flat=True)),
+            [self.rent.pk, self.food.pk],
+        )
+        self.assertFalse(rollups.find_drift(self.user))
+
+    def test_categories_budgets_and_goals(self):
+        body = self.call('get', reverse('core:api_categories')).json()
+        self.assertEqual([(row['name'], row['default']) for row in body['results']], [('Food', False), ('Rent', True)])
+        response = self.call('post', reverse('core:api_categories'), {'name': 'Rent'})
+        self.assertEqual(response.json()['error'], "This name is reserved for a default category.")
+        self.assertEqual(self.call('delete', reverse('core:api_category', args=[self.rent.pk])).status_code, 404)
+
+        response = self.call('post', reverse('core:api_budgets'), {
+            'category': self.food.pk, 'amount': '300', 'start_date': '2024-11-01', 'end_date': '2024-11-30',
+        })
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(self.call('get', reverse('core:api_budgets')).json()['results']), 1)
+
+        response = self.call('post', reverse('core:api_savings_goals'), {
+            'goal_name': 'Car', 'target_amount': '1000', 'deadline': '2030-01-01', 'current_amount': '999',
+        })
+        self.assertEqual(response.json()['current_amount'], '0.00')
+        self.assertEqual(response.json()['status'], 'on_track')
+
+    def test_create_api_token_command(self):
+        out = StringIO()
+        call_command('create_api_token', 'testuser', '--name', 'phone', stdout=out)
+        key = out.getvalue().strip()
+        self.assertEqual(ApiToken.objects.get(digest=ApiToken.hash(key)).name, 'phone')
+        with self.assertRaises(CommandError):
+            call_command('create_api_token', 'nobody')
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', email='testuser@example.com', password='password123')
+        self.client.login(username='testuser', password='password123')
+        self.category = Category.objects.create(user=self.user, name='Food')
+        # Sets the CSRF cookie, which is part of the ETag
+        self.client.get(reverse('core:dashboard'))
+
+    def revalidate(self, url, etag, **params):
+        return self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_pages_are_not_rendered_again(self):
+        for name in ('core:dashboard', 'core:expense_list', 'core:budget_list', 'core:savings_goal_list'):
+            url = reverse(name)
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertIn('no-cache', response['Cache-Control'])
+            # Session and user only: no view queries, no template
+            with self.assertNumQueries(2):
+                response = self.revalidate(url, response['ETag'])
+            self.assertEqual(response.status_code, 304)
+
+    def test_writes_change_the_etag(self):
+        url = reverse('core:expense_list')
+        etag = self.client.get(url)['ETag']
+        expense = Expense.objects.create(user=self.user, amount=5, category=self.category, date=date(2024, 11, 5))
+        self.assertEqual(self.revalidate(url, etag).status_code, 200)
+
+        etag = self.client.get(url)['ETag']
+        Budget.objects.create(user=self.user, category=self.category, amount=10, start_date=date(2024, 11, 1), end_date=date(2024, 11, 30))
+        self.assertEqual(self.revalidate(url, etag).status_code, 200)
+
+        etag = self.client.get(url)['ETag']
+        expense.delete()
+        self.assertEqual(self.revalidate(url, etag).status_code, 200)
+
+    def test_etag_depends_on_user_query_and_day(self):
+        url = reverse('core:dashboard')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.revalidate(url, etag, month=1).status_code, 200)
+
+        other = User.objects.create_user(username='otheruser', email='otheruser@example.com', password='password456')
+        self.client.force_login(other)
+        self.assertEqual(self.revalidate(url, etag).status_code, 200)
+
+        self.client.login(username='testuser', password='password123')
+        etag = self.client.get(url)['ETag']
+        with mock.patch('core.conditional.timezone.localdate', return_value=timezone.localdate() + timedelta(days=1)):
+            self.assertEqual(self.revalidate(url, etag).status_code, 200)
+
+    def test_other_users_writes_keep_the_etag(self):
+        url = reverse('core:expense_list')
+        etag = self.client.get(url)['ETag']
+        other = User.objects.create_user(username='otheruser', email='otheruser@example.com', password='password456')
+        Expense.objects.create(user=other, amount=5, date=date(2024, 11, 5))
+        self.assertEqual(self.revalidate(url, etag).status_code, 304)
+
+    def test_api_lists_support_conditional_requests(self):
+        token, key = ApiToken.issue(self.user)
+        url = reverse('core:api_expenses')
+        etag = self.client.get(url, HTTP_AUTHORIZATION=f'Token {key}')['ETag']
+        response = self.client.get(url, HTTP_AUTHORIZATION=f'Token {key}', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+
+class TemplateFragmentCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='testuser', email='testuser@example.com', password='password123')
+        self.client.login(username='testuser', password='password123')
+        self.expense = Expense.objects.create(user=self.user, amount=5, description='Coffee', date=date(2024, 11, 5))
+
+    def test_rows_are_served_from_the_fragment_until_a_write(self):
+        url = reverse('core:expense_list')
+        self.assertContains(self.client.get(url), 'Coffee')
+
+        # A bulk UPDATE bypasses the signals, so the cached rows are still shown
+        Expense.objects.filter(pk=self.expense.pk).update(description='Tea')
+        self.assertContains(self.client.get(url), 'Coffee')
+
+        self.expense.refresh_from_db()
+        self.expense.save()
+        self.assertContains(self.client.get(url), 'Tea')
+
+    def test_fragments_are_per_page(self):
+        Expense.objects.create(user=self.user, amount=5, description='Lunch', date=date(2024, 11, 6))
+        url = reverse('core:expense_list')
+        first = self.client.get(url, {'page_size': 1})
+        self.assertContains(first, 'Lunch')
+        response = self.client.get(url, {'page_size': 1, 'cursor': first.context['page_obj'].next_cursor})
+        self.assertContains(response, 'Coffee')
+        self.assertNotContains(response, 'Lunch')
@@ -1,11 +1,14 @@
 from django.urls import path
-from . import views
+from . import api, views
 
 app_name = 'core'
 
 urlpatterns = [
 
     path('dashboard/', views.DashboardView.as_view(), name='dashboard'),
+    path('search/', views.SearchView.as_view(), name='search'),
+    path('analytics/', views.AnalyticsView.as_view(), name='analytics'),
+    path('debug/queries/', views.QueryReportView.as_view(), name='query_report'),
 
     path('categories/', views.CategoryListView.as_view(), name='category_list'),
     path('categories/create/', views.CategoryCreateView.as_view(), name='category_create'),
@@ -16,6 +19,8 @@ urlpatterns = [
     path('expenses/create/', views.ExpenseCreateView.as_view(), name='expense_create'),
     path('expenses/<int:pk>/update/', views.ExpenseUpdateView.as_view(), name='expense_update'),
     path('expenses/<int:pk>/delete/', views.ExpenseDeleteView.as_view(), name='expense_delete'),
+    path('transactions/import/', views.TransactionImportView.as_view(), name='transaction_import'),
+    path('transactions/export/', views.LedgerExportView.as_view(), name='ledger_export'),
 
     path('incomes/', views.IncomeListView.as_view(), name='income_list'),
     path('incomes/create/', views.IncomeCreateView.as_view(), name='income_create'),
@@ -31,4 +36,26 @@ urlpatterns = [
     path('savings-goals/create/', views.SavingsGoalCreateView.as_view(), name='savings_goal_create'),
     path('savings-goals/<int:pk>/update/', views.SavingsGoalUpdateView.as_view(), name='savings_goal_update'),
     path('savings-goals/<int:pk>/delete/', views.SavingsGoalDeleteView.as_view(), name='savings_goal_delete'),
+    path('savings-goals/<int:pk>/contribute/', views.SavingsContributionCreateView.as_view(), name='savings_contribution_create'),
+
+    path('recurring/', views.RecurringTransactionListView.as_view(), name='recurring_list'),
+    path('recurring/create/', views.RecurringTransactionCreateView.as_view(), name='recurring_create'),
+    path('recurring/<int:pk>/update/', views.RecurringTransactionUpdateView.as_view(), name='recurring_update'),
+    path('recurring/<int:pk>/delete/', views.RecurringTransactionDeleteView.as_view(), name='recurring_delete'),
+    path('rules/', views.CategorizationRuleListView.as_view(), name='rule_list'),
+    path('rules/create/', views.CategorizationRuleCreateView.as_view(), name='rule_create'),
+    path('rules/<int:pk>/update/', views.CategorizationRuleUpdateView.as_view(), name='rule_update'),
+    path('rules/<int:pk>/delete/', views.CategorizationRuleDeleteView.as_view(), name='rule_delete'),
+
+    path('api/expenses/', api.ExpenseCollectionView.as_view(), name='api_expenses'),
+    path('api/expenses/<int:pk>/', api.ExpenseObjectView.as_view(), name='api_expense'),
+    path('api/incomes/', api.IncomeCollectionView.as_view(), name='api_incomes'),
+    path('api/incomes/<int:pk>/', api.IncomeObjectView.as_view(), name='api_income'),
+    path('api/budgets/', api.BudgetCollectionView.as_view(), name='api_budgets'),
+    path('api/budgets/<int:pk>/', api.BudgetObjectView.as_view(), name='api_budget'),
+    path('api/categories/', api.CategoryCollectionView.as_view(), name='api_categories'),
+    path('api/categories/<int:pk>/', api.CategoryObjectView.as_view(), name='api_category'),
+    path('api/savings-goals/', api.SavingsGoalCollectionView.as_view(), name='api_savings_goals'),
+    path('api/savings-goals/<int:pk>/', api.SavingsGoalObjectView.as_view(), name='api_savings_goal'),
+    path('api/transactions/batch/', api.TransactionBatchView.as_view(), name='api_transaction_batch'),
 ]
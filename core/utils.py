@@ -0,0 +1,19 @@
+from datetime import date
+
+
+def month_window(year, month):
+    """Return the half-open [start, end) date range covering a calendar month."""
+    start = date(year, month, 1)
+    end = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return start, end
+
+
+def month_filter(year, month, field='date'):
+    """
+    Build range lookups for a month, e.g. {'date__gte': ..., 'date__lt': ...}.
+
+    Unlike `date__month`/`date__year`, which compile to strftime/EXTRACT calls,
+    a plain range on the column can be served by the (user, date) indexes.
+    """
+    start, end = month_window(year, month)
+    return {f'{field}__gte': start, f'{field}__lt': end}
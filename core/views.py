@@ -1,31 +1,106 @@
-from django.views.generic import ListView, CreateView, UpdateView, DeleteView, TemplateView
-from django.contrib.auth.mixins import LoginRequiredMixin
-from .models import Category, Expense, Income, Budget, SavingsGoal
+from django.views.generic import ListView, CreateView, UpdateView, DeleteView, TemplateView, FormView, View
+from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from .models import CategorizationRule, Category, Expense, Income, Budget, SavingsGoal, SavingsContribution, MonthlyRollup, RecurringTransaction
+from . import analytics, caching, recurring, rollups
+from .categories import aeffective_categories, name_conflict
+from .categorization import categorize
+from .conditional import ConditionalGetMixin
+from .exporters import FORMATS as EXPORT_FORMATS, aiter_export, export_ledger
+from .forms import (
+    BudgetForm, CategorizationRuleForm, ExpenseForm, RecurringTransactionForm, SavingsGoalEditForm, TransactionImportForm,
+)
+from .importers import detect_format, import_transactions
+from .instrumentation import stats as request_stats
+from .pagination import KeysetPaginationMixin
+from .search import search as search_transactions
+from .utils import month_filter, month_window
+from django.shortcuts import get_object_or_404
 from django.urls import reverse_lazy
+from django.utils.functional import cached_property
 
-from django.http import HttpResponseRedirect
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponseRedirect, HttpResponseBadRequest, JsonResponse, StreamingHttpResponse
 from django.contrib import messages
 
+from django.conf import settings
 from django.utils import timezone
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 import calendar
 
-from django.db.models import Sum, F, Q, Value, DecimalField, ExpressionWrapper
+from django.db.models import Sum, Value, DecimalField
 from django.db.models.functions import Coalesce, TruncMonth
 
-from django.db import connection
+from django.db import connection, transaction
 
+from asgiref.sync import sync_to_async
 
-class DashboardView(LoginRequiredMixin, TemplateView):
+
+class RollupSnapshotMixin:
+    # Remember the persisted state of the object before the form mutates it, so
+    # the rollup signals can move its amount out of the old month/category
+    # without re-reading the row.
+    def get_object(self, queryset=None):
+        obj = super().get_object(queryset)
+        rollups.remember(obj)
+        return obj
+
+
+class UserFormKwargsMixin:
+    # Forms whose category choices depend on the user (see core.forms)
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['user'] = self.request.user
+        return kwargs
+
+
+class AsyncLoginRequiredMixin(LoginRequiredMixin):
+    """LoginRequiredMixin for views whose handlers are coroutines."""
+
+    async def dispatch(self, request, *args, **kwargs):
+        # Resolve the user without blocking; the lazy request.user would run
+        # the session and user queries synchronously inside the event loop.
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return self.handle_no_permission()
+        return await super(LoginRequiredMixin, self).dispatch(request, *args, **kwargs)
+
+
+class AsyncListMixin:
+    """
+    Async `get` for ListViews. The rows (or the current page of them) are
+    fetched with `async for` up front, so the synchronous context and template
+    code that follows never touches the database.
+    """
+
+    async def get(self, request, *args, **kwargs):
+        queryset = self.get_queryset()
+        page_size = self.get_paginate_by(queryset)
+        if page_size:
+            self.page = await self.apaginate_queryset(queryset, page_size)
+            self.object_list = self.page[2]
+        else:
+            self.page = None
+            self.object_list = [obj async for obj in queryset]
+        return self.render_to_response(self.get_context_data())
+
+    def paginate_queryset(self, queryset, page_size):
+        # Already fetched by get()
+        return self.page
+
+    def get_context_object_name(self, object_list):
+        return self.context_object_name or f'{self.model._meta.model_name}_list'
+
+
+class DashboardView(AsyncLoginRequiredMixin, ConditionalGetMixin, TemplateView):
     template_name = 'dashboard.html'
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        user = self.request.user
+    async def get(self, request, *args, **kwargs):
+        context = self.get_context_data(**kwargs)
+        user = request.user
 
         # Get the selected month from the query params, default to the current month
-        selected_month = self.request.GET.get('month')
-        selected_year = self.request.GET.get('year')
+        selected_month = request.GET.get('month')
+        selected_year = request.GET.get('year')
 
         # Fallback to current month/year if none is selected
         today = timezone.now()
@@ -34,6 +109,10 @@ class DashboardView(LoginRequiredMixin, TemplateView):
 
         month = int(selected_month) if selected_month else current_month
         year = int(selected_year) if selected_year else current_year
+        # A month outside the calendar (or whose next month is past year 9999)
+        # has no date range; show the current one instead
+        if not (1 <= month <= 12 and 1 <= year < 9999):
+            month, year = current_month, current_year
 
         # Add month names to the context
         context['month_choices'] = [(i, calendar.month_name[i]) for i in range(1, 13)]
@@ -42,75 +121,118 @@ class DashboardView(LoginRequiredMixin, TemplateView):
         context['selected_month'] = month
         context['selected_year'] = year
 
-        # Other context data...
-        context['last_expenses'] = Expense.objects.filter(
-            user=user,
-            date__month=month,
-            date__year=year
-        ).order_by('-date')[:3]
-
-        # Savings Goals (no filtering by month/year)
-        savings_goals = SavingsGoal.objects.filter(user=user)
-        for goal in savings_goals:
-            goal.percentage_achieved = (goal.current_amount / goal.target_amount) * 100 if goal.target_amount else 0
-            goal.days_to_deadline = (goal.deadline - timezone.now().date()).days
-        context['savings_goals'] = savings_goals
-
-        # Budgets Overview for the selected month/year
-        budgets = Budget.objects.filter(user=user).annotate(
-            budget_defined=F('amount'),
-            value_spent=Sum(
-                'category__expenses__amount',
-                filter=Q(category__expenses__date__month=month, category__expenses__date__year=year)
-            ),
-            remaining_budget=ExpressionWrapper(
-                F('amount') - Coalesce(Sum('category__expenses__amount', filter=Q(
-                    category__expenses__date__month=month,
-                    category__expenses__date__year=year
-                )), Value(0)),
-                output_field=DecimalField()
-            )
+        data = await sync_to_async(self.get_dashboard_data)(user, year, month)
+
+        context.update(data)
+        return self.render_to_response(context)
+
+    def get_dashboard_data(self, user, year, month):
+        """
+        The cacheable part of the dashboard for one user and month, read from
+        the cache or computed and cached.
+
+        Computing it always costs exactly four queries (recent expenses,
+        savings goals, monthly totals and budgets with their spend), however
+        many budgets, goals or transactions the user has. The view runs this in
+        a single sync_to_async call: the worker's event loop serves other
+        requests while the database answers, and the queries, which would run
+        one after another on the ORM's thread anyway, cost one hand-off to it
+        instead of one each.
+        """
+        data = caching.get_dashboard(user.pk, year, month)
+        if data is not None:
+            return data
+
+        start, end = month_window(year, month)
+        # Income and expense totals in a single aggregate over the rollup table,
+        # which holds one row per category touched this month.
+        money = DecimalField(max_digits=14, decimal_places=2)
+        totals = MonthlyRollup.objects.filter(user=user, month=start).aggregate(
+            total_income=Coalesce(Sum('income_total'), Value(0), output_field=money),
+            total_expenses=Coalesce(Sum('expense_total'), Value(0), output_field=money),
         )
-        context['budgets'] = budgets
-
-        # Total Income for the selected month/year
-        context['total_income'] = Income.objects.filter(
-            user=user,
-            date__year=year,
-            date__month=month
-        ).aggregate(Sum('amount'))['amount__sum'] or 0
-
-        # Balance calculation
-        total_income = Income.objects.filter(
-            user=user,
-            date__year=year,
-            date__month=month
-        ).aggregate(Sum('amount'))['amount__sum'] or 0
-
-        total_expenses = Expense.objects.filter(
-            user=user,
-            date__year=year,
-            date__month=month
-        ).aggregate(Sum('amount'))['amount__sum'] or 0
-
-        balance = total_income - total_expenses
-        context['balance'] = balance
+        data = {
+            'last_expenses': list(Expense.objects.filter(
+                user=user,
+                **month_filter(year, month)
+            ).select_related('category').order_by('-date', '-pk')[:3]),
+            # Savings Goals (no filtering by month/year), with their progress
+            'savings_goals': list(SavingsGoal.objects.filter(user=user).with_progress()),
+            # Budgets Overview for the selected month/year
+            'budgets': list(Budget.objects.filter(user=user).with_spend(start, end)),
+            # Total Income and balance for the selected month/year
+            'total_income': totals['total_income'],
+            'balance': totals['total_income'] - totals['total_expenses'],
+        }
+        caching.set_dashboard(user.pk, year, month, data)
+        return data
+
+
+class AnalyticsView(LoginRequiredMixin, View):
+    """
+    Monthly expense (per category) and income series as JSON for charts.
+
+    `start` and `end` are months in YYYY-MM format; by default the last twelve
+    months up to the current one. `compare=previous_year` adds the totals of the
+    same months one year earlier.
+    """
+
+    def get(self, request):
+        today = timezone.now().date()
+        try:
+            end = analytics.parse_month(request.GET['end']) if request.GET.get('end') else today.replace(day=1)
+            start = analytics.parse_month(request.GET['start']) if request.GET.get('start') else None
+        except ValueError:
+            return HttpResponseBadRequest("Months must be in YYYY-MM format.")
+        if start is None:
+            # Twelve months, or as many as there are since year 1
+            start = analytics.add_months(end, -min(11, analytics.months_since_first(end)))
+        if start > end:
+            return HttpResponseBadRequest("The start month must not be after the end month.")
+        if (end.year - start.year) * 12 + end.month - start.month >= analytics.MAX_MONTHS:
+            return HttpResponseBadRequest(f"At most {analytics.MAX_MONTHS} months can be requested at once.")
+        year_over_year = request.GET.get('compare') == 'previous_year'
+        if year_over_year and start.year == 1:
+            return HttpResponseBadRequest("Year 1 has no previous year to compare with.")
+
+        series = analytics.monthly_series(request.user.pk, start, end, year_over_year=year_over_year, today=today)
+        return JsonResponse(series)
+
+
+class SearchView(LoginRequiredMixin, TemplateView):
+    template_name = 'core/search.html'
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        query = self.request.GET.get('q', '').strip()
+        context['query'] = query
+        context['results'] = search_transactions(self.request.user, query) if query else None
+        return context
+
+
+class QueryReportView(LoginRequiredMixin, UserPassesTestMixin, TemplateView):
+    template_name = 'core/query_report.html'
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['instrumentation_enabled'] = settings.QUERY_INSTRUMENTATION and settings.QUERY_INSTRUMENTATION_REPORT
+        context['rows'] = request_stats.summary()
         return context
 
 
 # Category Views
-class CategoryListView(LoginRequiredMixin, ListView):
+class CategoryListView(AsyncLoginRequiredMixin, ConditionalGetMixin, ListView):
     model = Category
     template_name = 'core/category_list.html'
     context_object_name = 'categories'
 
-    def get_queryset(self):
-        user_categories = Category.objects.filter(user=self.request.user)
-        default_categories = Category.objects.filter(user=None).exclude(
-            name__in=user_categories.values_list('name', flat=True)
-        )
-        return user_categories | default_categories
+    async def get(self, request, *args, **kwargs):
+        # The user's categories shadowing the defaults, usually from the cache
+        self.object_list = list((await aeffective_categories(request.user.pk)).values())
+        return self.render_to_response(self.get_context_data())
 
 
 class CategoryCreateView(LoginRequiredMixin, CreateView):
@@ -120,11 +242,9 @@ class CategoryCreateView(LoginRequiredMixin, CreateView):
 
     def form_valid(self, form):
         form.instance.user = self.request.user
-        if Category.objects.filter(name=form.instance.name, user=self.request.user).exists():
-            messages.error(self.request, "You already have a category with this name.")
-            return self.form_invalid(form)
-        if Category.objects.filter(name=form.instance.name, user=None).exists():
-            messages.error(self.request, "This name is reserved for a default category.")
+        conflict = name_conflict(self.request.user.pk, form.instance.name)
+        if conflict:
+            messages.error(self.request, conflict)
             return self.form_invalid(form)
         return super().form_valid(form)
 
@@ -171,23 +291,27 @@ class CategoryDeleteView(LoginRequiredMixin, DeleteView):
 
 
 # Expense Views
-class ExpenseListView(LoginRequiredMixin, ListView):
+class ExpenseListView(AsyncLoginRequiredMixin, ConditionalGetMixin, AsyncListMixin, KeysetPaginationMixin, ListView):
     model = Expense
     template_name = 'core/expense_list.html'
 
     def get_queryset(self):
-        return Expense.objects.filter(user=self.request.user)
+        return Expense.objects.filter(user=self.request.user).select_related('category').only(
+            'amount', 'description', 'date', 'category__name'
+        ).order_by(*self.ordering)
 
 
-class ExpenseCreateView(LoginRequiredMixin, CreateView):
+class ExpenseCreateView(LoginRequiredMixin, UserFormKwargsMixin, CreateView):
     model = Expense
-    fields = ['amount', 'category', 'description', 'date']
+    form_class = ExpenseForm
     template_name = 'core/expense_form.html'
     success_url = reverse_lazy('core:expense_list')
 
     def form_valid(self, form):
         # Set the user of the expense to the logged-in user
         form.instance.user = self.request.user
+        # Left blank: the user's categorization rules may pick one
+        categorize(self.request.user.pk, [form.instance])
         return super().form_valid(form)
 
     def get_initial(self):
@@ -196,9 +320,9 @@ class ExpenseCreateView(LoginRequiredMixin, CreateView):
         return initial
 
 
-class ExpenseUpdateView(LoginRequiredMixin, UpdateView):
+class ExpenseUpdateView(LoginRequiredMixin, RollupSnapshotMixin, UserFormKwargsMixin, UpdateView):
     model = Expense
-    fields = ['amount', 'category', 'description', 'date']
+    form_class = ExpenseForm
     template_name = 'core/expense_form.html'
     success_url = reverse_lazy('core:expense_list')
 
@@ -209,13 +333,60 @@ class ExpenseDeleteView(LoginRequiredMixin, DeleteView):
     success_url = reverse_lazy('core:expense_list')
 
 
+class TransactionImportView(LoginRequiredMixin, FormView):
+    form_class = TransactionImportForm
+    template_name = 'core/transaction_import.html'
+    max_errors_shown = 100
+
+    def form_valid(self, form):
+        upload = form.cleaned_data['file']
+        file_format = form.cleaned_data['file_format'] or detect_format(upload.name)
+        result = import_transactions(self.request.user, upload, file_format)
+
+        if result.created:
+            messages.success(
+                self.request,
+                f"Imported {result.expenses} expense(s) and {result.incomes} income(s).",
+            )
+        if result.errors:
+            messages.warning(self.request, f"{len(result.errors)} row(s) could not be imported.")
+        return self.render_to_response(self.get_context_data(
+            form=self.form_class(),
+            result=result,
+            errors=result.errors[:self.max_errors_shown],
+        ))
+
+
+class LedgerExportView(LoginRequiredMixin, View):
+    def get(self, request):
+        file_format = request.GET.get('format', 'csv')
+        if file_format not in EXPORT_FORMATS:
+            return HttpResponseBadRequest("Unsupported export format.")
+        try:
+            start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else None
+            end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else None
+        except ValueError:
+            return HttpResponseBadRequest("Dates must be in YYYY-MM-DD format.")
+
+        chunks = export_ledger(request.user, file_format, start, end)
+        if isinstance(request, ASGIRequest):
+            # Otherwise Django would buffer the whole export before sending it
+            chunks = aiter_export(chunks)
+        response = StreamingHttpResponse(chunks, content_type=EXPORT_FORMATS[file_format])
+        extension = 'csv' if file_format == 'csv' else 'jsonl'
+        response['Content-Disposition'] = f'attachment; filename="ledger.{extension}"'
+        return response
+
+
 # Income Views
-class IncomeListView(LoginRequiredMixin, ListView):
+class IncomeListView(AsyncLoginRequiredMixin, ConditionalGetMixin, AsyncListMixin, KeysetPaginationMixin, ListView):
     model = Income
     template_name = 'core/income_list.html'
 
     def get_queryset(self):
-        return Income.objects.filter(user=self.request.user)
+        return Income.objects.filter(user=self.request.user).only(
+            'amount', 'description', 'date'
+        ).order_by(*self.ordering)
 
 
 class IncomeCreateView(LoginRequiredMixin, CreateView):
@@ -234,7 +405,7 @@ class IncomeCreateView(LoginRequiredMixin, CreateView):
         return initial
 
 
-class IncomeUpdateView(LoginRequiredMixin, UpdateView):
+class IncomeUpdateView(LoginRequiredMixin, RollupSnapshotMixin, UpdateView):
     model = Income
     fields = ['amount', 'description', 'date']
     template_name = 'core/income_form.html'
@@ -248,42 +419,34 @@ class IncomeDeleteView(LoginRequiredMixin, DeleteView):
 
 
 # Budget Views
-class BudgetListView(LoginRequiredMixin, ListView):
+class BudgetListView(AsyncLoginRequiredMixin, ConditionalGetMixin, AsyncListMixin, ListView):
     model = Budget
     template_name = 'core/budget_list.html'
 
     def get_queryset(self):
-        return Budget.objects.filter(user=self.request.user)
+        # Spend for every budget comes from the same query as the budgets themselves
+        return Budget.objects.filter(user=self.request.user).with_spend()
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        budgets = self.get_queryset()  # Get only the budgets of the current user
-        budgets_data = []
-        for budget in budgets:
-            # Sum expenses of the current user within the budget's date range
-            value_spent = budget.category.expenses.filter(
-                user=self.request.user,  # Filter by the current user
-                date__range=(budget.start_date, budget.end_date)
-            ).aggregate(
-                total=Coalesce(Sum('amount', output_field=DecimalField()), Value(0, output_field=DecimalField()))
-            )['total']
-
-            budgets_data.append({
+        context['budgets_data'] = [
+            {
                 'id': budget.id,
                 'category': budget.category.name,
                 'budget_defined': budget.amount,
-                'value_spent': value_spent,
-                'budget_available': budget.amount - value_spent,
+                'value_spent': budget.value_spent,
+                'budget_available': budget.budget_available,
                 'start_date': budget.start_date,
                 'end_date': budget.end_date,
-            })
-        context['budgets_data'] = budgets_data
+            }
+            for budget in context['object_list']
+        ]
         return context
 
 
-class BudgetCreateView(LoginRequiredMixin, CreateView):
+class BudgetCreateView(LoginRequiredMixin, UserFormKwargsMixin, CreateView):
     model = Budget
-    fields = ['category', 'amount', 'start_date', 'end_date']
+    form_class = BudgetForm
     template_name = 'core/budget_form.html'
     success_url = reverse_lazy('core:budget_list')
 
@@ -297,14 +460,15 @@ class BudgetCreateView(LoginRequiredMixin, CreateView):
     
     def get_initial(self):
         initial = super().get_initial()
-        initial['start_date'] = date(timezone.now().year, timezone.now().month, 1)
-        initial['end_date'] = date(timezone.now().year, timezone.now().month, calendar.monthrange(timezone.now().year, timezone.now().month)[1])
+        start, end = month_window(timezone.now().year, timezone.now().month)
+        initial['start_date'] = start
+        initial['end_date'] = end - timedelta(days=1)
         return initial
 
 
-class BudgetUpdateView(LoginRequiredMixin, UpdateView):
+class BudgetUpdateView(LoginRequiredMixin, UserFormKwargsMixin, UpdateView):
     model = Budget
-    fields = ['category', 'amount', 'start_date', 'end_date']
+    form_class = BudgetForm
     template_name = 'core/budget_form.html'
     success_url = reverse_lazy('core:budget_list')
 
@@ -316,45 +480,167 @@ class BudgetDeleteView(LoginRequiredMixin, DeleteView):
 
 
 # SavingsGoal Views
-class SavingsGoalListView(LoginRequiredMixin, ListView):
+class SavingsGoalListView(AsyncLoginRequiredMixin, ConditionalGetMixin, AsyncListMixin, ListView):
     model = SavingsGoal
     template_name = 'core/savings_goal_list.html'
     context_object_name = 'savings_goals'
 
     def get_queryset(self):
-        return SavingsGoal.objects.filter(user=self.request.user)
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        savings_goals = self.get_queryset()
-        for goal in savings_goals:
-            goal.amount_to_goal = goal.target_amount - goal.current_amount
-
-            days_to_go = (goal.deadline - date.today()).days
-            goal.remaining_days = f"{days_to_go} days to go" if days_to_go > 0 else "Deadline passed"
-        context['savings_goals'] = savings_goals
-        return context
+        # Progress and days left are computed by the database
+        return SavingsGoal.objects.filter(user=self.request.user).with_progress()
 
 
-class SavingsGoalCreateView(LoginRequiredMixin, CreateView):
+class SavingsGoalFormMixin:
+    """
+    Record changes to "Amount Saved" as contributions rather than writing
+    `current_amount`, which only the contribution signals update.
+    """
     model = SavingsGoal
-    fields = ['goal_name', 'target_amount', 'current_amount', 'deadline']
+    form_class = SavingsGoalEditForm
     template_name = 'core/savings_goal_form.html'
     success_url = reverse_lazy('core:savings_goal_list')
 
+    def form_valid(self, form):
+        change = form.amount_change()
+        goal = form.save(commit=False)
+        adding = goal._state.adding
+        with transaction.atomic():
+            if adding:
+                goal.current_amount = 0
+                goal.save()
+            else:
+                # Leave current_amount out so concurrent contributions are kept
+                goal.save(update_fields=['goal_name', 'target_amount', 'deadline'])
+            if change:
+                SavingsContribution.objects.create(
+                    goal=goal, amount=change, note='Opening balance' if adding else 'Adjustment'
+                )
+        self.object = goal
+        return HttpResponseRedirect(self.get_success_url())
+
+
+class SavingsGoalCreateView(LoginRequiredMixin, SavingsGoalFormMixin, CreateView):
     def form_valid(self, form):
         form.instance.user = self.request.user
         return super().form_valid(form)
 
 
-class SavingsGoalUpdateView(LoginRequiredMixin, UpdateView):
-    model = SavingsGoal
-    fields = ['goal_name', 'target_amount', 'current_amount', 'deadline']
-    template_name = 'core/savings_goal_form.html'
+class SavingsGoalUpdateView(LoginRequiredMixin, SavingsGoalFormMixin, UpdateView):
+    def get_queryset(self):
+        return SavingsGoal.objects.filter(user=self.request.user)
+
+
+class SavingsContributionCreateView(LoginRequiredMixin, CreateView):
+    model = SavingsContribution
+    fields = ['amount', 'date', 'note']
+    template_name = 'core/savings_contribution_form.html'
     success_url = reverse_lazy('core:savings_goal_list')
 
+    @cached_property
+    def goal(self):
+        return get_object_or_404(SavingsGoal, pk=self.kwargs['pk'], user=self.request.user)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['goal'] = self.goal
+        context['contributions'] = self.goal.contributions.order_by('-date', '-pk')[:10]
+        return context
+
+    def form_valid(self, form):
+        form.instance.goal = self.goal
+        return super().form_valid(form)
+
 
 class SavingsGoalDeleteView(LoginRequiredMixin, DeleteView):
     model = SavingsGoal
     template_name = 'core/savings_goal_confirm_delete.html'
     success_url = reverse_lazy('core:savings_goal_list')
+
+
+# Recurring Transaction Views
+class RecurringTransactionListView(LoginRequiredMixin, ListView):
+    model = RecurringTransaction
+    template_name = 'core/recurring_list.html'
+    context_object_name = 'schedules'
+
+    def get_queryset(self):
+        return RecurringTransaction.objects.filter(user=self.request.user).select_related('category').order_by(
+            'next_due_date', 'pk'
+        )
+
+
+class RecurringTransactionCreateView(LoginRequiredMixin, UserFormKwargsMixin, CreateView):
+    model = RecurringTransaction
+    form_class = RecurringTransactionForm
+    template_name = 'core/recurring_form.html'
+    success_url = reverse_lazy('core:recurring_list')
+
+    def form_valid(self, form):
+        form.instance.user = self.request.user
+        if form.instance.kind == RecurringTransaction.INCOME:
+            form.instance.category = None
+        return super().form_valid(form)
+
+
+class RecurringTransactionUpdateView(LoginRequiredMixin, UserFormKwargsMixin, UpdateView):
+    model = RecurringTransaction
+    form_class = RecurringTransactionForm
+    template_name = 'core/recurring_form.html'
+    success_url = reverse_lazy('core:recurring_list')
+
+    def get_queryset(self):
+        return RecurringTransaction.objects.filter(user=self.request.user)
+
+    def form_valid(self, form):
+        if form.instance.kind == RecurringTransaction.INCOME:
+            form.instance.category = None
+        recurring.reschedule_edited(form)
+        return super().form_valid(form)
+
+
+class RecurringTransactionDeleteView(LoginRequiredMixin, DeleteView):
+    model = RecurringTransaction
+    template_name = 'core/recurring_confirm_delete.html'
+    success_url = reverse_lazy('core:recurring_list')
+
+    def get_queryset(self):
+        return RecurringTransaction.objects.filter(user=self.request.user)
+
+
+class CategorizationRuleListView(LoginRequiredMixin, ListView):
+    model = CategorizationRule
+    template_name = 'core/rule_list.html'
+    context_object_name = 'rules'
+
+    def get_queryset(self):
+        return CategorizationRule.objects.filter(user=self.request.user).select_related('category')
+
+
+class CategorizationRuleCreateView(LoginRequiredMixin, UserFormKwargsMixin, CreateView):
+    model = CategorizationRule
+    form_class = CategorizationRuleForm
+    template_name = 'core/rule_form.html'
+    success_url = reverse_lazy('core:rule_list')
+
+    def form_valid(self, form):
+        form.instance.user = self.request.user
+        return super().form_valid(form)
+
+
+class CategorizationRuleUpdateView(LoginRequiredMixin, UserFormKwargsMixin, UpdateView):
+    model = CategorizationRule
+    form_class = CategorizationRuleForm
+    template_name = 'core/rule_form.html'
+    success_url = reverse_lazy('core:rule_list')
+
+    def get_queryset(self):
+        return CategorizationRule.objects.filter(user=self.request.user)
+
+
+class CategorizationRuleDeleteView(LoginRequiredMixin, DeleteView):
+    model = CategorizationRule
+    template_name = 'core/rule_confirm_delete.html'
+    success_url = reverse_lazy('core:rule_list')
+
+    def get_queryset(self):
+        return CategorizationRule.objects.filter(user=self.request.user)